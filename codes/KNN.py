@@ -4,7 +4,6 @@ import sys,pickle,os
 import data_visualise
 import table_display
 from PyQt5 import uic, QtWidgets ,QtCore, QtGui
-from sklearn.model_selection import train_test_split
 from sklearn.neighbors import KNeighborsClassifier as KNC
 from sklearn import metrics
 import numpy as np
@@ -13,7 +12,7 @@ import pandas as pd
 import seaborn as sns
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score
-import common,plots
+import common,plots,search,cross_val,fit_cache,split_service,ann_index,fast_metrics,curves,compress,background
 
 
 
@@ -48,16 +47,19 @@ class UI(QMainWindow):
         self.test_size_btn=self.findChild(QPushButton,"test_size_btn")
         self.train_btn.clicked.connect(self.training)
         self.conf_mat_btn=self.findChild(QPushButton,"conf_mat")
-        #self.roc_btn.clicked.connect(self.roc_plot)
+        self.roc_btn.clicked.connect(self.roc_plot)
         self.conf_mat_btn.clicked.connect(self.conf_matrix)
         self.test_size_btn.clicked.connect(self.test_split)
         self.dwnld.clicked.connect(self.download_model)
         self.visualize.clicked.connect(self.boundary)
+        self.search_btn.clicked.connect(self.run_search)
+        self.cv_btn.clicked.connect(self.cross_validate)
         self.setvalue()
         self.show()
 
     def setvalue(self):
         self.target.setText(self.target_value)
+        self.group_col.addItems(list(self.X.columns))
         self.columns.clear()
         self.columns.addItems(self.column_list)
         self.X_combo.addItems(self.column_list)
@@ -65,50 +67,118 @@ class UI(QMainWindow):
 
     def download_model(self):
 
-        name = QtWidgets.QFileDialog.getSaveFileName(self, 'Save File','/home/akshay/Desktop',"pickle(*.pkl)")
-        #file = open(name[0],'w')
-        
-        pkl_filename = name[0]
-        with open(pkl_filename, 'wb') as file:
-            pickle.dump(self.lr, file)  
-        
-        self.user_act.save_file(pkl_filename)
+        # the options are measured off the GUI thread, the dialogs follow
+        self.dwnld.setEnabled(False)
+        self.statusBar().showMessage("measuring compression options...")
+        background.start(compress.options,self.lr,self.x_test,self.y_test,self.x_train,self.y_train,done=self.save_options,failed=self.download_failed)
+
+    def download_failed(self,message):
+
+        self.dwnld.setEnabled(True)
+        self.statusBar().showMessage(message)
+
+    def save_options(self,options):
+
+        self.dwnld.setEnabled(True)
+        labels=[compress.describe(o,options[0]) for o in options]
+        label,ok=QtWidgets.QInputDialog.getItem(self,'Compression','Size and held-out accuracy:',labels,0,False)
+        if not ok:
+            return
+        name = QtWidgets.QFileDialog.getSaveFileName(self, 'Save File','/home/akshay/Desktop',"bundle(*.mlb);;pickle(*.pkl)")
+        if name[0]=="":
+            return
+        self.user_act.save_model(options[labels.index(label)]['model'],name[0],self.X,self.target_value)
+        self.statusBar().showMessage("saved "+label)
 
     def boundary(self):
 
         x1=self.X_combo.currentText()
         x2=self.Y_combo.currentText()
-        plots.plot_boundary(self.df[x1],self.df[x2],self.lr.predict(self.df))
+        plots.decision_regions(self.lr,self.x_train,self.y_train,self.column_list,x1,x2)
 
     def test_split(self):
 
-        self.x_train,self.x_test,self.y_train,self.y_test = train_test_split(self.df,self.X[self.target_value],test_size=float(self.test_data.text()),random_state=0)
+        mode=self.split_mode.currentText()
+        self.split=split_service.get(self.df,self.X[self.target_value],float(self.test_data.text()),mode=mode,groups=self.X[self.group_col.currentText()] if mode=='grouped' else None,dtype=self.split_dtype.currentText())
+        self.x_train,self.x_test,self.y_train,self.y_test = self.split.views()
+        self.data_key=self.split.key
         print(self.y_train.shape)
         print(self.y_test.shape)
         self.train_size.setText(str(self.x_train.shape))
         self.test_size.setText(str(self.x_test.shape))
 
+    def estimator(self):
+
+        if self.algorithm.currentText()=='approximate':
+            return ann_index.approximate_knn,{'n_trees':int(self.n_trees.text()),'leaf_size':int(self.leaf_size.text())}
+        return KNC,{'algorithm':self.algorithm.currentText()}
+
+    def build_model(self):
+
+        estimator,base=self.estimator()
+        return estimator(n_neighbors=int(self.neighbours.text()),weights=self.weights.currentText(),**base)
+
     def training(self):
 
-        self.lr = KNC(n_neighbors=int(self.neighbours.text()),weights=self.weights.currentText(),algorithm=self.algorithm.currentText())
-        self.lr.fit(self.x_train,self.y_train)
-        
-        self.pre=self.lr.predict(self.x_test)
-        self.mae.setText(str(metrics.mean_absolute_error(self.y_test,self.pre)))
-        self.mse.setText(str(metrics.mean_squared_error(self.y_test,self.pre)))
-        self.rmse.setText(str(np.sqrt(metrics.mean_squared_error(self.y_test,self.pre))))
-        self.accuracy.setText(str(accuracy_score(self.pre,self.y_test)))
+        self.lr,self.pre,hit=fit_cache.fit(self.build_model(),self.x_train,self.y_train,self.x_test,self.data_key)
+        self.statusBar().showMessage(fit_cache.cache.status(hit))
+        self.show_metrics()
+
+    def run_search(self):
 
-        text=steps.classification_(self.y_test,self.pre)
-        self.report.setPlainText(text)
+        estimator,base=self.estimator()
+        self.leaderboard.clear()
+        errors=[]
+        self.search_btn.setEnabled(False)
+
+        def done(board):
+            self.search_btn.setEnabled(True)
+            if board:
+                self.lr,self.pre,hit=fit_cache.fit(estimator(**dict(base,**search.best_params(board))),self.x_train,self.y_train,self.x_test,self.data_key)
+                self.statusBar().showMessage(fit_cache.cache.status(hit))
+                self.show_metrics()
+            else:
+                self.statusBar().showMessage("no candidate could be fitted: "+("; ".join(errors) or "none finished within the budget"))
+
+        # candidates are fitted on a worker thread, the board updates as they finish
+        background.start(search.run,estimator,search.parse_space(self.search_space.text()),self.x_train,self.y_train,strategy=self.strategy.currentText(),base=base,budget=float(self.budget.text()),errors=errors,progress=self.show_board,done=done,failed=self.search_failed)
+
+    def show_board(self,board):
+
+        self.leaderboard.setPlainText(search.format_board(board))
+
+    def search_failed(self,message):
+
+        self.search_btn.setEnabled(True)
+        self.statusBar().showMessage(message)
+
+    def cross_validate(self):
+
+        scores=cross_val.run(self.build_model(),self.df,self.X[self.target_value],folds=int(self.folds.text()),stratified=self.cv_mode.currentText()=='stratified k-fold')
+        summary=cross_val.summary(scores)
+        self.mae.setText(summary.get('mae',''))
+        self.mse.setText(summary.get('mse',''))
+        self.rmse.setText(summary.get('rmse',''))
+        self.accuracy.setText(summary['accuracy'])
+        self.report.setPlainText(cross_val.report(scores))
+
+    def show_metrics(self):
+
+        self.scores=fast_metrics.evaluate(self.y_test,self.pre)
+        self.mae.setText(str(self.scores.get('mae','')))
+        self.mse.setText(str(self.scores.get('mse','')))
+        self.rmse.setText(str(self.scores.get('rmse','')))
+        self.accuracy.setText(str(self.scores['accuracy']))
+        self.report.setPlainText(fast_metrics.report_text(self.scores))
 
     def conf_matrix(self):
 
-        data = {'y_Actual':self.y_test.values,'y_Predicted':self.pre }
-        df = pd.DataFrame(data, columns=['y_Actual','y_Predicted'])
-        confusion_matrix = pd.crosstab(df['y_Actual'], df['y_Predicted'], rownames=['Actual'], colnames=['Predicted'])
         plt.figure()
-        sns.heatmap(confusion_matrix, annot=True)
+        sns.heatmap(fast_metrics.confusion_frame(self.scores), annot=True)
         plt.show()
 
+    def roc_plot(self):
+
+        curves.plot(curves.cache.get(self.lr,self.x_test,self.y_test),"KNN")
+
     
\ No newline at end of file
@@ -1,4 +1,6 @@
 
+import os,pickle
+import bundle
 from sklearn.pipeline import Pipeline
 
 class add_steps:
@@ -7,11 +9,16 @@ class add_steps:
 
 		self.text=""
 		self.code=""
+		self.pipeline=[]
 
 	def delete_text(self):
 
 		self.text=""
 
+	def delete_pipeline(self):
+
+		self.pipeline=[]
+
 	def add_text(self,text):
 
 		self.text=self.text + "\n" + text
@@ -20,16 +27,33 @@ class add_steps:
 
 	def save_file(self,filename):
 
-		filename = filename.split(".")
-		filename=filename[0]+".txt"
-		f=open(filename, 'w')
+		base=os.path.splitext(filename)[0]
+		f=open(base+".txt", 'w')
 		print(self.text)
 		f.write(self.text)
+		# the fitted steps, so score.py can prepare raw rows the same way
+		with open(base+".pipeline",'wb') as f:
+			pickle.dump(self.pipeline,f)
+
+	def save_model(self,model,filename,df=None,target=None):
+
+		# a .mlb bundle holds the model, the steps, the schema and this log in
+		# one file; anything else is the old pickle with its sidecar files
+		if not os.path.splitext(filename)[1]:
+			filename+=".mlb"
+		if filename.endswith(".mlb"):
+			schema=bundle.schema_of(df,target) if df is not None else None
+			bundle.save(filename,model,self.pipeline,schema,{'actions':self.text})
+		else:
+			with open(filename,'wb') as f:
+				pickle.dump(model,f)
+			self.save_file(filename)
+		return filename
 
 	def add_pipeline(self,name,action):
 
-		print(name,"\n")
-		print(action)
+		# action is a (kind, column, fitted state) tuple that data_.replay understands
+		self.pipeline.append(action)
 
 
 	def add_code(self,text):
@@ -0,0 +1,126 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from sklearn.base import BaseEstimator,ClassifierMixin
+
+
+class rp_forest:
+
+    # A forest of random-projection trees stored as flat arrays. Every split
+    # is a hyperplane halfway between two random points of the node, leaves
+    # hold at most leaf_size row ids (padded with -1). A child id below zero
+    # points at leaf -(id+1).
+    def __init__(self,x,n_trees=10,leaf_size=40,seed=0):
+
+        self.x=np.ascontiguousarray(x,dtype=np.float32)
+        self.leaf_size=leaf_size
+        rng=np.random.RandomState(seed)
+        self.trees=[self._build(rng) for _ in range(n_trees)]
+
+    def _build(self,rng):
+
+        normals,offsets,left,right,leaves=[],[],[],[],[]
+
+        def grow(rows):
+            if len(rows)<=self.leaf_size:
+                leaves.append(rows)
+                return -len(leaves)
+            a,b=self.x[rng.choice(rows,2,replace=False)]
+            normal=a-b
+            proj=self.x[rows]@normal
+            offset=np.median(proj)
+            go_left=proj<=offset
+            if go_left.all() or not go_left.any():
+                # duplicate points, split them arbitrarily
+                go_left=np.zeros(len(rows),dtype=bool)
+                go_left[:len(rows)//2]=True
+            node=len(normals)
+            normals.append(normal)
+            offsets.append(offset)
+            left.append(0)
+            right.append(0)
+            left[node]=grow(rows[go_left])
+            right[node]=grow(rows[~go_left])
+            return node
+
+        root=grow(np.arange(len(self.x)))
+        leaf_rows=np.full((len(leaves),self.leaf_size),-1,dtype=np.int64)
+        for i,rows in enumerate(leaves):
+            leaf_rows[i,:len(rows)]=rows
+        return {'root':root,'normals':np.array(normals,dtype=np.float32).reshape(-1,self.x.shape[1]),
+            'offsets':np.array(offsets,dtype=np.float32),'left':np.array(left,dtype=np.int64),
+            'right':np.array(right,dtype=np.int64),'leaves':leaf_rows}
+
+    def _leaf(self,tree,q):
+
+        node=np.full(len(q),tree['root'],dtype=np.int64)
+        active=np.flatnonzero(node>=0)
+        while len(active):
+            n=node[active]
+            proj=np.einsum('ij,ij->i',q[active],tree['normals'][n])
+            node[active]=np.where(proj<=tree['offsets'][n],tree['left'][n],tree['right'][n])
+            active=active[node[active]>=0]
+        return -node-1
+
+    def query(self,q,k,n_trees=None):
+
+        # candidates are the union of the query's leaf in each tree, scored
+        # with exact distances; using fewer trees trades recall for speed
+        q=np.ascontiguousarray(q,dtype=np.float32)
+        trees=self.trees[:n_trees] if n_trees else self.trees
+        cand=np.hstack([tree['leaves'][self._leaf(tree,q)] for tree in trees])
+        cand.sort(axis=1)
+        dup=np.zeros(cand.shape,dtype=bool)
+        dup[:,1:]=cand[:,1:]==cand[:,:-1]
+        d=((self.x[np.maximum(cand,0)]-q[:,None,:])**2).sum(axis=2)
+        d[(cand<0)|dup]=np.inf
+        k=min(k,d.shape[1])
+        top=np.argpartition(d,k-1,axis=1)[:,:k]
+        dist=np.take_along_axis(d,top,axis=1)
+        order=np.argsort(dist,axis=1)
+        return np.sqrt(np.take_along_axis(dist,order,axis=1)),np.take_along_axis(cand,np.take_along_axis(top,order,axis=1),axis=1)
+
+
+class approximate_knn(ClassifierMixin,BaseEstimator):
+
+    def __init__(self,n_neighbors=5,weights='uniform',n_trees=10,search_trees=None,leaf_size=40,batch=256,n_jobs=None):
+
+        self.n_neighbors=n_neighbors
+        self.weights=weights
+        self.n_trees=n_trees
+        self.search_trees=search_trees
+        self.leaf_size=leaf_size
+        self.batch=batch
+        self.n_jobs=n_jobs
+
+    def fit(self,x,y):
+
+        self.classes_,self._y=np.unique(np.asarray(y),return_inverse=True)
+        self.index_=rp_forest(np.asarray(x,dtype=np.float32),self.n_trees,max(self.leaf_size,self.n_neighbors))
+        return self
+
+    def kneighbors(self,x,n_neighbors=None):
+
+        # queries run in blocks so the candidate distance matrix stays small,
+        # and the blocks are spread over threads (numpy releases the GIL)
+        x=np.asarray(x,dtype=np.float32)
+        k=n_neighbors or self.n_neighbors
+        blocks=range(0,len(x),self.batch)
+        with ThreadPoolExecutor(max_workers=self.n_jobs or os.cpu_count()) as pool:
+            parts=list(pool.map(lambda i:self.index_.query(x[i:i+self.batch],k,self.search_trees),blocks))
+        if not parts:
+            return np.empty((0,k)),np.empty((0,k),dtype=np.int64)
+        return np.vstack([p[0] for p in parts]),np.vstack([p[1] for p in parts])
+
+    def predict_proba(self,x):
+
+        dist,ind=self.kneighbors(x)
+        w=np.ones_like(dist) if self.weights=='uniform' else 1/np.maximum(dist,1e-12)
+        w[ind<0]=0
+        votes=np.zeros((len(ind),len(self.classes_)))
+        np.add.at(votes,(np.repeat(np.arange(len(ind)),ind.shape[1]),self._y[np.maximum(ind,0)].ravel()),w.ravel())
+        return votes/np.maximum(votes.sum(axis=1,keepdims=True),1e-12)
+
+    def predict(self,x):
+
+        return self.classes_[self.predict_proba(x).argmax(axis=1)]
@@ -0,0 +1,49 @@
+import json,struct
+import numpy as np
+
+MAGIC=b'MLARRAY1'
+ALIGN=64
+
+
+# Layout: magic, header length, JSON header, then every array as raw bytes
+# starting on a 64-byte boundary, so each can be mapped in place by np.memmap.
+def save(path,arrays,meta=None):
+
+    header={'meta':meta or {},'arrays':{}}
+    offset=0
+    for name,a in arrays.items():
+        a=np.ascontiguousarray(a)
+        header['arrays'][name]={'dtype':a.dtype.str,'shape':list(a.shape),'offset':offset}
+        offset+=-(-a.nbytes//ALIGN)*ALIGN
+    blob=json.dumps(header).encode()
+    start=-(-(len(MAGIC)+8+len(blob))//ALIGN)*ALIGN
+    with open(path,'wb') as f:
+        f.write(MAGIC+struct.pack('<Q',len(blob))+blob)
+        f.write(b'\0'*(start-f.tell()))
+        for name,a in arrays.items():
+            f.seek(start+header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(a).tobytes())
+        f.truncate(start+offset)
+
+
+def read_header(path):
+
+    with open(path,'rb') as f:
+        if f.read(len(MAGIC))!=MAGIC:
+            raise ValueError(path+" is not an array file")
+        n=struct.unpack('<Q',f.read(8))[0]
+        header=json.loads(f.read(n))
+    return header,-(-(len(MAGIC)+8+n)//ALIGN)*ALIGN
+
+
+def load(path,mmap_mode='r'):
+
+    header,start=read_header(path)
+    arrays={}
+    for name,spec in header['arrays'].items():
+        shape=tuple(spec['shape'])
+        if 0 in shape:
+            arrays[name]=np.empty(shape,dtype=spec['dtype'])
+        else:
+            arrays[name]=np.memmap(path,dtype=spec['dtype'],mode=mmap_mode,offset=start+spec['offset'],shape=shape)
+    return arrays,header['meta']
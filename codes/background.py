@@ -0,0 +1,53 @@
+from PyQt5 import QtCore
+
+# Long jobs (searches, comparisons, compression options) run on a QThread so
+# the window keeps painting. Their results, errors and progress come back as
+# queued signals, so the handlers always run on the GUI thread.
+
+# started tasks stay referenced here until their result has been handled
+running=set()
+
+
+class task(QtCore.QThread):
+
+    progress=QtCore.pyqtSignal(object)
+    result=QtCore.pyqtSignal(object)
+    failed=QtCore.pyqtSignal(str)
+
+    def __init__(self,func,args,kwargs):
+
+        super().__init__()
+        self.func=func
+        self.args=args
+        self.kwargs=kwargs
+
+    def run(self):
+
+        try:
+            value=self.func(*self.args,**self.kwargs)
+        except Exception as e:
+            self.failed.emit("{}: {}".format(type(e).__name__,e))
+            return
+        self.result.emit(value)
+
+
+def start(func,*args,progress=None,done=None,failed=None,**kwargs):
+
+    # progress, when given, is passed to func as its callback argument and
+    # gets func's callback arguments on the GUI thread
+    t=task(func,args,kwargs)
+    if progress:
+        kwargs['callback']=lambda *a:t.progress.emit(a)
+        t.progress.connect(lambda a:progress(*a),QtCore.Qt.QueuedConnection)
+
+    def finish(handler,value):
+        t.wait()
+        running.discard(t)
+        if handler:
+            handler(value)
+
+    t.result.connect(lambda value:finish(done,value),QtCore.Qt.QueuedConnection)
+    t.failed.connect(lambda message:finish(failed,message),QtCore.Qt.QueuedConnection)
+    running.add(t)
+    t.start()
+    return t
@@ -0,0 +1,17 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+def predict(model,x,chunk=50000,workers=None,method='predict'):
+
+    # numpy and the sklearn kernels release the GIL, so threads are enough to
+    # spread the chunks over cores and nothing has to be copied to a worker
+    n=len(x)
+    if n<=chunk:
+        return getattr(model,method)(x)
+    bounds=range(0,n,chunk)
+    rows=x.iloc if hasattr(x,'iloc') else x
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        parts=list(pool.map(lambda i:getattr(model,method)(rows[i:i+chunk]),bounds))
+    return np.concatenate(parts)
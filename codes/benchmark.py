@@ -0,0 +1,271 @@
+import os,sys,json,time,pickle,platform,tempfile,argparse,tracemalloc
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.neural_network import MLPClassifier
+from sklearn.svm import SVC,SVR
+import data_visualise,lstsq_stream,nb_stats,kernel_approx,split_service
+
+# Times the data operations, the table model, every training window's
+# estimator and pickling on synthetic data, and compares against a baseline:
+#
+#   python benchmark.py --rows 1000 100000 10000000 --cols 10 1000 -o bench.json
+#   python benchmark.py -o new.json --baseline bench.json
+#
+# Each case runs once under tracemalloc for its peak memory and then
+# --repeat times untraced for its time (the fastest run is kept). The exit
+# status is 1 when a case got slower or bigger than the baseline allows.
+
+data=data_visualise.data_()
+
+# rows above which a case is run on the first max rows only, for estimators
+# whose cost grows faster than linearly
+MAX_ROWS={'svm':20000,'svm approx':200000,'SVR':20000,'SVR approx':200000,'KNN':200000,'mlp':200000}
+
+
+def synthetic(rows,cols,seed=0):
+
+    # numeric features, two categoricals (10 and 1000 levels), a few
+    # missing values, and a class and a regression target from the features
+    rng=np.random.RandomState(seed)
+    x=rng.standard_normal((rows,cols))
+    w=rng.standard_normal(cols)
+    z=x@w/np.sqrt(cols)
+    df=pd.DataFrame(x,columns=["f{}".format(i) for i in range(cols)])
+    df['cat_small']=np.array(["s{}".format(i) for i in range(10)],dtype=object)[rng.randint(0,10,rows)]
+    df['cat_large']=np.array(["l{}".format(i) for i in range(1000)],dtype=object)[rng.randint(0,1000,rows)]
+    missing=rng.rand(rows)<0.01
+    df.loc[missing,'f0']=np.nan
+    df.loc[missing,'cat_small']=None
+    df['value']=z+0.1*rng.standard_normal(rows)
+    df['target']=np.digitize(z,np.quantile(z,[1/3,2/3]))
+    return df
+
+
+def measure(func,setup=None,repeat=1,memory=True):
+
+    # setup runs outside the timed part, e.g. copies of frames that the
+    # operation modifies in place
+    out={}
+    if memory:
+        args=setup() if setup else ()
+        tracemalloc.start()
+        try:
+            func(*args)
+            out['peak_mb']=tracemalloc.get_traced_memory()[1]/2**20
+        finally:
+            tracemalloc.stop()
+    best=None
+    for _ in range(repeat):
+        args=setup() if setup else ()
+        start=time.perf_counter()
+        func(*args)
+        t=time.perf_counter()-start
+        best=t if best is None else min(best,t)
+    out['seconds']=best
+    return out
+
+
+def data_cases(df,path):
+
+    num=[c for c in df.columns if c.startswith('f')]
+    copy=lambda:(df.copy(),)
+    scaled=lambda:(df[num+['target']].fillna(0),)
+    return [
+        ('load',None,lambda:data.read_file(path)),
+        ('get_column_list',None,lambda:data.get_column_list(df)),
+        ('get_empty_list',None,lambda:data.get_empty_list(df)),
+        ('get_shape',None,lambda:data.get_shape(df)),
+        ('get_numeric',None,lambda:data.get_numeric(df)),
+        ('get_cat',None,lambda:data.get_cat(df)),
+        ('get_describe',None,lambda:data.get_describe(df)),
+        ('fillna',copy,lambda d:data.fillna(d,'cat_small')),
+        ('fillmean',copy,lambda d:data.fillmean(d,'f0')),
+        ('drop_columns',None,lambda:data.drop_columns(df,'cat_large')),
+        ('convert_category',copy,lambda d:data.convert_category(d,'cat_large')),
+        ('one_hot',copy,lambda d:data.one_hot(d,'cat_small')),
+        ('StandardScale',scaled,lambda d:data.StandardScale(d,'target')),
+        ('MinMaxScale',scaled,lambda d:data.MinMaxScale(d,'target')),
+        ('PowerScale',scaled,lambda d:data.PowerScale(d,'target')),
+    ]
+
+
+def table_cases(df,pages=50,page_rows=40,page_cols=20,seed=0):
+
+    # what the table view asks for while scrolling: one page of cells per
+    # step, at evenly spread and at random positions (a dragged scrollbar)
+    try:
+        import table_display
+        from PyQt5 import QtCore
+    except ImportError:
+        return []
+    model=table_display.DataFrameModel(df)
+    last=max(len(df)-page_rows,0)
+    cols=min(page_cols,len(df.columns))
+
+    def scroll(tops):
+        for top in tops:
+            for c in range(cols):
+                model.headerData(c,QtCore.Qt.Horizontal)
+            for r in range(top,min(top+page_rows,len(df))):
+                model.headerData(r,QtCore.Qt.Vertical)
+                for c in range(cols):
+                    model.data(model.index(r,c))
+
+    steady=np.linspace(0,last,pages).astype(int)
+    jumps=np.random.RandomState(seed).randint(0,last+1,pages)
+    return [('scroll',None,lambda:scroll(steady)),('jump',None,lambda:scroll(jumps))]
+
+
+def estimators(x):
+
+    # the windows' estimators with the defaults their forms start with;
+    # the value column is the target of the regression windows
+    gamma=kernel_approx.gamma_value('scale',x[:10000])
+    return [
+        ('linear_reg','value',lambda:lstsq_stream.streaming_lstsq()),
+        ('logistic_reg','target',lambda:LogisticRegression(max_iter=100)),
+        ('KNN','target',lambda:KNeighborsClassifier(n_neighbors=5)),
+        ('RandomForest','target',lambda:RandomForestClassifier(n_estimators=100,n_jobs=-1,random_state=0)),
+        ('svm','target',lambda:SVC()),
+        ('svm approx','target',lambda:kernel_approx.classifier('nystroem',gamma=gamma)),
+        ('SVR','value',lambda:SVR()),
+        ('SVR approx','value',lambda:kernel_approx.regressor('nystroem',gamma=gamma)),
+        ('gaussian','target',lambda:nb_stats.parallel_gaussian_nb()),
+        ('mlp','target',lambda:MLPClassifier(hidden_layer_sizes=(100,),max_iter=10,random_state=1)),
+    ]
+
+
+def model_cases(df,folder,test_size=0.2):
+
+    # fit and predict on the split a window would get from the numeric
+    # columns plus a one-hot categorical (CSR for logistic regression, dense
+    # for the rest), then the fitted model through pickle to disk and back
+    num=[c for c in df.columns if c.startswith('f')]
+    frame=df[num+['cat_small']].fillna({'f0':0})
+    frame,_=data.one_hot(frame,'cat_small')
+    cases=[]
+    for name,target,build in estimators(frame[num].to_numpy()):
+        n=min(len(frame),MAX_ROWS.get(name,len(frame)))
+        split=split_service.get(frame[:n],df[target][:n],test_size,sparse=name=='logistic_reg')
+        xtr,xte,ytr,_=split.views()
+        fitted={}
+        path=os.path.join(folder,name.replace(' ','_')+".pkl")
+
+        def fit(build=build,xtr=xtr,ytr=ytr,fitted=fitted):
+            fitted['model']=build().fit(xtr,ytr)
+
+        def save(fitted=fitted,path=path):
+            with open(path,'wb') as f:
+                pickle.dump(fitted['model'],f)
+
+        def load(path=path):
+            with open(path,'rb') as f:
+                return pickle.load(f)
+
+        cases+=[(name+'/fit',None,fit,n),(name+'/predict',None,lambda fitted=fitted,xte=xte:fitted['model'].predict(xte),n),
+            (name+'/pickle_save',None,save,n),(name+'/pickle_load',None,load,n)]
+    return cases
+
+
+def run(rows_list,cols_list,groups=('data','table','model'),repeat=1,memory=True,max_cells=2e8,callback=None):
+
+    results={}
+    with tempfile.TemporaryDirectory() as folder:
+        for rows in rows_list:
+            for cols in cols_list:
+                size="{}x{}".format(rows,cols)
+                if rows*cols>max_cells:
+                    if callback:
+                        callback(size,"skipped, over --max-cells",None)
+                    continue
+                df=synthetic(rows,cols)
+                path=os.path.join(folder,"data.csv")
+                if 'data' in groups:
+                    df.to_csv(path,index=False)
+                cases=[]
+                if 'data' in groups:
+                    cases+=[('data/'+n,s,f,rows) for n,s,f in data_cases(df,path)]
+                if 'table' in groups:
+                    cases+=[('table/'+n,s,f,rows) for n,s,f in table_cases(df)]
+                if 'model' in groups:
+                    cases+=[('model/'+n,s,f,r) for n,s,f,r in model_cases(df,folder)]
+                for name,setup,func,used in cases:
+                    key="{}/{}".format(name,size)
+                    try:
+                        results[key]=dict(measure(func,setup,repeat,memory),rows=used,cols=cols)
+                    except Exception as e:
+                        results[key]={'error':"{}: {}".format(type(e).__name__,e),'rows':used,'cols':cols}
+                    if callback:
+                        callback(key,None,results[key])
+                del df
+    return results
+
+
+def environment():
+
+    return {'created':time.strftime('%Y-%m-%dT%H:%M:%S'),'python':platform.python_version(),'platform':platform.platform(),
+        'cpus':os.cpu_count(),'numpy':np.__version__,'pandas':pd.__version__,'sklearn':sklearn.__version__}
+
+
+def compare(results,baseline,tolerance=0.25,min_seconds=0.01,min_mb=1.0):
+
+    # a case regresses when it is both relatively (tolerance) and absolutely
+    # (min_seconds, min_mb) worse, so timer noise on tiny cases is ignored
+    out=[]
+    for key,new in results.items():
+        old=baseline.get(key)
+        if not old or 'error' in old:
+            continue
+        if 'error' in new:
+            out.append((key,'error',old.get('seconds'),new['error']))
+            continue
+        for field,floor in (('seconds',min_seconds),('peak_mb',min_mb)):
+            if field in old and field in new and new[field]>old[field]*(1+tolerance) and new[field]-old[field]>floor:
+                out.append((key,field,old[field],new[field]))
+    return out
+
+
+def main(argv=None):
+
+    parser=argparse.ArgumentParser(description="Benchmark data operations, the table model, training and pickling on synthetic data.")
+    parser.add_argument('--rows',type=int,nargs='+',default=[1000,10000,100000])
+    parser.add_argument('--cols',type=int,nargs='+',default=[10,100])
+    parser.add_argument('--groups',nargs='+',default=['data','table','model'],choices=['data','table','model'])
+    parser.add_argument('--repeat',type=int,default=1,help="timed runs per case, the fastest is kept")
+    parser.add_argument('--no-memory',action='store_true',help="skip the tracemalloc run")
+    parser.add_argument('--max-cells',type=float,default=2e8,help="skip sizes with more rows*cols than this")
+    parser.add_argument('-o','--output',default="benchmark.json")
+    parser.add_argument('--baseline',help="results file to flag regressions against")
+    parser.add_argument('--tolerance',type=float,default=0.25,help="allowed relative slowdown or memory growth")
+    args=parser.parse_args(argv)
+
+    def progress(key,note,result):
+        if note:
+            sys.stderr.write("{:<48} {}\n".format(key,note))
+        elif 'error' in result:
+            sys.stderr.write("{:<48} {}\n".format(key,result['error']))
+        else:
+            sys.stderr.write("{:<48} {:>10.4f}s {:>10.1f} MB\n".format(key,result['seconds'],result.get('peak_mb',float('nan'))))
+
+    results=run(args.rows,args.cols,args.groups,args.repeat,not args.no_memory,args.max_cells,progress)
+    with open(args.output,'w') as f:
+        json.dump({'environment':environment(),'results':results},f,indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline=json.load(f)
+        if baseline['environment'].get('platform')!=platform.platform() or baseline['environment'].get('cpus')!=os.cpu_count():
+            sys.stderr.write("baseline was recorded on a different machine, timings may not compare\n")
+        regressions=compare(results,baseline['results'],args.tolerance)
+        for key,field,old,new in regressions:
+            sys.stderr.write("REGRESSION {} {}: {} -> {}\n".format(key,field,old,new))
+        sys.stderr.write("{} regressions against {}\n".format(len(regressions),args.baseline))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__=="__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import os,sys,time,pickle
+import numpy as np
+import sklearn
+import array_file
+
+FORMAT='ml-bundle'
+VERSION=1
+# arrays smaller than this stay inside the pickle stream
+INLINE=1<<16
+
+
+# A bundle is one array_file: the JSON header carries the metadata and the
+# input schema, the estimator and the fitted preprocessing are pickled with
+# protocol 5, and every large array they hold (coefficients, tree nodes,
+# support vectors, neighbour data) is written out of band as its own aligned
+# block. Opening reads only the header; the pickles are rebuilt on first
+# use, on top of a memory map, so no array data is copied or read up front.
+def _dumps(obj,prefix,arrays):
+
+    names=[]
+
+    def out_of_band(buf):
+        raw=buf.raw()
+        if raw.nbytes<INLINE:
+            return True
+        names.append("{}.{}".format(prefix,len(names)))
+        arrays[names[-1]]=np.frombuffer(raw,dtype=np.uint8)
+        return False
+
+    arrays[prefix]=np.frombuffer(pickle.dumps(obj,protocol=5,buffer_callback=out_of_band),dtype=np.uint8)
+    return names
+
+
+def schema_of(df,target=None):
+
+    columns=[c for c in df.columns if c!=target]
+    return {'columns':[str(c) for c in columns],'dtypes':[str(df[c].dtype) for c in columns],'target':target}
+
+
+def save(path,model,steps=None,schema=None,info=None):
+
+    arrays={}
+    meta={'format':FORMAT,'version':VERSION,'created':time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'estimator':type(model).__name__,'sklearn':sklearn.__version__,
+        'python':"{}.{}".format(*sys.version_info[:2]),'schema':schema or {},'info':info or {}}
+    meta['model_buffers']=_dumps(model,'model',arrays)
+    meta['steps_buffers']=_dumps(list(steps or []),'steps',arrays)
+    array_file.save(path,arrays,meta)
+
+
+class model_bundle:
+
+    def __init__(self,path):
+
+        header,self.start=array_file.read_header(path)
+        meta=header['meta']
+        if meta.get('format')!=FORMAT:
+            raise ValueError(path+" is not a model bundle")
+        if meta['version']>VERSION:
+            raise ValueError("{} is bundle version {}, this build reads up to {}".format(path,meta['version'],VERSION))
+        self.path=path
+        self.meta=meta
+        self.specs=header['arrays']
+        self._map=None
+        self._model=None
+        self._steps=None
+
+    def __repr__(self):
+
+        return "model_bundle({}, v{}, {})".format(os.path.basename(self.path),self.meta['version'],self.meta['estimator'])
+
+    @property
+    def schema(self):
+
+        return self.meta['schema']
+
+    @property
+    def info(self):
+
+        return self.meta['info']
+
+    def _view(self,name):
+
+        # one read-only map of the whole file, each block is a slice of it
+        if self._map is None:
+            self._map=np.memmap(self.path,dtype=np.uint8,mode='r')
+        spec=self.specs[name]
+        begin=self.start+spec['offset']
+        return self._map[begin:begin+int(np.prod(spec['shape']))]
+
+    def _loads(self,prefix,names):
+
+        return pickle.loads(memoryview(self._view(prefix)),buffers=[self._view(n) for n in names])
+
+    @property
+    def model(self):
+
+        if self._model is None:
+            self._model=self._loads('model',self.meta['model_buffers'])
+        return self._model
+
+    @property
+    def steps(self):
+
+        if self._steps is None:
+            self._steps=self._loads('steps',self.meta['steps_buffers'])
+        return self._steps
+
+
+def open_bundle(path):
+
+    return model_bundle(path)
@@ -1,6 +1,6 @@
 
 import data_visualise ,sys,os
-from sklearn.metrics import classification_report
+import fast_metrics
 
 class common_steps:
 
@@ -20,14 +20,7 @@ class common_steps:
 
     def classification_(self,y_true,y_pred):
 
-        original=sys.stdout
-        sys.stdout = open('report.txt', 'w')
-        print(classification_report(y_true,y_pred))
-        sys.stdout=original
-        text=open('report.txt').read()
-        os.remove('report.txt')
-        
-        return text
+        return fast_metrics.report_text(fast_metrics.evaluate(y_true,y_pred))
 
 
 
@@ -0,0 +1,179 @@
+from PyQt5.QtWidgets import QMainWindow, QApplication, QPushButton, QLabel, QLineEdit, QPlainTextEdit, QTableView
+import os,time,pickle
+import multiprocessing as mp
+from multiprocessing import connection
+import numpy as np
+import pandas as pd
+from PyQt5 import uic
+from sklearn.linear_model import LinearRegression,LogisticRegression
+from sklearn.svm import SVC,SVR
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.neural_network import MLPClassifier
+from sklearn.naive_bayes import GaussianNB
+import common,search,shared_data,split_service,table_display,fast_metrics,background
+
+# every model window, with the defaults its form starts from
+models={
+    "Linear Regression":(LinearRegression,{}),
+    "Logistic Regression":(LogisticRegression,{'max_iter':1000}),
+    "SVM":(SVC,{}),
+    "SVR":(SVR,{}),
+    "Random Forest":(RandomForestClassifier,{'n_estimators':100}),
+    "K-Nearest Neighbour":(KNeighborsClassifier,{'n_neighbors':5}),
+    "Multi Layer Perceptron":(MLPClassifier,{'max_iter':200}),
+    "Gaussian NB":(GaussianNB,{}),
+}
+
+
+def parse_params(text):
+
+    # "Random Forest: n_estimators=200; max_depth=10", one model per line
+    chosen={}
+    for line in text.splitlines():
+        if ':' not in line:
+            continue
+        name,params=line.split(':',1)
+        if name.strip() in models:
+            chosen[name.strip()]={k:v[0] for k,v in search.parse_space(params).items() if v}
+    return chosen
+
+
+def score(y_true,y_pred,classes=None):
+
+    if classes is not None:
+        y_true,y_pred=classes[y_true],classes[np.clip(np.rint(y_pred).astype(int),0,len(classes)-1)]
+    # the same scores common.classification_ reports, macro averaged; a
+    # regressor's continuous output has no confusion matrix
+    y_pred=np.asarray(y_pred)
+    discrete=not np.issubdtype(y_pred.dtype,np.floating) or np.array_equal(y_pred,np.rint(y_pred))
+    scores=fast_metrics.evaluate(y_true,y_pred,classification=discrete)
+    row={k:scores[k] for k in ('mae','mse','rmse') if k in scores}
+    if discrete:
+        row.update(accuracy=scores['accuracy'],precision=scores['macro'][0],recall=scores['macro'][1],f1=scores['macro'][2])
+    return row
+
+
+def _train(conn,name,params,paths,n_train,classes):
+
+    try:
+        arrays=shared_data.load(paths)
+        x,y=arrays['x'],arrays['y']
+        estimator,defaults=models[name]
+        model=estimator(**dict(defaults,**params))
+        start=time.perf_counter()
+        model.fit(x[:n_train],y[:n_train])
+        fit_time=time.perf_counter()-start
+        start=time.perf_counter()
+        pre=model.predict(x[n_train:])
+        predict_time=time.perf_counter()-start
+        row=dict(model=name,fit_s=fit_time,predict_us_row=1e6*predict_time/max(1,len(pre)),
+            size_kb=len(pickle.dumps(model,protocol=pickle.HIGHEST_PROTOCOL))/1024)
+        row.update(score(np.asarray(y[n_train:]),pre,classes))
+        conn.send(dict(row,error=""))
+    except Exception as e:
+        conn.send({'model':name,'error':str(e)})
+    conn.close()
+
+
+def run(split,chosen,timeout=120,workers=None,callback=None):
+
+    # One process per model rather than a pool, so a model that runs past its
+    # timeout can be terminated without taking the other fits down with it.
+    workers=workers or os.cpu_count()
+    y=split.target
+    classes=None
+    if not np.issubdtype(y.dtype,np.number):
+        classes,y=shared_data.encode_labels(y)
+    # spawned: forking the threaded Qt process can deadlock the child
+    ctx=mp.get_context('spawn')
+    todo=list(chosen.items())
+    running={}
+    board=[]
+    with shared_data.shared_arrays(x=split.matrix,y=y) as shared:
+        while todo or running:
+            while todo and len(running)<workers:
+                name,params=todo.pop(0)
+                parent,child=ctx.Pipe(duplex=False)
+                p=ctx.Process(target=_train,args=(child,name,params,shared.paths,split.n_train,classes),daemon=True)
+                p.start()
+                child.close()
+                running[name]=(p,parent,time.time())
+            # sleep until a result arrives, a worker dies or the next timeout
+            first=min(started for _,_,started in running.values())
+            connection.wait([conn for _,conn,_ in running.values()]+[p.sentinel for p,_,_ in running.values()],timeout=max(0,first+timeout-time.time()))
+            for name,(p,conn,started) in list(running.items()):
+                row=None
+                if conn.poll():
+                    try:
+                        row=conn.recv()
+                    except EOFError:
+                        row={'model':name,'error':"worker exited"}
+                elif not p.is_alive():
+                    row={'model':name,'error':"worker exited"}
+                elif time.time()-started>timeout:
+                    p.terminate()
+                    row={'model':name,'error':"timed out after {:g}s".format(timeout)}
+                if row is None:
+                    continue
+                p.join()
+                conn.close()
+                del running[name]
+                board.append(row)
+                if callback:
+                    callback(list(board))
+    return board
+
+
+def table(board):
+
+    columns=['model','accuracy','precision','recall','f1','mae','mse','rmse','fit_s','predict_us_row','size_kb','error']
+    df=pd.DataFrame(board)
+    df=df[[c for c in columns if c in df.columns]]
+    key='accuracy' if 'accuracy' in df.columns else 'fit_s'
+    if key not in df.columns:
+        # every model failed
+        return df
+    return df.sort_values(key,ascending=key=='fit_s',kind='mergesort').reset_index(drop=True).round(4)
+
+
+class UI(QMainWindow):
+    def __init__(self,df,target,user_actions):
+        super(UI, self).__init__()
+        uic.loadUi("../ui_files/compare.ui", self)
+        self.user_act=user_actions
+        steps=common.common_steps(df,target)
+        self.X,self.n_classes,self.target_value,self.df,self.column_list=steps.return_data()
+        self.target=self.findChild(QLabel,"target")
+        self.test_data=self.findChild(QLineEdit,"test_data")
+        self.timeout=self.findChild(QLineEdit,"timeout")
+        self.params=self.findChild(QPlainTextEdit,"params")
+        self.leaderboard=self.findChild(QTableView,"leaderboard")
+        self.compare_btn=self.findChild(QPushButton,"compare_btn")
+        self.compare_btn.clicked.connect(self.compare)
+        self.target.setText(self.target_value)
+        self.params.setPlainText("\n".join(name+":" for name in models))
+        self.leaderboard.setSortingEnabled(True)
+        self.show()
+
+    def compare(self):
+
+        chosen=parse_params(self.params.toPlainText())
+        split=split_service.get(self.df,self.X[self.target_value],float(self.test_data.text()))
+        self.statusBar().showMessage("training {} models".format(len(chosen)))
+        self.compare_btn.setEnabled(False)
+        background.start(run,split,chosen,timeout=float(self.timeout.text()),progress=self.show_board,done=self.compare_done,failed=self.compare_failed)
+
+    def compare_done(self,board):
+
+        self.compare_btn.setEnabled(True)
+        self.statusBar().showMessage("{} of {} models finished".format(sum(not r['error'] for r in board),len(board)))
+
+    def compare_failed(self,message):
+
+        self.compare_btn.setEnabled(True)
+        self.statusBar().showMessage(message)
+
+    def show_board(self,board):
+
+        self.leaderboard.setModel(table_display.DataFrameModel(table(board)))
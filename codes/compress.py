@@ -0,0 +1,225 @@
+import copy,pickle
+import numpy as np
+from sklearn.base import clone
+from sklearn.neighbors import KNeighborsClassifier
+import forest_export
+
+# Smaller saved models for the three windows whose pickles get big: MLP
+# weights stored as float16 or int8, random forests pruned and flattened into
+# a compiled_forest, KNN models refitted on condensed or subsampled points.
+# Every option is measured the way it will be loaded (pickled, unpickled, then
+# scored on the held-out split), so the save dialog shows the real trade-off.
+
+
+def quantize(a,mode):
+
+    # int8 keeps one scale per output column, enough for weight matrices
+    a=np.asarray(a)
+    if mode!='int8':
+        return {'q':a.astype(mode)}
+    scale=np.abs(a).max(axis=0)/127 if a.size else np.ones(a.shape[1:])
+    scale=np.where(scale>0,scale,1).astype(np.float32)
+    return {'q':np.round(a/scale).astype(np.int8),'scale':scale}
+
+
+def dequantize(d,dtype):
+
+    a=d['q'].astype(dtype)
+    if 'scale' in d:
+        a*=d['scale']
+    return a
+
+
+class quantized_mlp:
+
+    # Pickles as the MLP without its weights and optimizer state plus the
+    # quantized weight matrices; unpickling puts dequantized weights back,
+    # so predictions run through sklearn as before.
+    def __init__(self,model,mode):
+
+        self.model=model
+        self.mode=mode
+
+    def __repr__(self):
+
+        return "quantized_mlp({}, {!r})".format(self.mode,self.model)
+
+    def __getattr__(self,name):
+
+        if name=='model':
+            raise AttributeError(name)
+        return getattr(self.model,name)
+
+    def __getstate__(self):
+
+        m=copy.copy(self.model)
+        dtype=m.coefs_[0].dtype
+        layers=[quantize(w,self.mode) for w in m.coefs_]
+        intercepts=[np.asarray(b,dtype=np.float32) for b in m.intercepts_]
+        m.coefs_=m.intercepts_=None
+        for name in ('_optimizer','_best_coefs','_best_intercepts'):
+            if hasattr(m,name):
+                setattr(m,name,None)
+        return {'model':m,'mode':self.mode,'dtype':dtype.str,'layers':layers,'intercepts':intercepts}
+
+    def __setstate__(self,state):
+
+        m=state['model']
+        m.coefs_=[dequantize(d,state['dtype']) for d in state['layers']]
+        m.intercepts_=[b.astype(state['dtype']) for b in state['intercepts']]
+        self.model=m
+        self.mode=state['mode']
+
+
+def condense(x,y,batch=2048,passes=2,seed=0):
+
+    # Hart's condensed nearest neighbour, a batch at a time: rows the points
+    # kept so far misclassify (1-NN) are added, until a pass adds nothing
+    y=np.asarray(y)
+    order=np.random.RandomState(seed).permutation(len(y))
+    _,first=np.unique(y[order],return_index=True)
+    keep=np.zeros(len(y),dtype=bool)
+    keep[order[first]]=True
+    for _ in range(passes):
+        added=0
+        for i in range(0,len(order),batch):
+            rows=order[i:i+batch]
+            rows=rows[~keep[rows]]
+            if not len(rows):
+                continue
+            kept=np.flatnonzero(keep)
+            nn=KNeighborsClassifier(n_neighbors=1).fit(x[kept],y[kept])
+            wrong=rows[nn.predict(x[rows])!=y[rows]]
+            keep[wrong]=True
+            added+=len(wrong)
+        if not added:
+            break
+    return np.flatnonzero(keep)
+
+
+def subsample(y,fraction,seed=0):
+
+    # stratified, so rare classes keep their share of the points
+    y=np.asarray(y)
+    rng=np.random.RandomState(seed)
+    rows=[]
+    for c in np.unique(y):
+        idx=np.flatnonzero(y==c)
+        rows.append(rng.choice(idx,max(1,int(round(len(idx)*fraction))),replace=False))
+    return np.sort(np.concatenate(rows))
+
+
+def prune(arrays,classifier=True):
+
+    # A subtree whose leaves all predict the same class becomes one leaf
+    # holding the subtree root's own class distribution (the mixture of its
+    # leaves, so the same argmax). Found bottom up, a level per pass; every
+    # tree still predicts the same class for every row, only the forest's
+    # averaged probabilities shift. The nodes no root reaches any more are
+    # dropped and the rest re-indexed. Regression trees are left whole.
+    left,right,value=arrays['left'].copy(),arrays['right'].copy(),arrays['value']
+    leaf=left<0
+    if classifier:
+        label=value.argmax(axis=1)
+        uniform=leaf.copy()
+        while True:
+            inner=np.flatnonzero(~uniform)
+            l,r=left[inner],right[inner]
+            same=uniform[l]&uniform[r]&(label[l]==label[r])
+            if not same.any():
+                break
+            uniform[inner[same]]=True
+            label[inner[same]]=label[l[same]]
+        left[uniform]=right[uniform]=-1
+    keep=np.zeros(len(left),dtype=bool)
+    frontier=arrays['roots']
+    while len(frontier):
+        keep[frontier]=True
+        inner=frontier[left[frontier]>=0]
+        frontier=np.concatenate([left[inner],right[inner]])
+    new=np.cumsum(keep)-1
+    leaf=left[keep]<0
+    return {'feature':arrays['feature'][keep],'threshold':arrays['threshold'][keep],
+        'left':np.where(leaf,-1,new[left[keep]]),'right':np.where(leaf,-1,new[right[keep]]),
+        'value':value[keep],'roots':new[arrays['roots']]}
+
+
+def _round_down(t,dtype):
+
+    # the largest dtype value not above t: for float32 this splits every
+    # float32 row exactly as t does, float16 is lossy
+    r=t.astype(dtype)
+    up=r.astype(np.float64)>t
+    r[up]=np.nextafter(r[up],dtype(-np.inf))
+    return r
+
+
+def forest(model,threshold_dtype=np.float32,value_dtype=np.float32):
+
+    # a pruned compiled_forest with one table of distinct leaf values that
+    # the nodes index into, and the narrowest index types that fit
+    a=prune(forest_export.flatten(model),hasattr(model,'classes_'))
+    leaf=a['left']<0
+    table,inverse=np.unique(a['value'][leaf],axis=0,return_inverse=True)
+    value_id=np.zeros(len(leaf),dtype=np.int32)
+    value_id[leaf]=inverse.ravel()
+    n=int(model.n_features_in_)
+    arrays={'feature':np.where(leaf,0,a['feature']).astype(np.int16 if n<2**15 else np.int32),
+        'threshold':_round_down(np.where(leaf,0,a['threshold']),threshold_dtype),
+        'left':a['left'].astype(np.int32),'right':a['right'].astype(np.int32),
+        'value':table.astype(value_dtype),'value_id':value_id,'roots':a['roots'].astype(np.int32)}
+    meta={'kind':'classifier' if hasattr(model,'classes_') else 'regressor','n_features':n}
+    if hasattr(model,'classes_'):
+        meta['classes']=model.classes_.tolist()
+    return forest_export.compiled_forest(arrays,meta)
+
+
+def candidates(model,x_train=None,y_train=None):
+
+    # (name, compressed object) pairs for whatever kind of model this is
+    if hasattr(model,'coefs_'):
+        return [(mode,quantized_mlp(model,mode)) for mode in ('float32','float16','int8')]
+    if hasattr(model,'estimators_') and hasattr(model.estimators_[0],'tree_'):
+        # trees grown to pure leaves (the default) have no subtree to prune,
+        # the name says whether anything went
+        nodes=sum(e.tree_.node_count for e in model.estimators_)
+        f32,f16=forest(model),forest(model,np.float16,np.float16)
+        name="pruned {:.0%} of nodes".format(1-len(f32.left)/nodes) if len(f32.left)<nodes else "compiled"
+        return [(name,f32),(name+", float16",f16)]
+    if hasattr(model,'n_neighbors') and x_train is not None:
+        # refitted on fewer points here, so what gets saved is the fitted
+        # index itself and a bundle memory-maps it instead of rebuilding it
+        y=np.asarray(y_train)
+        picks=[('condensed {} points',condense(x_train,y))] if hasattr(model,'classes_') else []
+        picks+=[('{:.0%} sample'.format(fraction),subsample(y,fraction)) for fraction in (0.5,0.25)]
+        return [(name.format(len(rows)),clone(model).fit(x_train[rows],y[rows])) for name,rows in picks]
+    return []
+
+
+def _score(model,x,y):
+
+    pre=np.asarray(model.predict(x))
+    y=np.asarray(y)
+    if hasattr(model,'classes_'):
+        return float((pre==y).mean())
+    return float(1-((y-pre)**2).sum()/max(((y-y.mean())**2).sum(),1e-300))
+
+
+def options(model,x_test,y_test,x_train=None,y_train=None,rows=20000):
+
+    # the uncompressed model first, then every candidate, each as
+    # {'name','model','bytes','score'} with score measured after a pickle
+    # round trip on (at most `rows` of) the held-out split
+    x,y=x_test[:rows],np.asarray(y_test)[:rows]
+    out=[{'name':'none','model':model,'bytes':len(pickle.dumps(model,protocol=5)),'score':_score(model,x,y)}]
+    for name,c in candidates(model,x_train,y_train):
+        data=pickle.dumps(c,protocol=5)
+        out.append({'name':name,'model':c,'bytes':len(data),'score':_score(pickle.loads(data),x,y)})
+    return out
+
+
+def describe(option,base):
+
+    metric='accuracy' if hasattr(base['model'],'classes_') else 'r2'
+    return "{}: {:.2f} MB ({:.0%}), held-out {} {:.4f} ({:+.4f})".format(option['name'],option['bytes']/2**20,
+        option['bytes']/max(base['bytes'],1),metric,option['score'],option['score']-base['score'])
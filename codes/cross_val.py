@@ -0,0 +1,75 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy import sparse
+from sklearn.base import is_classifier
+from sklearn.model_selection import KFold,StratifiedKFold
+import shared_data,fast_metrics,split_service
+
+_worker={}
+
+
+def _init(paths):
+
+    _worker.update(shared_data.load(paths))
+
+
+def fold_metrics(y_true,y_pred,classes=None):
+
+    out={}
+    if np.issubdtype(np.asarray(y_true).dtype,np.number):
+        out.update(fast_metrics.errors(y_true,y_pred))
+    if classes is not None:
+        scores=fast_metrics.from_confusion(*fast_metrics.confusion(y_true,y_pred,classes))
+        out.update({k:scores[k] for k in ('accuracy','precision','recall','f1','support')},classes=list(classes))
+    return out
+
+
+def _fold(model,train,test,classes):
+
+    x,y=_worker['x'],_worker['y']
+    model.fit(x[train],y[train])
+    pre=model.predict(x[test])
+    if classes is not None:
+        # classifiers are fitted on label codes, decode them before scoring
+        return fold_metrics(classes[y[test]],classes[np.asarray(pre,dtype=int)],classes)
+    return fold_metrics(y[test],pre)
+
+
+def run(model,x,y,folds=5,stratified=False,workers=None,seed=0):
+
+    # one-hot frames stay sparse: workers map the CSR arrays and slice rows
+    if split_service.has_sparse(x):
+        x=split_service.to_csr(x)
+    elif not sparse.issparse(x):
+        x=np.asarray(x)
+    classes,y=shared_data.encode_labels(y) if is_classifier(model) else (None,np.asarray(y))
+    splitter=StratifiedKFold(folds,shuffle=True,random_state=seed) if stratified else KFold(folds,shuffle=True,random_state=seed)
+    splits=list(splitter.split(x,y))
+    with shared_data.shared_arrays(x=x,y=y) as shared:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count(),folds),initializer=_init,initargs=(shared.paths,)) as pool:
+            train,test=zip(*splits)
+            return list(pool.map(_fold,[model]*folds,train,test,[classes]*folds))
+
+
+def summary(scores):
+
+    out={}
+    for key in ('mae','mse','rmse','accuracy'):
+        if key in scores[0]:
+            values=np.array([s[key] for s in scores])
+            out[key]="{:.4f} ± {:.4f}".format(values.mean(),values.std())
+    return out
+
+
+def report(scores):
+
+    lines=["{:>14}  {:>17}  {:>17}  {:>17}  {:>8}".format("","precision","recall","f1-score","support"),""]
+    stats={k:np.array([s[k] for s in scores]) for k in ('precision','recall','f1','support')}
+    for i,name in enumerate(scores[0]['classes']):
+        row=["{:.2f} ± {:.2f}".format(stats[k][:,i].mean(),stats[k][:,i].std()) for k in ('precision','recall','f1')]
+        lines.append("{:>14}  {:>17}  {:>17}  {:>17}  {:>8}".format(str(name),*row,int(stats['support'][:,i].sum())))
+    acc=np.array([s['accuracy'] for s in scores])
+    lines+=["","{:>14}  {:>17}  {:>17}  {:>17}  {:>8}".format("accuracy","","","{:.2f} ± {:.2f}".format(acc.mean(),acc.std()),int(stats['support'].sum())),
+        "{:>14}  {}".format("folds",len(scores))]
+    return "\n".join(lines)
@@ -0,0 +1,111 @@
+import weakref
+import numpy as np
+import matplotlib.pyplot as plt
+
+
+def scores_of(model,x):
+
+    # probabilities when the model has them, margins otherwise; a binary
+    # margin is one column for the positive class
+    if hasattr(model,'predict_proba'):
+        s=model.predict_proba(x)
+    else:
+        s=model.decision_function(x)
+    s=np.asarray(s,dtype=np.float64)
+    if s.ndim==1:
+        s=np.column_stack([-s,s])
+    return s
+
+
+def _thin(n,max_points):
+
+    # evenly spaced points along the curve, ends always kept
+    if n<=max_points:
+        return np.arange(n)
+    return np.unique(np.linspace(0,n-1,max_points).round().astype(np.int64))
+
+
+def one_class(hit,score,max_points=1000):
+
+    # one sort gives every threshold: cumulative true and false positives
+    # at each distinct score, from the highest down
+    order=np.argsort(-score,kind='mergesort')
+    score=score[order]
+    hit=hit[order]
+    last=np.r_[np.flatnonzero(np.diff(score)),len(score)-1]
+    tp=np.cumsum(hit)[last].astype(np.float64)
+    fp=(last+1)-tp
+    p,n=tp[-1],fp[-1]
+    tpr=np.r_[0.0,tp/p] if p else np.zeros(len(tp)+1)
+    fpr=np.r_[0.0,fp/n] if n else np.zeros(len(fp)+1)
+    precision=np.r_[1.0,tp/(tp+fp)]
+    recall=tpr
+    out={'auc':float(np.sum(np.diff(fpr)*(tpr[1:]+tpr[:-1]))/2),
+        'ap':float(np.sum(np.diff(recall)*precision[1:])),'positives':int(p)}
+    keep=_thin(len(tpr),max_points)
+    out.update(fpr=fpr[keep],tpr=tpr[keep],precision=precision[keep],recall=recall[keep])
+    return out
+
+
+def compute(y_true,scores,classes,max_points=1000):
+
+    # one-vs-rest for every class; a binary problem only needs the second
+    y_true=np.asarray(y_true)
+    ks=[1] if len(classes)==2 else range(len(classes))
+    return {classes[k]:one_class(y_true==classes[k],scores[:,k],max_points) for k in ks}
+
+
+class curve_cache:
+
+    # Curves per fitted model, dropped with the model. A cached fit that is
+    # trained again is the same object, so reopening the plot costs nothing.
+    def __init__(self):
+
+        self.entries=weakref.WeakKeyDictionary()
+
+    def get(self,model,x,y,max_points=1000):
+
+        entry=self.entries.get(model)
+        if entry is not None and entry[0] is x and entry[1] is y:
+            return entry[2]
+        result=compute(y,scores_of(model,x),model.classes_,max_points)
+        self.entries[model]=(x,y,result)
+        return result
+
+
+cache=curve_cache()
+
+
+def plot(result,title=""):
+
+    fig,(roc,pr)=plt.subplots(1,2,figsize=(11,5))
+    lines={}
+    for c,r in result.items():
+        a,=roc.plot(r['fpr'],r['tpr'],label="{} (AUC {:.3f})".format(c,r['auc']))
+        b,=pr.plot(r['recall'],r['precision'],label="{} (AP {:.3f})".format(c,r['ap']))
+        lines[str(c)]=(a,b)
+    roc.plot([0,1],[0,1],'k--',linewidth=0.8)
+    roc.set_xlabel('False positive rate')
+    roc.set_ylabel('True positive rate')
+    roc.set_title('ROC')
+    pr.set_xlabel('Recall')
+    pr.set_ylabel('Precision')
+    pr.set_title('Precision-recall')
+    fig.suptitle(title)
+    # clicking a class in either legend shows or hides it on both plots
+    for ax,loc in ((roc,'lower right'),(pr,'lower left')):
+        for entry,name in zip(ax.legend(loc=loc).get_lines(),lines):
+            entry.set_picker(5)
+            entry.class_name=name
+
+    def toggle(event):
+        pair=lines.get(getattr(event.artist,'class_name',None))
+        if pair is None:
+            return
+        visible=not pair[0].get_visible()
+        for line in pair:
+            line.set_visible(visible)
+        fig.canvas.draw_idle()
+
+    fig.canvas.mpl_connect('pick_event',toggle)
+    plt.show()
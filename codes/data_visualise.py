@@ -1,7 +1,7 @@
 import pandas as pd 
 import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np 
+import re
 from sklearn.preprocessing import LabelEncoder,StandardScaler,MinMaxScaler,PowerTransformer
 import add_steps
 class data_:
@@ -16,8 +16,62 @@ class data_:
 
 		le=LabelEncoder()
 		df[column_name] =le.fit_transform(df[column_name])
-		return df[column_name],"LabelEncoder()"
+		return df[column_name],('label',column_name,list(le.classes_))
 	
+	def one_hot(self,df,column_name):
+
+		# dummies stay as sparse columns so wide categoricals do not densify
+		dummies=pd.get_dummies(df[column_name],prefix=column_name,sparse=True,dtype=np.uint8)
+		categories=list(pd.Categorical(df[column_name]).categories)
+		return pd.concat([df.drop(column_name,axis=1),dummies],axis=1),('onehot',column_name,categories)
+	
+	def parse_ints(self,text):
+
+		# "100, 50" or "(100,50)" -> (100, 50), anything else is rejected
+		parts=[p.strip() for p in text.strip().strip('()[]').split(',') if p.strip()]
+		if not parts or not all(re.fullmatch(r'-?\d+',p) for p in parts):
+			raise ValueError("expected comma separated integers, got "+repr(text))
+		return tuple(int(p) for p in parts)
+
+	def reshape(self,df,text):
+
+		shape=self.parse_ints(text)
+		if sum(d==-1 for d in shape)>1 or any(d<-1 or d==0 for d in shape):
+			raise ValueError("invalid shape "+str(shape))
+		values=np.asarray(df)
+		known=int(np.prod([d for d in shape if d!=-1]))
+		if (-1 in shape and values.size%known) or (-1 not in shape and known!=values.size):
+			raise ValueError("cannot reshape {} values into {}".format(values.size,shape))
+		# a view of the frame's block where possible, not a copy
+		return values.reshape(shape)
+
+	def replay(self,df,steps):
+
+		# re-applies recorded (kind, column, fitted state) steps to new rows;
+		# a step on a column the rows do not have, such as the target, is skipped
+		for kind,column,state in steps:
+			if kind=='scale':
+				# the scaler needs every column it was fitted on, in order
+				missing=[c for c in column if c not in df.columns]
+				if missing:
+					raise ValueError("rows do not match the saved schema: scaled column(s) {} missing".format(", ".join(map(str,missing))))
+				df[column]=state.transform(df[column])
+				continue
+			if column not in df.columns:
+				continue
+			if kind=='drop':
+				df=df.drop(column,axis=1)
+			elif kind=='fill':
+				df[column]=df[column].fillna(state)
+			elif kind=='label':
+				# unseen categories become -1 instead of failing the batch
+				df[column]=pd.Categorical(df[column],categories=state).codes
+			elif kind=='onehot':
+				dummies=pd.get_dummies(pd.Categorical(df[column],categories=state),prefix=column,dtype=np.uint8)
+				dummies.index=df.index
+				df=pd.concat([df.drop(column,axis=1),dummies],axis=1)
+		return df
+
 	def get_column_list(self,df):
 
 		column_list=[]
@@ -71,32 +125,28 @@ class data_:
 
 		return str(df.describe())
 	
-	def StandardScale(self,df,target):
-		
-		sc=StandardScaler()
+	def scale(self,df,target,sc):
+
+		# sparse one-hot columns keep their 0/1 entries: centring them would
+		# densify the frame, so only the dense features go through the scaler
 		x=df.drop(target,axis=1)
-		scaled_features=sc.fit_transform(x)
-		scaled_features_df = pd.DataFrame(scaled_features, index=x.index, columns=x.columns)
+		dense=[c for c in x.columns if not isinstance(x[c].dtype,pd.SparseDtype)]
+		scaled_features=pd.DataFrame(sc.fit_transform(x[dense]), index=x.index, columns=dense)
+		scaled_features_df=pd.concat([scaled_features,x.drop(dense,axis=1)],axis=1)[x.columns]
 		scaled_features_df[target]=df[target]
-		return scaled_features_df,"StandardScaler()"
+		return scaled_features_df,('scale',dense,sc)
+
+	def StandardScale(self,df,target):
+		
+		return self.scale(df,target,StandardScaler())
 
 	def MinMaxScale(self,df,target):
 		
-		sc=MinMaxScaler()
-		x=df.drop(target,axis=1)
-		scaled_features=sc.fit_transform(x)
-		scaled_features_df = pd.DataFrame(scaled_features, index=x.index, columns=x.columns)
-		scaled_features_df[target]=df[target]
-		return scaled_features_df,"MinMaxScaler()"
+		return self.scale(df,target,MinMaxScaler())
 		
 	def PowerScale(self,df,target):
 		
-		sc=PowerTransformer()
-		x=df.drop(target,axis=1)
-		scaled_features=sc.fit_transform(x)
-		scaled_features_df = pd.DataFrame(scaled_features, index=x.index, columns=x.columns)
-		scaled_features_df[target]=df[target]
-		return scaled_features_df,"PowerTransformer()"
+		return self.scale(df,target,PowerTransformer())
 
 
 	def plot_histogram(self,df,column):
@@ -105,6 +155,8 @@ class data_:
 		plt.show()
 
 	def plot_heatmap(self,df):
+		# imported here, so score.py and the tests run without the plotting stack
+		import seaborn as sns
 		plt.figure()
 		x=df.corr()
 		mask = np.triu(np.ones_like(x, dtype=np.bool))
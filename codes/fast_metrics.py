@@ -0,0 +1,200 @@
+import sys
+import numpy as np
+import pandas as pd
+
+# Everything here is a pure function of its arguments, so it can be called
+# from worker threads or processes without locks.
+
+
+def confusion(y_true,y_pred,classes=None):
+
+    y_true=np.asarray(y_true)
+    y_pred=np.asarray(y_pred)
+    if classes is None:
+        classes=np.union1d(y_true,y_pred)
+    k=len(classes)
+    t=np.searchsorted(classes,y_true)
+    p=np.searchsorted(classes,y_pred)
+    return classes,np.bincount(t*k+p,minlength=k*k).reshape(k,k)
+
+
+def from_confusion(classes,matrix):
+
+    tp=np.diag(matrix).astype(np.float64)
+    support=matrix.sum(axis=1)
+    predicted=matrix.sum(axis=0)
+    with np.errstate(divide='ignore',invalid='ignore'):
+        precision=np.where(predicted>0,tp/predicted,0.0)
+        recall=np.where(support>0,tp/support,0.0)
+        f1=np.where(precision+recall>0,2*precision*recall/(precision+recall),0.0)
+    n=support.sum()
+    # np.average as sklearn does, a dot product with normalised weights can
+    # round to the other side of the printed digit
+    weighted=lambda v:float(np.average(v,weights=support)) if n else 0.0
+    return {'classes':classes,'confusion':matrix,'accuracy':tp.sum()/n if n else 0.0,
+        'precision':precision,'recall':recall,'f1':f1,'support':support,
+        'macro':(precision.mean(),recall.mean(),f1.mean()),
+        'weighted':(weighted(precision),weighted(recall),weighted(f1))}
+
+
+def errors(y_true,y_pred):
+
+    err=np.asarray(y_true,dtype=np.float64)-np.asarray(y_pred,dtype=np.float64)
+    mse=float(err@err/len(err)) if len(err) else 0.0
+    return {'mae':float(np.abs(err).mean()) if len(err) else 0.0,'mse':mse,'rmse':float(np.sqrt(mse))}
+
+
+def evaluate(y_true,y_pred,classification=True):
+
+    # one confusion matrix gives every classification score, one error
+    # vector gives MAE, MSE and RMSE
+    out={}
+    if np.issubdtype(np.asarray(y_true).dtype,np.number) and np.issubdtype(np.asarray(y_pred).dtype,np.number):
+        out.update(errors(y_true,y_pred))
+    if classification:
+        out.update(from_confusion(*confusion(y_true,y_pred)))
+    return out
+
+
+def report_text(scores,digits=2):
+
+    # same layout as sklearn's classification_report
+    names=[str(c) for c in scores['classes']]
+    width=max([len(c) for c in names]+[len('weighted avg')])
+    headers=["precision","recall","f1-score","support"]
+    text=("{:>{width}s} "+" {:>9}"*4).format("",*headers,width=width)+"\n\n"
+    row="{:>{width}s} "+" {:>9.{digits}f}"*3+" {:>9}\n"
+    for i,name in enumerate(names):
+        text+=row.format(name,scores['precision'][i],scores['recall'][i],scores['f1'][i],int(scores['support'][i]),width=width,digits=digits)
+    total=int(scores['support'].sum())
+    text+="\n"
+    text+=("{:>{width}s} "+" {:>9.{digits}}"*2+" {:>9.{digits}f}"+" {:>9}\n").format("accuracy","","",scores['accuracy'],total,width=width,digits=digits)
+    text+=row.format("macro avg",*scores['macro'],total,width=width,digits=digits)
+    text+=row.format("weighted avg",*scores['weighted'],total,width=width,digits=digits)
+    return text
+
+
+def confusion_frame(scores):
+
+    index=pd.Index(scores['classes'],name='Actual')
+    return pd.DataFrame(scores['confusion'],index=index,columns=pd.Index(scores['classes'],name='Predicted'))
+
+
+class running_scores:
+
+    # Confusion counts, error sums and per-class score histograms, updated
+    # one chunk at a time. Two accumulators merge by adding their counts, so
+    # chunks can be scored on any worker and combined in any order; memory
+    # depends on the number of classes and bins, never on the row count.
+    def __init__(self,classes=None,score_classes=None,bins=1000,classification=True):
+
+        self.classification=classification
+        self.classes=np.asarray(classes) if classes is not None else None
+        self.confusion=np.zeros((0,0) if classes is None else (len(classes),)*2,dtype=np.int64)
+        self.n=0
+        self.abs_err=0.0
+        self.sq_err=0.0
+        self.numeric=True
+        # score_classes are the predict_proba columns, usually model.classes_
+        self.score_classes=np.asarray(score_classes) if score_classes is not None else None
+        self.bins=bins
+        if score_classes is not None:
+            self.pos=np.zeros((len(score_classes),bins),dtype=np.int64)
+            self.neg=np.zeros((len(score_classes),bins),dtype=np.int64)
+
+    def _grow(self,classes):
+
+        # labels first seen in a later chunk get their own row and column
+        if self.classes is not None and np.array_equal(classes,self.classes):
+            return
+        matrix=np.zeros((len(classes),len(classes)),dtype=np.int64)
+        if self.classes is not None and len(self.classes):
+            i=np.searchsorted(classes,self.classes)
+            matrix[np.ix_(i,i)]=self.confusion
+        self.classes,self.confusion=classes,matrix
+
+    def update(self,y_true,y_pred,proba=None):
+
+        y_true=np.asarray(y_true)
+        y_pred=np.asarray(y_pred)
+        self.n+=len(y_true)
+        if self.numeric and np.issubdtype(y_true.dtype,np.number) and np.issubdtype(y_pred.dtype,np.number):
+            err=y_true.astype(np.float64)-y_pred.astype(np.float64)
+            self.abs_err+=float(np.abs(err).sum())
+            self.sq_err+=float(err@err)
+        else:
+            self.numeric=False
+        if self.classification:
+            seen=np.union1d(y_true,y_pred)
+            self._grow(np.union1d(self.classes,seen) if self.classes is not None else seen)
+            self.confusion+=confusion(y_true,y_pred,self.classes)[1]
+        if proba is not None and self.score_classes is not None:
+            b=np.minimum((np.asarray(proba)*self.bins).astype(np.int64),self.bins-1)
+            for k,c in enumerate(self.score_classes):
+                hit=y_true==c
+                self.pos[k]+=np.bincount(b[hit,k],minlength=self.bins)
+                self.neg[k]+=np.bincount(b[~hit,k],minlength=self.bins)
+        return self
+
+    def merge(self,other):
+
+        if other.classes is not None:
+            self._grow(np.union1d(self.classes,other.classes) if self.classes is not None else other.classes)
+            i=np.searchsorted(self.classes,other.classes)
+            self.confusion[np.ix_(i,i)]+=other.confusion
+        self.n+=other.n
+        self.abs_err+=other.abs_err
+        self.sq_err+=other.sq_err
+        self.numeric=self.numeric and other.numeric
+        if self.score_classes is None and other.score_classes is not None:
+            self.score_classes,self.bins=other.score_classes,other.bins
+            self.pos,self.neg=other.pos.copy(),other.neg.copy()
+        elif other.score_classes is not None:
+            self.pos+=other.pos
+            self.neg+=other.neg
+        return self
+
+    def auc(self):
+
+        # one-vs-rest ROC AUC per class from the binned scores, ties inside a
+        # bin count half; the macro average is reported
+        below=np.cumsum(self.neg,axis=1)-self.neg
+        p=self.pos.sum(axis=1)
+        n=self.neg.sum(axis=1)
+        ok=(p>0)&(n>0)
+        if not ok.any():
+            return None
+        area=(self.pos*(below+0.5*self.neg)).sum(axis=1)
+        return float((area[ok]/(p[ok]*n[ok])).mean())
+
+    def results(self):
+
+        out={'rows':self.n}
+        if self.numeric and self.n:
+            out.update(mae=self.abs_err/self.n,mse=self.sq_err/self.n,rmse=float(np.sqrt(self.sq_err/self.n)))
+        if self.classes is not None and self.n:
+            out.update(from_confusion(self.classes,self.confusion))
+        if self.score_classes is not None:
+            auc=self.auc()
+            if auc is not None:
+                out['auc']=auc
+        return out
+
+
+if __name__=="__main__":
+    # report_text against sklearn's classification_report on a few label sets
+    from sklearn.metrics import classification_report
+    rng=np.random.RandomState(0)
+    cases=[(rng.randint(0,3,200),rng.randint(0,3,200)),(rng.randint(0,2,1000),rng.randint(0,2,1000)),
+        (rng.randint(0,7,5000),np.clip(rng.randint(0,7,5000)+rng.randint(-1,2,5000),0,6)),
+        (np.array(list("aabbbcccc")),np.array(list("abbbcccca"))),(rng.randint(0,4,50),rng.randint(1,5,50))]
+    failed=0
+    for y_true,y_pred in cases:
+        for digits in (2,4):
+            ours=report_text(evaluate(y_true,y_pred,classification=True),digits)
+            theirs=classification_report(y_true,y_pred,digits=digits,zero_division=0)
+            if ours.rstrip()!=theirs.rstrip():
+                failed+=1
+                print(ours+"\n"+theirs)
+    print("{} of {} reports differ from sklearn".format(failed,2*len(cases)))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,179 @@
+import os,sys,time,pickle,hashlib,threading
+from collections import OrderedDict
+import numpy as np
+from scipy import sparse
+import pandas as pd
+
+
+def fingerprint(*items):
+
+    h=hashlib.blake2b(digest_size=16)
+    for item in items:
+        if isinstance(item,(pd.DataFrame,pd.Series)):
+            h.update(repr(list(item.columns) if isinstance(item,pd.DataFrame) else item.name).encode())
+            h.update(memoryview(pd.util.hash_pandas_object(item,index=True).values).cast('B'))
+        elif sparse.issparse(item):
+            m=sparse.csr_matrix(item)
+            h.update(str((m.shape,m.dtype.str)).encode())
+            for a in (m.indptr,m.indices,m.data):
+                h.update(memoryview(np.ascontiguousarray(a)).cast('B'))
+        elif isinstance(item,np.ndarray) and item.dtype!=object:
+            a=np.ascontiguousarray(item)
+            h.update(str((a.shape,a.dtype.str)).encode())
+            h.update(memoryview(a).cast('B'))
+        elif isinstance(item,np.ndarray):
+            h.update(repr((item.shape,item.tolist())).encode())
+        else:
+            h.update(repr(item).encode())
+    return h.hexdigest()
+
+
+def model_key(data_key,model):
+
+    name=type(model).__module__+"."+type(model).__name__
+    return fingerprint(data_key,name,sorted((k,repr(v)) for k,v in model.get_params(deep=True).items()))
+
+
+def nbytes(obj,seen=None):
+
+    # in-memory size estimated from the arrays an object holds, following
+    # containers and object state (sklearn trees expose theirs through
+    # __getstate__), without serialising anything
+    seen=set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj,np.ndarray):
+        return obj.nbytes
+    if sparse.issparse(obj):
+        return sum(a.nbytes for a in (getattr(obj,n,None) for n in ('data','indices','indptr','row','col')) if a is not None)
+    if isinstance(obj,(pd.DataFrame,pd.Series)):
+        return int(obj.memory_usage(deep=False).sum() if isinstance(obj,pd.DataFrame) else obj.memory_usage(deep=False))
+    if isinstance(obj,(list,tuple,set)):
+        return sys.getsizeof(obj)+sum(nbytes(v,seen) for v in obj)
+    if isinstance(obj,dict):
+        return sys.getsizeof(obj)+sum(nbytes(v,seen) for v in obj.values())
+    if isinstance(obj,(str,bytes,int,float,bool,type(None))):
+        return sys.getsizeof(obj)
+    try:
+        state=obj.__getstate__()
+    except Exception:
+        state=getattr(obj,'__dict__',None)
+    return sys.getsizeof(obj)+(nbytes(state,seen) if state is not None and state is not obj else 0)
+
+
+class fit_cache:
+
+    def __init__(self,max_bytes=512*2**20,folder=None,max_disk_bytes=4*2**30):
+
+        self.max_bytes=max_bytes
+        self.folder=folder
+        self.max_disk_bytes=max_disk_bytes
+        self.entries=OrderedDict()
+        self.sizes={}
+        self.total=0
+        self.hits=0
+        self.misses=0
+        self.lock=threading.Lock()
+        if folder:
+            os.makedirs(folder,exist_ok=True)
+
+    def _path(self,key):
+
+        return os.path.join(self.folder,key+".pkl")
+
+    def get(self,key):
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits+=1
+                return self.entries[key]
+        if self.folder and os.path.exists(self._path(key)):
+            with open(self._path(key),'rb') as f:
+                blob=f.read()
+            os.utime(self._path(key))
+            value=pickle.loads(blob)
+            with self.lock:
+                self.hits+=1
+                self._keep(key,value,nbytes(value))
+            return value
+        with self.lock:
+            self.misses+=1
+        return None
+
+    def put(self,key,value):
+
+        with self.lock:
+            self._keep(key,value,nbytes(value))
+        if self.folder:
+            # streamed to the file, only the disk tier pays for pickling
+            with open(self._path(key),'wb') as f:
+                pickle.dump(value,f,protocol=pickle.HIGHEST_PROTOCOL)
+            self._evict_disk()
+
+    def _keep(self,key,value,size):
+
+        if size>self.max_bytes:
+            return
+        self.total+=size-self.sizes.get(key,0)
+        self.entries[key]=value
+        self.entries.move_to_end(key)
+        self.sizes[key]=size
+        while self.total>self.max_bytes:
+            old,_=self.entries.popitem(last=False)
+            self.total-=self.sizes.pop(old)
+
+    def _evict_disk(self):
+
+        files=[os.path.join(self.folder,f) for f in os.listdir(self.folder) if f.endswith(".pkl")]
+        files.sort(key=os.path.getmtime)
+        total=sum(os.path.getsize(f) for f in files)
+        while files and total>self.max_disk_bytes:
+            f=files.pop(0)
+            total-=os.path.getsize(f)
+            os.remove(f)
+
+    def hit_rate(self):
+
+        lookups=self.hits+self.misses
+        return self.hits/lookups if lookups else 0.0
+
+    def status(self,hit):
+
+        return "fit cache {}: {}/{} hits ({:.0%}), {} models in memory".format("hit" if hit else "miss",self.hits,self.hits+self.misses,self.hit_rate(),len(self.entries))
+
+    def clear(self):
+
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.total=0
+
+
+cache=fit_cache(folder=os.environ.get('ML_FIT_CACHE_DIR'))
+
+
+def fit(model,x_train,y_train,x_test,data_key,predict=None):
+
+    model,pre,hit,_=fit_timed(model,x_train,y_train,x_test,data_key,predict)
+    return model,pre,hit
+
+
+def fit_timed(model,x_train,y_train,x_test,data_key,predict=None):
+
+    # times are those of the original fit, also when served from the cache;
+    # predict is not part of the key, so it must return what model.predict
+    # would (e.g. the same predictions computed in chunks)
+    key=model_key(data_key,model)
+    entry=cache.get(key)
+    if entry is not None:
+        return entry['model'],entry['pre'],True,entry.get('times',{})
+    start=time.perf_counter()
+    model.fit(x_train,y_train)
+    fit_time=time.perf_counter()-start
+    start=time.perf_counter()
+    pre=predict(model,x_test) if predict else model.predict(x_test)
+    times={'fit':fit_time,'predict':time.perf_counter()-start}
+    cache.put(key,{'model':model,'pre':pre,'times':times})
+    return model,pre,False,times
@@ -0,0 +1,109 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import array_file
+
+
+def flatten(model):
+
+    # All trees go into one set of node arrays; child ids are made global and
+    # leaves keep -1 as children, as in sklearn's own tree arrays.
+    feature,threshold,left,right,value,roots=[],[],[],[],[],[]
+    offset=0
+    for est in model.estimators_:
+        t=est.tree_
+        leaf=t.children_left==-1
+        v=t.value[:,0,:] if t.value.shape[1]==1 else t.value[:,:,0]
+        if hasattr(model,'classes_'):
+            v=v/np.maximum(v.sum(axis=1,keepdims=True),1e-300)
+        roots.append(offset)
+        feature.append(np.where(leaf,0,t.feature))
+        threshold.append(t.threshold)
+        left.append(np.where(leaf,-1,t.children_left+offset))
+        right.append(np.where(leaf,-1,t.children_right+offset))
+        value.append(v)
+        offset+=t.node_count
+    return {'feature':np.concatenate(feature).astype(np.int32),'threshold':np.concatenate(threshold),
+        'left':np.concatenate(left).astype(np.int64),'right':np.concatenate(right).astype(np.int64),
+        'value':np.concatenate(value),'roots':np.array(roots,dtype=np.int64)}
+
+
+def export(model,path):
+
+    meta={'kind':'classifier' if hasattr(model,'classes_') else 'regressor','n_features':int(model.n_features_in_)}
+    if hasattr(model,'classes_'):
+        meta['classes']=model.classes_.tolist()
+    if hasattr(model,'feature_names_in_'):
+        meta['columns']=model.feature_names_in_.tolist()
+    array_file.save(path,flatten(model),meta)
+
+
+def save(forest,path):
+
+    names=[n for n in ('feature','threshold','left','right','value','value_id','roots') if hasattr(forest,n)]
+    array_file.save(path,{n:getattr(forest,n) for n in names},forest.meta)
+
+
+class compiled_forest:
+
+    def __init__(self,arrays,meta,block=4096,workers=None):
+
+        self.__dict__.update(arrays)
+        self.meta=meta
+        self.classes_=np.array(meta['classes']) if 'classes' in meta else None
+        self.block=block
+        self.workers=workers or os.cpu_count()
+
+    def __repr__(self):
+
+        return "compiled_forest({} trees, {} nodes, {})".format(len(self.roots),len(self.feature),self.meta['kind'])
+
+    def _leaves(self,x):
+
+        # every row walks every tree at once, one tree level per step, and
+        # pairs that reached a leaf drop out of the active set
+        n,k=len(x),len(self.roots)
+        node=np.tile(self.roots,n)
+        row=np.repeat(np.arange(n),k)
+        active=np.arange(n*k)
+        while len(active):
+            nd=node[active]
+            left=self.left[nd]
+            inner=left>=0
+            active,nd,left=active[inner],nd[inner],left[inner]
+            go_left=x[row[active],self.feature[nd]]<=self.threshold[nd]
+            node[active]=np.where(go_left,left,self.right[nd])
+        return node.reshape(n,k)
+
+    def _block(self,x):
+
+        leaves=self._leaves(x)
+        if hasattr(self,'value_id'):
+            # compressed forests keep each distinct leaf value once
+            leaves=self.value_id[leaves]
+        return self.value[leaves].astype(np.float64).mean(axis=1)
+
+    def _values(self,x):
+
+        # sklearn compares float32 features against float64 thresholds
+        x=np.asarray(x,dtype=np.float32)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            parts=list(pool.map(lambda i:self._block(x[i:i+self.block]),range(0,len(x),self.block)))
+        return np.vstack(parts) if parts else np.empty((0,self.value.shape[1]))
+
+    def predict_proba(self,x):
+
+        return self._values(x)
+
+    def predict(self,x):
+
+        v=self._values(x)
+        if self.classes_ is None:
+            return v[:,0]
+        return self.classes_[v.argmax(axis=1)]
+
+
+def load(path,**kw):
+
+    arrays,meta=array_file.load(path)
+    return compiled_forest(arrays,meta,**kw)
@@ -1,11 +1,10 @@
 
 from PyQt5.QtWidgets import *
-import sys,os,re,pickle
-import data_visualise,common,add_steps
+import sys,os,re,pickle,copy
+import data_visualise,common,add_steps,search,cross_val,fit_cache,streaming,split_service,nb_stats,fast_metrics,curves,background
 
 from PyQt5 import uic, QtWidgets ,QtCore, QtGui
 
-from sklearn.model_selection import train_test_split
 from sklearn.naive_bayes import GaussianNB
 from sklearn import metrics
 import numpy as np
@@ -35,13 +34,19 @@ class UI(QMainWindow):
         self.test_size_btn.clicked.connect(self.test_split)
         
         self.conf_mat.clicked.connect(self.conf_matrix)
+        self.roc.clicked.connect(self.roc_plot)
         self.dwnld.clicked.connect(self.download_model)
+        self.search_btn.clicked.connect(self.run_search)
+        self.cv_btn.clicked.connect(self.cross_validate)
+        self.stream_btn.clicked.connect(self.stream_training)
+        self.append_btn.clicked.connect(self.append_rows)
         self.setvalue()
         
         self.show()
 
     def setvalue(self):
         self.target.setText(self.target_value)
+        self.group_col.addItems(list(self.X.columns))
         self.columns.clear()
         self.columns.addItems(self.column_list)
         self.data_shape.setText(str(self.df.shape))
@@ -52,45 +57,121 @@ class UI(QMainWindow):
      
     def download_model(self):
 
-        name = QtWidgets.QFileDialog.getSaveFileName(self, 'Save File','/home/akshay/Desktop',"pickle(*.pkl)")
-        #file = open(name[0],'w')
-        
-        pkl_filename = name[0]
-        with open(pkl_filename, 'wb') as file:
-            pickle.dump(self.mlp, file)  
-        
-        self.user_act.save_file(pkl_filename)
+        name = QtWidgets.QFileDialog.getSaveFileName(self, 'Save File','/home/akshay/Desktop',"bundle(*.mlb);;pickle(*.pkl)")
+        if name[0]=="":
+            return
+        self.user_act.save_model(self.nb,name[0],self.X,self.target_value)
 
-       
     def test_split(self):
 
-        self.x_train,self.x_test,self.y_train,self.y_test = train_test_split(self.df,self.X[self.target_value],test_size=float(self.test_data.text()),random_state=0)
+        mode=self.split_mode.currentText()
+        self.split=split_service.get(self.df,self.X[self.target_value],float(self.test_data.text()),mode=mode,groups=self.X[self.group_col.currentText()] if mode=='grouped' else None,dtype=self.split_dtype.currentText())
+        self.x_train,self.x_test,self.y_train,self.y_test = self.split.views()
+        self.data_key=self.split.key
         print(self.y_train.shape)
         print(self.y_test.shape)
         print(self.y_train.shape)
         self.train_size.setText(str(self.x_train.shape))
         self.test_size.setText(str(self.x_test.shape))
     
+    def build_model(self):
+
+        return nb_stats.parallel_gaussian_nb(chunksize=int(self.chunk_size.text()))
+
     def training(self):
 
-        self.mlp = GaussianNB()
-        self.mlp.fit(self.x_train,self.y_train)        
-        self.pre=self.mlp.predict(self.x_test)
-        self.mae.setText(str(metrics.mean_absolute_error(self.y_test,self.pre)))
-        self.mse.setText(str(metrics.mean_squared_error(self.y_test,self.pre)))
-        self.rmse.setText(str(np.sqrt(metrics.mean_squared_error(self.y_test,self.pre))))
-        self.accuracy.setText(str(metrics.accuracy_score(self.y_test,self.pre)))
+        self.nb,self.pre,hit=fit_cache.fit(self.build_model(),self.x_train,self.y_train,self.x_test,self.data_key)
+        self.statusBar().showMessage(fit_cache.cache.status(hit))
+        self.show_metrics()
+
+    def run_search(self):
+
+        self.leaderboard.clear()
+        errors=[]
+        self.search_btn.setEnabled(False)
+
+        def done(board):
+            self.search_btn.setEnabled(True)
+            if board:
+                self.nb,self.pre,hit=fit_cache.fit(nb_stats.parallel_gaussian_nb(**search.best_params(board)),self.x_train,self.y_train,self.x_test,self.data_key)
+                self.statusBar().showMessage(fit_cache.cache.status(hit))
+                self.show_metrics()
+            else:
+                self.statusBar().showMessage("no candidate could be fitted: "+("; ".join(errors) or "none finished within the budget"))
+
+        # candidates are fitted on a worker thread, the board updates as they finish
+        background.start(search.run,GaussianNB,search.parse_space(self.search_space.text()),self.x_train,self.y_train,strategy=self.strategy.currentText(),budget=float(self.budget.text()),errors=errors,progress=self.show_board,done=done,failed=self.search_failed)
+
+    def show_board(self,board):
+
+        self.leaderboard.setPlainText(search.format_board(board))
+
+    def search_failed(self,message):
 
-        text=steps.classification_(self.y_test,self.pre)
-        self.report.setPlainText(text)
+        self.search_btn.setEnabled(True)
+        self.statusBar().showMessage(message)
+
+    def cross_validate(self):
+
+        scores=cross_val.run(self.build_model(),self.df,self.X[self.target_value],folds=int(self.folds.text()),stratified=self.cv_mode.currentText()=='stratified k-fold')
+        summary=cross_val.summary(scores)
+        self.mae.setText(summary.get('mae',''))
+        self.mse.setText(summary.get('mse',''))
+        self.rmse.setText(summary.get('rmse',''))
+        self.accuracy.setText(summary['accuracy'])
+        self.report.setPlainText(cross_val.report(scores))
+
+    def stream_training(self):
+
+        # workers reduce their chunks to per-class statistics and only those
+        # are merged here; a tenth of every chunk is held out and scored by
+        # the workers in a second pass
+        path,_=QtWidgets.QFileDialog.getOpenFileName(self,'Open file','',"csv(*.csv)")
+        if path=="":
+            return
+        model=self.build_model()
+        self.nb=model.fit_csv(path,self.column_list,self.target_value,holdout=0.1)
+        scores=streaming.score_csv(self.nb,path,self.column_list,self.target_value,model.chunksize,holdout=0.1).results()
+        self.mae.setText(str(scores.get('mae','')))
+        self.mse.setText(str(scores.get('mse','')))
+        self.rmse.setText(str(scores.get('rmse','')))
+        self.accuracy.setText(str(scores.get('accuracy','')))
+        self.statusBar().showMessage("streamed {} training rows, scored {} held-out rows".format(int(self.nb.class_count_.sum()),scores['rows']))
+
+    def append_rows(self):
+
+        path,_=QtWidgets.QFileDialog.getOpenFileName(self,'Open file','',"csv(*.csv)")
+        if path=="":
+            return
+        # work on a copy so the cached fit stays as it was
+        self.nb=copy.deepcopy(self.nb).add_csv(path,self.column_list,self.target_value)
+        self.show_stream(int(self.nb.class_count_.sum()))
+        if hasattr(self,'x_test'):
+            self.pre=self.nb.predict(self.x_test)
+            self.show_metrics()
+
+    def show_stream(self,rows):
+
+        self.statusBar().showMessage("streamed {} training rows".format(rows))
+        QApplication.processEvents()
+
+    def show_metrics(self):
+
+        self.scores=fast_metrics.evaluate(self.y_test,self.pre)
+        self.mae.setText(str(self.scores.get('mae','')))
+        self.mse.setText(str(self.scores.get('mse','')))
+        self.rmse.setText(str(self.scores.get('rmse','')))
+        self.accuracy.setText(str(self.scores['accuracy']))
+        self.report.setPlainText(fast_metrics.report_text(self.scores))
     
     def conf_matrix(self):
 
-        data = {'y_Actual':self.y_test,'y_Predicted':self.pre }
-        df = pd.DataFrame(data, columns=['y_Actual','y_Predicted'])
-        confusion_matrix = pd.crosstab(df['y_Actual'], df['y_Predicted'], rownames=['Actual'], colnames=['Predicted'])
         plt.figure()
-        sns.heatmap(confusion_matrix, annot=True)
+        sns.heatmap(fast_metrics.confusion_frame(self.scores), annot=True)
         plt.show()
 
+    def roc_plot(self):
+
+        curves.plot(curves.cache.get(self.nb,self.x_test,self.y_test),"Gaussian NB")
+
     
\ No newline at end of file
@@ -0,0 +1,97 @@
+import numpy as np
+from sklearn.base import BaseEstimator,ClassifierMixin,clone
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.kernel_approximation import Nystroem,RBFSampler
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.svm import LinearSVC,LinearSVR
+
+try:
+    from sklearn.frozen import FrozenEstimator
+except ImportError:
+    FrozenEstimator=None
+
+
+def gamma_value(gamma,x,custom=""):
+
+    # the explicit feature maps need a number where SVC accepts 'scale'/'auto'
+    x=np.asarray(x)
+    if gamma=='scale':
+        var=x.var()
+        return 1.0/(x.shape[1]*var) if var>0 else 1.0
+    if gamma=='auto':
+        return 1.0/x.shape[1]
+    return float(custom if gamma=='custom' else gamma)
+
+
+def map_used(mode,kernel):
+
+    # Random Fourier features only exist for the RBF kernel, the other
+    # kernels fall back to Nystroem (the linear one needs no map at all)
+    if mode=='random fourier' and kernel not in ('rbf','linear'):
+        return 'nystroem'
+    return mode
+
+
+def feature_map(mode,kernel='rbf',gamma=None,degree=3,coef0=1,n_components=500,random_state=0):
+
+    if map_used(mode,kernel)=='random fourier':
+        return RBFSampler(gamma=gamma,n_components=n_components,random_state=random_state)
+    return Nystroem(kernel=kernel,gamma=gamma,degree=degree,coef0=coef0,n_components=n_components,random_state=random_state)
+
+
+def classifier(mode,C=1.0,kernel='rbf',gamma=None,degree=3,coef0=1,n_components=500,max_iter=1000):
+
+    solver=LinearSVC(C=C,dual='auto',max_iter=max_iter)
+    if kernel=='linear':
+        return solver
+    return make_pipeline(feature_map(mode,kernel,gamma,degree,coef0,n_components),solver)
+
+
+def regressor(mode,C=1.0,epsilon=0.1,kernel='rbf',gamma=None,degree=3,coef0=1,n_components=1000,tol=1e-4,max_iter=1000):
+
+    # n_components landmarks play the part of the support vectors, so it is
+    # also the cap on how many kernel evaluations one prediction costs
+    solver=LinearSVR(C=C,epsilon=epsilon,loss='epsilon_insensitive',tol=tol,dual='auto',max_iter=max_iter)
+    if kernel=='linear':
+        return solver
+    return make_pipeline(feature_map(mode,kernel,gamma,degree,coef0,n_components),solver)
+
+
+class held_out_calibration(ClassifierMixin,BaseEstimator):
+
+    # Fits the wrapped model once on most of the rows and calibrates its
+    # decision values on the rest, instead of the five internal refits that
+    # SVC(probability=True) does.
+    def __init__(self,estimator,holdout=0.2,method='sigmoid',random_state=0):
+
+        self.estimator=estimator
+        self.holdout=holdout
+        self.method=method
+        self.random_state=random_state
+
+    def fit(self,x,y):
+
+        y=np.asarray(y)
+        counts=np.unique(y,return_counts=True)[1]
+        x_fit,x_cal,y_fit,y_cal=train_test_split(x,y,test_size=self.holdout,random_state=self.random_state,stratify=y if counts.min()>1 else None)
+        self.estimator_=clone(self.estimator).fit(x_fit,y_fit)
+        if FrozenEstimator is not None:
+            self.calibrated_=CalibratedClassifierCV(FrozenEstimator(self.estimator_),method=self.method)
+        else:
+            self.calibrated_=CalibratedClassifierCV(self.estimator_,method=self.method,cv='prefit')
+        self.calibrated_.fit(x_cal,y_cal)
+        self.classes_=self.calibrated_.classes_
+        return self
+
+    def predict(self,x):
+
+        return self.estimator_.predict(x)
+
+    def predict_proba(self,x):
+
+        return self.calibrated_.predict_proba(x)
+
+    def decision_function(self,x):
+
+        return self.estimator_.decision_function(x)
@@ -1,17 +1,16 @@
 from PyQt5.QtWidgets import QMainWindow, QApplication, QPushButton, QTextEdit ,QListWidget ,QTableView ,QComboBox,QLabel,QLineEdit,QTextBrowser
-import sys,pickle
+import sys,os,pickle,copy
 
 from PyQt5 import uic, QtWidgets ,QtCore, QtGui
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
+from sklearn.linear_model import SGDRegressor
 from sklearn import metrics
 import matplotlib.pyplot as plt
 import numpy as np
 import data_visualise
 import table_display
 import pandas as pd
-import common
+import common,search,cross_val,fit_cache,streaming,split_service,lstsq_stream,fast_metrics,np_runtime,background
 
 class UI(QMainWindow):
     def __init__(self,df,target,user_actions):
@@ -49,49 +48,141 @@ class UI(QMainWindow):
         self.output_btn.clicked.connect(self.output_)
         self.bar_plot_btn.clicked.connect(self.barplot)
         self.dwnld.clicked.connect(self.download_model)
+        self.search_btn.clicked.connect(self.run_search)
+        self.cv_btn.clicked.connect(self.cross_validate)
+        self.stream_btn.clicked.connect(self.stream_training)
+        self.append_btn.clicked.connect(self.append_rows)
         self.show()
 
     def setvalue(self):
                
         
         self.target.setText(self.target_value)
+        self.group_col.addItems(list(self.X.columns))
         self.columns.clear()
         self.columns.addItems(self.column_list)
     
     def download_model(self):
 
-        name = QtWidgets.QFileDialog.getSaveFileName(self, 'Save File','/home/akshay/Desktop',"pickle(*.pkl)")
-        #file = open(name[0],'w')
-        
-        pkl_filename = name[0]
-        with open(pkl_filename, 'wb') as file:
-            pickle.dump(self.reg, file)  
-        
-        self.user_act.save_file(pkl_filename)  
+        name = QtWidgets.QFileDialog.getSaveFileName(self, 'Save File','/home/akshay/Desktop',"bundle(*.mlb);;pickle(*.pkl)")
+        if name[0]=="":
+            return
+        path=self.user_act.save_model(self.reg,name[0],self.X,self.target_value)
+        self.export_numpy(os.path.splitext(path)[0]+".npmodel")
+
+    def export_numpy(self,path):
+
+        # weights only, for np_runtime; checked against the model on test rows
+        x=self.x_test[:2000]
+        x=x.toarray() if hasattr(x,'toarray') else x
+        try:
+            err=np_runtime.export_checked(self.reg,path,x)
+            self.statusBar().showMessage("numpy export matches the model (max difference {:.2g})".format(err))
+        except ValueError as e:
+            self.statusBar().showMessage(str(e))
 
     def test_split(self):
 
-        self.x_train,self.x_test,self.y_train,self.y_test = train_test_split(self.df,self.X[self.target_value],test_size=float(self.test_data.text()),random_state=0)
+        mode=self.split_mode.currentText()
+        self.split=split_service.get(self.df,self.X[self.target_value],float(self.test_data.text()),mode=mode,groups=self.X[self.group_col.currentText()] if mode=='grouped' else None,dtype=self.split_dtype.currentText())
+        self.x_train,self.x_test,self.y_train,self.y_test = self.split.views()
+        self.data_key=self.split.key
         print(self.y_train.shape)
         print(self.y_test.shape)
         self.train_size.setText(str(self.x_train.shape))
         self.test_size.setText(str(self.x_test.shape))
 
+    def build_model(self):
+
+        return lstsq_stream.streaming_lstsq(fit_intercept=self.fit_inter.currentText()=='True',normalize=self.normalize.currentText()=='True',alpha=float(self.alpha.text()),chunksize=int(self.chunk_size.text()))
+
     def training(self):
 
-        self.reg=LinearRegression().fit(self.x_train,self.y_train)
-        str1=""
+        self.reg,self.pre,hit=fit_cache.fit(self.build_model(),self.x_train,self.y_train,self.x_test,self.data_key)
+        self.statusBar().showMessage(fit_cache.cache.status(hit))
+        self.show_metrics()
+
+    def run_search(self):
+
+        self.leaderboard.clear()
+        errors=[]
+        # the same estimator training uses, so appending rows works after it
+        base={'chunksize':int(self.chunk_size.text())}
+        self.search_btn.setEnabled(False)
+
+        def done(board):
+            self.search_btn.setEnabled(True)
+            if board:
+                self.reg,self.pre,hit=fit_cache.fit(lstsq_stream.streaming_lstsq(**dict(base,**search.best_params(board))),self.x_train,self.y_train,self.x_test,self.data_key)
+                self.statusBar().showMessage(fit_cache.cache.status(hit))
+                self.show_metrics()
+            else:
+                self.statusBar().showMessage("no candidate could be fitted: "+("; ".join(errors) or "none finished within the budget"))
+
+        # candidates are fitted on a worker thread, the board updates as they finish
+        background.start(search.run,lstsq_stream.streaming_lstsq,search.parse_space(self.search_space.text()),self.x_train,self.y_train,strategy=self.strategy.currentText(),base=base,budget=float(self.budget.text()),errors=errors,progress=self.show_board,done=done,failed=self.search_failed)
+
+    def show_board(self,board):
+
+        self.leaderboard.setPlainText(search.format_board(board))
+
+    def search_failed(self,message):
+
+        self.search_btn.setEnabled(True)
+        self.statusBar().showMessage(message)
+
+    def cross_validate(self):
+
+        scores=cross_val.run(self.build_model(),self.df,self.X[self.target_value],folds=int(self.folds.text()))
+        summary=cross_val.summary(scores)
+        self.mae.setText(summary['mae'])
+        self.mse.setText(summary['mse'])
+        self.rmse.setText(summary['rmse'])
+
+    def stream_training(self):
+
+        path,_=QtWidgets.QFileDialog.getOpenFileName(self,'Open file','',"csv(*.csv)")
+        if path=="":
+            return
+        self.reg,scores=streaming.train(SGDRegressor(fit_intercept=self.fit_inter.currentText()=='True',random_state=1),path,self.column_list,self.target_value,chunksize=int(self.chunk_size.text()),callback=self.show_stream)
+        self.mae.setText(str(scores.get('mae','')))
+        self.mse.setText(str(scores.get('mse','')))
+        self.rmse.setText(str(scores.get('rmse','')))
+        self.intercept.setText(str(self.reg.intercept_))
+        self.weights.setText(' '.join(map(str,self.reg.coef_)))
+        self.statusBar().showMessage("streamed {} training rows, scored {} held-out rows".format(scores['trained'],scores['rows']))
+
+    def append_rows(self):
+
+        # new rows only add to the stored X'X / X'y sums before a re-solve,
+        # on a copy so the cached fit stays as it was
+        if not isinstance(getattr(self,'reg',None),lstsq_stream.streaming_lstsq):
+            self.statusBar().showMessage("rows can only be appended to a model from Train, streamed models have no stored sums")
+            return
+        path,_=QtWidgets.QFileDialog.getOpenFileName(self,'Open file','',"csv(*.csv)")
+        if path=="":
+            return
+        self.reg=copy.deepcopy(self.reg).partial_fit_csv(path,self.column_list,self.target_value)
+        self.pre=self.reg.predict(self.x_test)
+        self.show_metrics()
+        self.statusBar().showMessage("solved on {} rows".format(self.reg.moments_.n))
+
+    def show_stream(self,rows):
+
+        self.statusBar().showMessage("streamed {} training rows".format(rows))
+        QApplication.processEvents()
+
+    def show_metrics(self):
 
         coef=' '.join(map(str, self.reg.coef_)) 
         
         self.intercept.setText(str(self.reg.intercept_))
         self.weights.setText(coef)
 
-        pre=self.reg.predict(self.x_test)
-        self.mae.setText(str(metrics.mean_absolute_error(self.y_test,pre)))
-        self.mse.setText(str(metrics.mean_squared_error(self.y_test,pre)))
-        self.rmse.setText(str(np.sqrt(metrics.mean_squared_error(self.y_test,pre))))
-
+        self.scores=fast_metrics.evaluate(self.y_test,self.pre,classification=False)
+        self.mae.setText(str(self.scores.get('mae','')))
+        self.mse.setText(str(self.scores.get('mse','')))
+        self.rmse.setText(str(self.scores.get('rmse','')))
     def output_(self):
         
         prediction = self.reg.predict(self.x_test)
@@ -0,0 +1,87 @@
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+
+
+class live_curve:
+
+    def __init__(self,title,xlabel,ylabel):
+
+        plt.ion()
+        self.fig,self.ax=plt.subplots()
+        self.ax.set_title(title)
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+        self.lines={}
+
+    def update(self,name,x,y):
+
+        if name not in self.lines:
+            self.lines[name],=self.ax.plot(x,y,marker='.',label=name)
+            self.ax.legend()
+        else:
+            self.lines[name].set_data(x,y)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.fig.canvas.draw_idle()
+        plt.pause(0.001)
+
+
+def _holdout(y,fraction,seed):
+
+    rows=np.random.RandomState(seed).permutation(len(y))
+    n_val=int(len(y)*fraction)
+    return rows[n_val:],rows[:n_val]
+
+
+def train_epochs(model,x,y,epochs,batch_size=200,validation=0.0,patience=10,tol=1e-4,callback=None,seed=0):
+
+    # float32 all the way: MLP keeps the input dtype for its weights, and the
+    # split may already be float32, in which case this is not a copy
+    x=np.asarray(x,dtype=np.float32)
+    y=np.asarray(y)
+    fit,val=_holdout(y,validation,seed) if validation else (slice(None),None)
+    x_fit,y_fit=x[fit],y[fit]
+    if model.solver=='lbfgs':
+        # lbfgs has no partial_fit, continue from the current weights instead
+        model.set_params(warm_start=True,max_iter=epochs)
+        start=time.perf_counter()
+        model.fit(x_fit,y_fit)
+        if callback:
+            callback({'epoch':model.n_iter_,'loss':model.loss_,'val_score':model.score(x[val],y[val]) if val is not None else None,'epoch_time':time.perf_counter()-start})
+        return model
+    model.set_params(batch_size=batch_size)
+    classes=model.classes_ if hasattr(model,'classes_') else np.unique(y)
+    best,best_weights,stale=-np.inf,None,0
+    for epoch in range(epochs):
+        start=time.perf_counter()
+        # one partial_fit call is one shuffled pass in batches of batch_size
+        model.partial_fit(x_fit,y_fit,classes=classes)
+        score=model.score(x[val],y[val]) if val is not None else None
+        if callback:
+            callback({'epoch':epoch+1,'loss':model.loss_,'val_score':score,'epoch_time':time.perf_counter()-start})
+        if score is None:
+            continue
+        if score>best+tol:
+            best,stale=score,0
+            best_weights=([c.copy() for c in model.coefs_],[b.copy() for b in model.intercepts_])
+        else:
+            stale+=1
+            if stale>=patience:
+                break
+    if best_weights is not None:
+        model.coefs_,model.intercepts_=best_weights
+    return model
+
+
+def grow_forest(model,x,y,n_more,steps=10,callback=None):
+
+    model.set_params(warm_start=True,oob_score=model.bootstrap)
+    target=model.n_estimators+n_more
+    step=max(1,n_more//steps)
+    while model.n_estimators<target:
+        model.set_params(n_estimators=min(target,model.n_estimators+step))
+        model.fit(x,y)
+        if callback:
+            callback(model)
+    return model
@@ -1,21 +1,24 @@
 
 from PyQt5.QtWidgets import QMainWindow, QApplication, QPushButton, QTextEdit ,QListWidget ,QTableView ,QComboBox,QLabel,QLineEdit,QTextBrowser
-import sys ,pickle
+import sys ,os,pickle
 import data_visualise
 import table_display
 from PyQt5 import uic, QtWidgets ,QtCore, QtGui
-from sklearn.model_selection import train_test_split
 from sklearn.svm import SVR
 from sklearn import metrics
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression,SGDClassifier
 from sklearn.metrics import accuracy_score
-import common
+import common,search,cross_val,fit_cache,streaming,split_service,fast_metrics,curves,np_runtime,background
+from scipy import sparse
 
 
+# multi_class was removed from LogisticRegression in newer scikit-learn
+MULTI_CLASS='multi_class' in LogisticRegression().get_params()
+
 
 class UI(QMainWindow):
     def __init__(self,df,target,user_actions):
@@ -40,6 +43,10 @@ class UI(QMainWindow):
         self.max_iter=self.findChild(QLineEdit,"max_iter")
         self.fit_inter=self.findChild(QComboBox,"fit_inter")  
         self.multi_class=self.findChild(QComboBox,"multi_class")
+        if not MULTI_CLASS:
+            # this scikit-learn always fits multinomial, the choice would do nothing
+            self.multi_class.hide()
+            self.label_23.hide()
         self.tol=self.findChild(QLineEdit,"tol")
         self.train_btn=self.findChild(QPushButton,"train")
         
@@ -55,15 +62,19 @@ class UI(QMainWindow):
         self.test_size_btn=self.findChild(QPushButton,"test_size_btn")
         self.train_btn.clicked.connect(self.training)
         self.conf_mat_btn=self.findChild(QPushButton,"conf_mat")
-        #self.roc_btn.clicked.connect(self.roc_plot)
+        self.roc_btn.clicked.connect(self.roc_plot)
         self.conf_mat_btn.clicked.connect(self.conf_matrix)
         self.test_size_btn.clicked.connect(self.test_split)
         self.dwnld.clicked.connect(self.download_model)
+        self.search_btn.clicked.connect(self.run_search)
+        self.cv_btn.clicked.connect(self.cross_validate)
+        self.stream_btn.clicked.connect(self.stream_training)
         self.setvalue()
         self.show()
 
     def setvalue(self):
         self.target.setText(self.target_value)
+        self.group_col.addItems(list(self.X.columns))
         self.columns.clear()
         self.columns.addItems(self.column_list)
         self.X_combo.addItems(self.column_list)
@@ -72,43 +83,138 @@ class UI(QMainWindow):
     
     def test_split(self):
 
-        self.x_train,self.x_test,self.y_train,self.y_test = train_test_split(self.df,self.X[self.target_value],test_size=float(self.test_data.text()),random_state=0)
+        mode=self.split_mode.currentText()
+        self.split=split_service.get(self.df,self.X[self.target_value],float(self.test_data.text()),mode=mode,groups=self.X[self.group_col.currentText()] if mode=='grouped' else None,dtype=self.split_dtype.currentText(),sparse=True)
+        self.x_train,self.x_test,self.y_train,self.y_test = self.split.views()
+        self.data_key=self.split.key
         print(self.y_train.shape)
         print(self.y_test.shape)
         self.train_size.setText(str(self.x_train.shape))
         self.test_size.setText(str(self.x_test.shape))
+        if sparse.issparse(self.split.matrix):
+            # lbfgs/newton-cg gain nothing from sparsity, saga works on CSR rows directly
+            if self.solver.currentText() in ('lbfgs','newton-cg'):
+                self.solver.setCurrentText('saga')
+            density=self.split.matrix.nnz/max(1,np.prod(self.split.matrix.shape))
+            self.footprint.setText("{:.1f} MB sparse CSR ({:.2%} non-zero)".format(self.split.nbytes()/2**20,density))
+        else:
+            self.footprint.setText("{:.1f} MB dense".format(self.split.nbytes()/2**20))
 
     def download_model(self):
 
-        name = QtWidgets.QFileDialog.getSaveFileName(self, 'Save File','/home/akshay/Desktop',"pickle(*.pkl)")
-        #file = open(name[0],'w')
-        
-        pkl_filename = name[0]
-        with open(pkl_filename, 'wb') as file:
-            pickle.dump(self.lr, file)  
-        
-        self.user_act.save_file(pkl_filename)  
+        name = QtWidgets.QFileDialog.getSaveFileName(self, 'Save File','/home/akshay/Desktop',"bundle(*.mlb);;pickle(*.pkl)")
+        if name[0]=="":
+            return
+        path=self.user_act.save_model(self.lr,name[0],self.X,self.target_value)
+        self.export_numpy(os.path.splitext(path)[0]+".npmodel")
+
+    def export_numpy(self,path):
+
+        # weights only, for np_runtime; checked against the model on test rows
+        x=self.x_test[:2000]
+        x=x.toarray() if hasattr(x,'toarray') else x
+        try:
+            err=np_runtime.export_checked(self.lr,path,x)
+            self.statusBar().showMessage("numpy export matches the model (max difference {:.2g})".format(err))
+        except ValueError as e:
+            self.statusBar().showMessage(str(e))
+
+    def build_model(self):
+
+        return LogisticRegression(C=float(self.c_.text()),**self.base_params())
+
+    def base_params(self):
+
+        base={'penalty':self.penalty.currentText(),'dual':self.dual.currentText()=='True','tol':float(self.tol.text()),'max_iter':int(float(self.max_iter.text())),'fit_intercept':self.fit_inter.currentText()=='True','random_state':1,'solver':self.solver.currentText()}
+        if MULTI_CLASS:
+            base['multi_class']=self.multi_class.currentText()
+        return base
+
+    def build_stream_model(self):
+
+        # SGD with log loss is the partial_fit counterpart of LogisticRegression
+        penalty=self.penalty.currentText()
+        return SGDClassifier(loss='log_loss',penalty=None if penalty=='none' else penalty,tol=float(self.tol.text()),fit_intercept=self.fit_inter.currentText()=='True',random_state=1)
 
     def training(self):
 
-        self.lr = LogisticRegression(C=float(self.c_.text()),penalty=self.penalty.currentText(),dual=self.dual.currentText()=='True',tol=float(self.tol.text()),max_iter=float(self.max_iter.text()),fit_intercept=self.fit_inter.currentText()=='True',random_state=1,solver=self.solver.currentText(),multi_class=self.multi_class.currentText())
-        self.lr.fit(self.x_train,self.y_train)
-        
-        self.pre=self.lr.predict(self.x_test)
-        self.mae.setText(str(metrics.mean_absolute_error(self.y_test,self.pre)))
-        self.mse.setText(str(metrics.mean_squared_error(self.y_test,self.pre)))
-        self.rmse.setText(str(np.sqrt(metrics.mean_squared_error(self.y_test,self.pre))))
-        self.accuracy.setText(str(accuracy_score(self.pre,self.y_test)))
-        text=steps.classification_(self.y_test,self.pre)
-        self.report.setPlainText(text)
+        self.lr,self.pre,hit,times=fit_cache.fit_timed(self.build_model(),self.x_train,self.y_train,self.x_test,self.data_key)
+        self.statusBar().showMessage(fit_cache.cache.status(hit))
+        self.fit_time.setText("{:.3f}s".format(times['fit']) if times else "")
+        self.show_metrics()
+
+    def run_search(self):
+
+        base=self.base_params()
+        self.leaderboard.clear()
+        errors=[]
+        self.search_btn.setEnabled(False)
+
+        def done(board):
+            self.search_btn.setEnabled(True)
+            if board:
+                self.lr,self.pre,hit=fit_cache.fit(LogisticRegression(**dict(base,**search.best_params(board))),self.x_train,self.y_train,self.x_test,self.data_key)
+                self.statusBar().showMessage(fit_cache.cache.status(hit))
+                self.show_metrics()
+            else:
+                self.statusBar().showMessage("no candidate could be fitted: "+("; ".join(errors) or "none finished within the budget"))
+
+        # candidates are fitted on a worker thread, the board updates as they finish
+        background.start(search.run,LogisticRegression,search.parse_space(self.search_space.text()),self.x_train,self.y_train,strategy=self.strategy.currentText(),base=base,budget=float(self.budget.text()),errors=errors,progress=self.show_board,done=done,failed=self.search_failed)
+
+    def show_board(self,board):
+
+        self.leaderboard.setPlainText(search.format_board(board))
+
+    def search_failed(self,message):
+
+        self.search_btn.setEnabled(True)
+        self.statusBar().showMessage(message)
+
+    def cross_validate(self):
+
+        scores=cross_val.run(self.build_model(),self.df,self.X[self.target_value],folds=int(self.folds.text()),stratified=self.cv_mode.currentText()=='stratified k-fold')
+        summary=cross_val.summary(scores)
+        self.mae.setText(summary.get('mae',''))
+        self.mse.setText(summary.get('mse',''))
+        self.rmse.setText(summary.get('rmse',''))
+        self.accuracy.setText(summary['accuracy'])
+        self.report.setPlainText(cross_val.report(scores))
+
+    def stream_training(self):
+
+        path,_=QtWidgets.QFileDialog.getOpenFileName(self,'Open file','',"csv(*.csv)")
+        if path=="":
+            return
+        self.lr,scores=streaming.train(self.build_stream_model(),path,self.column_list,self.target_value,chunksize=int(self.chunk_size.text()),callback=self.show_stream)
+        self.mae.setText(str(scores.get('mae','')))
+        self.mse.setText(str(scores.get('mse','')))
+        self.rmse.setText(str(scores.get('rmse','')))
+        self.accuracy.setText(str(scores['accuracy']))
+        self.statusBar().showMessage("streamed {} training rows, scored {} held-out rows".format(scores['trained'],scores['rows']))
+
+    def show_stream(self,rows):
+
+        self.statusBar().showMessage("streamed {} training rows".format(rows))
+        QApplication.processEvents()
+
+    def show_metrics(self):
+
+        self.scores=fast_metrics.evaluate(self.y_test,self.pre)
+        self.mae.setText(str(self.scores.get('mae','')))
+        self.mse.setText(str(self.scores.get('mse','')))
+        self.rmse.setText(str(self.scores.get('rmse','')))
+        self.accuracy.setText(str(self.scores['accuracy']))
+        self.report.setPlainText(fast_metrics.report_text(self.scores))
 
     def conf_matrix(self):
 
-        data = {'y_Actual':self.y_test.values,'y_Predicted':self.pre }
-        df = pd.DataFrame(data, columns=['y_Actual','y_Predicted'])
-        confusion_matrix = pd.crosstab(df['y_Actual'], df['y_Predicted'], rownames=['Actual'], colnames=['Predicted'])
         plt.figure()
-        sns.heatmap(confusion_matrix, annot=True)
+        sns.heatmap(fast_metrics.confusion_frame(self.scores), annot=True)
         plt.show()
 
+    def roc_plot(self):
+
+        curves.plot(curves.cache.get(self.lr,self.x_test,self.y_test),"Logistic regression")
+
     
\ No newline at end of file
@@ -0,0 +1,121 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from scipy import linalg
+from sklearn.base import BaseEstimator,RegressorMixin
+import streaming
+
+
+class moments:
+
+    # Row count, column means and the centred cross-product matrix of [X, y].
+    # Two sets merge exactly (Chan et al.), so chunks can be summed in any
+    # order, on any worker, and new rows can be folded in later.
+    def __init__(self,p):
+
+        self.n=0
+        self.mean=np.zeros(p+1)
+        self.m2=np.zeros((p+1,p+1))
+
+    @classmethod
+    def of(cls,x,y):
+
+        z=np.column_stack([np.asarray(x,dtype=np.float64),np.asarray(y,dtype=np.float64)])
+        m=cls(z.shape[1]-1)
+        m.n=len(z)
+        if m.n:
+            m.mean=z.mean(axis=0)
+            c=z-m.mean
+            m.m2=c.T@c
+        return m
+
+    def merge(self,other):
+
+        if other.n==0:
+            return self
+        n=self.n+other.n
+        delta=other.mean-self.mean
+        self.m2=self.m2+other.m2+np.outer(delta,delta)*(self.n*other.n/n)
+        self.mean=self.mean+delta*(other.n/n)
+        self.n=n
+        return self
+
+
+def csv_moments(path,columns,target,chunksize=100000,workers=None):
+
+    # each worker parses its own slice of the file, only the (p+1)x(p+1)
+    # result comes back to the caller
+    total=moments(len(columns))
+    for m in streaming.map_chunks(moments.of,path,columns,target,chunksize,workers):
+        total.merge(m)
+    return total
+
+
+class streaming_lstsq(RegressorMixin,BaseEstimator):
+
+    def __init__(self,fit_intercept=True,normalize=False,alpha=0.0,chunksize=100000,n_jobs=None):
+
+        self.fit_intercept=fit_intercept
+        self.normalize=normalize
+        self.alpha=alpha
+        self.chunksize=chunksize
+        self.n_jobs=n_jobs
+
+    def fit(self,x,y):
+
+        x=np.asarray(x)
+        y=np.asarray(y)
+        bounds=range(0,len(x),self.chunksize)
+        self.moments_=moments(x.shape[1])
+        # matmul releases the GIL, so threads share the in-memory chunks
+        with ThreadPoolExecutor(max_workers=self.n_jobs or os.cpu_count()) as pool:
+            for m in pool.map(lambda i:moments.of(x[i:i+self.chunksize],y[i:i+self.chunksize]),bounds):
+                self.moments_.merge(m)
+        return self._solve()
+
+    def partial_fit(self,x,y):
+
+        if not hasattr(self,'moments_'):
+            self.moments_=moments(np.asarray(x).shape[1])
+        self.moments_.merge(moments.of(x,y))
+        return self._solve()
+
+    def fit_csv(self,path,columns,target,workers=None):
+
+        self.moments_=csv_moments(path,columns,target,self.chunksize,workers)
+        return self._solve()
+
+    def partial_fit_csv(self,path,columns,target,workers=None):
+
+        if not hasattr(self,'moments_'):
+            return self.fit_csv(path,columns,target,workers)
+        self.moments_.merge(csv_moments(path,columns,target,self.chunksize,workers))
+        return self._solve()
+
+    def _solve(self):
+
+        m=self.moments_
+        p=len(m.mean)-1
+        mean,y_mean=m.mean[:p],m.mean[p]
+        xtx,xty=m.m2[:p,:p],m.m2[:p,p]
+        if not self.fit_intercept:
+            xtx=xtx+m.n*np.outer(mean,mean)
+            xty=xty+m.n*mean*y_mean
+        scale=np.ones(p)
+        if self.normalize:
+            scale=np.sqrt(np.diag(xtx)/max(m.n,1))
+            scale[scale==0]=1
+        a=xtx/np.outer(scale,scale)+self.alpha*np.eye(p)
+        b=xty/scale
+        try:
+            w=linalg.solve(a,b,assume_a='pos')
+        except (linalg.LinAlgError,ValueError):
+            w=np.linalg.lstsq(a,b,rcond=None)[0]
+        self.coef_=w/scale
+        self.intercept_=y_mean-mean@self.coef_ if self.fit_intercept else 0.0
+        self.n_features_in_=p
+        return self
+
+    def predict(self,x):
+
+        return np.asarray(x,dtype=np.float64)@self.coef_+self.intercept_
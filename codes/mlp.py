@@ -1,11 +1,10 @@
 
 from PyQt5.QtWidgets import *
-import sys,os,re,pickle
-import data_visualise,common,add_steps
+import sys,os,re,pickle,copy
+import data_visualise,common,add_steps,search,cross_val,fit_cache,live_training,streaming,split_service,fast_metrics,curves,np_runtime,compress,background
 
 from PyQt5 import uic, QtWidgets ,QtCore, QtGui
 
-from sklearn.model_selection import train_test_split
 from sklearn.neural_network import MLPClassifier
 from sklearn import metrics
 import numpy as np
@@ -36,13 +35,19 @@ class UI(QMainWindow):
         self.reshape_btn.clicked.connect(self.reshape_data)
         self.go.clicked.connect(self.create_model)
         self.conf_mat.clicked.connect(self.conf_matrix)
+        self.roc.clicked.connect(self.roc_plot)
         self.dwnld.clicked.connect(self.download_model)
+        self.search_btn.clicked.connect(self.run_search)
+        self.continue_btn.clicked.connect(self.continue_training)
+        self.stream_btn.clicked.connect(self.stream_training)
+        self.cv_btn.clicked.connect(self.cross_validate)
         self.setvalue()
         
         self.show()
 
     def setvalue(self):
         self.target.setText(self.target_value)
+        self.group_col.addItems(list(self.X.columns))
         self.columns.clear()
         self.columns.addItems(self.column_list)
         self.data_shape.setText(str(self.df.shape))
@@ -53,26 +58,57 @@ class UI(QMainWindow):
      
     def download_model(self):
 
-        name = QtWidgets.QFileDialog.getSaveFileName(self, 'Save File','/home/akshay/Desktop',"pickle(*.pkl)")
-        #file = open(name[0],'w')
-        
-        pkl_filename = name[0]
-        with open(pkl_filename, 'wb') as file:
-            pickle.dump(self.mlp, file)  
-        
-        self.user_act.save_file(pkl_filename)
+        # the options are measured off the GUI thread, the dialogs follow
+        self.dwnld.setEnabled(False)
+        self.statusBar().showMessage("measuring compression options...")
+        background.start(compress.options,self.mlp,self.x_test,self.y_test,self.x_train,self.y_train,done=self.save_options,failed=self.download_failed)
+
+    def download_failed(self,message):
+
+        self.dwnld.setEnabled(True)
+        self.statusBar().showMessage(message)
+
+    def save_options(self,options):
+
+        self.dwnld.setEnabled(True)
+        labels=[compress.describe(o,options[0]) for o in options]
+        label,ok=QtWidgets.QInputDialog.getItem(self,'Compression','Size and held-out accuracy:',labels,0,False)
+        if not ok:
+            return
+        name = QtWidgets.QFileDialog.getSaveFileName(self, 'Save File','/home/akshay/Desktop',"bundle(*.mlb);;pickle(*.pkl)")
+        if name[0]=="":
+            return
+        path=self.user_act.save_model(options[labels.index(label)]['model'],name[0],self.X,self.target_value)
+        self.export_numpy(os.path.splitext(path)[0]+".npmodel")
+        self.statusBar().showMessage("saved {}; {}".format(label,self.statusBar().currentMessage()))
+
+    def export_numpy(self,path):
+
+        # weights only, for np_runtime; checked against the model on test rows
+        x=self.x_test[:2000]
+        x=x.toarray() if hasattr(x,'toarray') else x
+        try:
+            err=np_runtime.export_checked(self.mlp,path,x)
+            self.statusBar().showMessage("numpy export matches the model (max difference {:.2g})".format(err))
+        except ValueError as e:
+            self.statusBar().showMessage(str(e))
 
     def reshape_data(self):
         
-        shape=str(self.reshape.text())
-        self.df=np.array(self.df)
-        self.df=self.df.reshape(eval(shape))
+        try:
+            self.df=data.reshape(self.df,self.reshape.text())
+        except ValueError as e:
+            self.statusBar().showMessage(str(e))
+            return
         self.after_reshape.setText(str(self.df.shape))
             
     
     def test_split(self):
 
-        self.x_train,self.x_test,self.y_train,self.y_test = train_test_split(self.df,self.X[self.target_value],test_size=float(self.test_data.text()),random_state=0)
+        mode=self.split_mode.currentText()
+        self.split=split_service.get(self.df,self.X[self.target_value],float(self.test_data.text()),mode=mode,groups=self.X[self.group_col.currentText()] if mode=='grouped' else None,dtype=self.split_dtype.currentText())
+        self.x_train,self.x_test,self.y_train,self.y_test = self.split.views()
+        self.data_key=self.split.key
         print(self.y_train.shape)
         print(self.y_test.shape)
         print(self.y_train.shape)
@@ -81,42 +117,131 @@ class UI(QMainWindow):
 
     def create_model(self):
 
-        self.hidden_layer=str(self.mlp_layers.text())
+        self.hidden_layer=data.parse_ints(self.mlp_layers.text())
         self.active_=self.activations.currentText()
         self.solver_=self.solvers.currentText()
         self.alpha_=float(self.alpha_val.text())
         self.lr=float(self.learning_rate.text())
         self.max_iter_=int(self.iteration.text())
     
+    def build_model(self):
+
+        return MLPClassifier(hidden_layer_sizes=self.hidden_layer, activation=self.active_, solver=self.solver_, learning_rate_init=self.lr,alpha=self.alpha_,max_iter=self.max_iter_,batch_size=int(self.batch_size.text()),random_state=1)
+
+    def fit_epochs(self,epochs):
+
+        self.curve=live_training.live_curve("MLP training","epoch","loss / validation score")
+        self.history=[]
+        live_training.train_epochs(self.mlp,self.x_train,self.y_train,epochs,batch_size=int(self.batch_size.text()),validation=float(self.val_fraction.text()),patience=int(self.patience.text()),callback=self.show_epoch)
+
     def training(self):
 
-        self.mlp = MLPClassifier(hidden_layer_sizes=eval(self.hidden_layer), activation=self.active_, learning_rate_init=self.lr,alpha=self.alpha_,max_iter=self.max_iter_,random_state=1,verbose=True)
-        
-        
-        original=sys.stdout
-        sys.stdout = open('summary.txt', 'w')
-        print(self.mlp.fit(self.x_train,self.y_train))
-        sys.stdout=original
-        text=open('summary.txt').read()
-        self.summary.setPlainText(text)
-        os.remove('summary.txt')
-        
-        
-        self.pre=self.mlp.predict(self.x_test)
-        self.mae.setText(str(metrics.mean_absolute_error(self.y_test,self.pre)))
-        self.mse.setText(str(metrics.mean_squared_error(self.y_test,self.pre)))
-        self.rmse.setText(str(np.sqrt(metrics.mean_squared_error(self.y_test,self.pre))))
-        self.accuracy.setText(str(metrics.accuracy_score(self.y_test,self.pre)))
-
-        text=steps.classification_(self.y_test,self.pre)
-        self.report.setPlainText(text)
+        self.mlp = self.build_model()
+        # validation slice and patience decide where training stops, so they are part of the key
+        key=fit_cache.fingerprint(fit_cache.model_key(self.data_key,self.mlp),float(self.val_fraction.text()),int(self.patience.text()))
+        entry=fit_cache.cache.get(key)
+        hit=entry is not None
+        if not hit:
+            self.summary.clear()
+            self.fit_epochs(self.max_iter_)
+            entry={'model':self.mlp,'pre':self.mlp.predict(np.asarray(self.x_test,dtype=np.float32)),'summary':self.summary.toPlainText()}
+            fit_cache.cache.put(key,entry)
+        self.mlp,self.pre=entry['model'],entry['pre']
+        self.summary.setPlainText(entry['summary'])
+        self.statusBar().showMessage(fit_cache.cache.status(hit))
+        self.show_metrics()
+
+    def continue_training(self):
+
+        # the fitted model may be shared with the fit cache, so train a copy
+        self.mlp=copy.deepcopy(self.mlp)
+        self.fit_epochs(int(self.more_epochs.text()))
+        self.pre=self.mlp.predict(np.asarray(self.x_test,dtype=np.float32))
+        self.show_metrics()
+
+    def show_epoch(self,stats):
+
+        self.history.append(stats)
+        line="Epoch {}, loss = {:.8f}, {:.3f}s".format(stats['epoch'],stats['loss'],stats['epoch_time'])
+        if stats['val_score'] is not None:
+            line+=", validation score = {:.4f}".format(stats['val_score'])
+            self.curve.update('validation score',[h['epoch'] for h in self.history],[h['val_score'] for h in self.history])
+        self.summary.appendPlainText(line)
+        self.curve.update('loss',[h['epoch'] for h in self.history],[h['loss'] for h in self.history])
+
+    def run_search(self):
+
+        # every setting on the form, the searched ones are overridden
+        self.create_model()
+        base=self.build_model().get_params()
+        self.leaderboard.clear()
+        errors=[]
+        self.search_btn.setEnabled(False)
+
+        def done(board):
+            self.search_btn.setEnabled(True)
+            if board:
+                self.mlp,self.pre,hit=fit_cache.fit(MLPClassifier(**dict(base,**search.best_params(board))),self.x_train,self.y_train,self.x_test,self.data_key)
+                self.statusBar().showMessage(fit_cache.cache.status(hit))
+                self.show_metrics()
+            else:
+                self.statusBar().showMessage("no candidate could be fitted: "+("; ".join(errors) or "none finished within the budget"))
+
+        # candidates are fitted on a worker thread, the board updates as they finish
+        background.start(search.run,MLPClassifier,search.parse_space(self.search_space.text()),self.x_train,self.y_train,strategy=self.strategy.currentText(),base=base,budget=float(self.budget.text()),errors=errors,progress=self.show_board,done=done,failed=self.search_failed)
+
+    def show_board(self,board):
+
+        self.leaderboard.setPlainText(search.format_board(board))
+
+    def search_failed(self,message):
+
+        self.search_btn.setEnabled(True)
+        self.statusBar().showMessage(message)
+
+    def cross_validate(self):
+
+        scores=cross_val.run(self.build_model(),self.df,self.X[self.target_value],folds=int(self.folds.text()),stratified=self.cv_mode.currentText()=='stratified k-fold')
+        summary=cross_val.summary(scores)
+        self.mae.setText(summary.get('mae',''))
+        self.mse.setText(summary.get('mse',''))
+        self.rmse.setText(summary.get('rmse',''))
+        self.accuracy.setText(summary['accuracy'])
+        self.report.setPlainText(cross_val.report(scores))
+
+    def stream_training(self):
+
+        path,_=QtWidgets.QFileDialog.getOpenFileName(self,'Open file','',"csv(*.csv)")
+        if path=="":
+            return
+        self.mlp,scores=streaming.train(self.build_model(),path,self.column_list,self.target_value,chunksize=int(self.chunk_size.text()),callback=self.show_stream)
+        self.mae.setText(str(scores.get('mae','')))
+        self.mse.setText(str(scores.get('mse','')))
+        self.rmse.setText(str(scores.get('rmse','')))
+        self.accuracy.setText(str(scores['accuracy']))
+        self.statusBar().showMessage("streamed {} training rows, scored {} held-out rows".format(scores['trained'],scores['rows']))
+
+    def show_stream(self,rows):
+
+        self.statusBar().showMessage("streamed {} training rows".format(rows))
+        QApplication.processEvents()
+
+    def show_metrics(self):
+
+        self.scores=fast_metrics.evaluate(self.y_test,self.pre)
+        self.mae.setText(str(self.scores.get('mae','')))
+        self.mse.setText(str(self.scores.get('mse','')))
+        self.rmse.setText(str(self.scores.get('rmse','')))
+        self.accuracy.setText(str(self.scores['accuracy']))
+        self.report.setPlainText(fast_metrics.report_text(self.scores))
     def conf_matrix(self):
 
-        data = {'y_Actual':self.y_test,'y_Predicted':self.pre }
-        df = pd.DataFrame(data, columns=['y_Actual','y_Predicted'])
-        confusion_matrix = pd.crosstab(df['y_Actual'], df['y_Predicted'], rownames=['Actual'], colnames=['Predicted'])
         plt.figure()
-        sns.heatmap(confusion_matrix, annot=True)
+        sns.heatmap(fast_metrics.confusion_frame(self.scores), annot=True)
         plt.show()
 
+    def roc_plot(self):
+
+        curves.plot(curves.cache.get(self.mlp,self.x_test,self.y_test),"MLP")
+
     
\ No newline at end of file
@@ -0,0 +1,134 @@
+import os,json,pickle,threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import bundle,forest_export
+
+RECENT=os.path.join(os.path.expanduser("~"),".ml_for_everybody","recent_models.json")
+
+
+def file_key(path):
+
+    # a rewritten file gets a new size or mtime, so stale entries never match
+    st=os.stat(path)
+    return (os.path.realpath(path),st.st_size,st.st_mtime_ns)
+
+
+def load(path):
+
+    # the model plus everything pre_trained shows about it, computed once
+    if path.endswith(".mlb"):
+        b=bundle.open_bundle(path)
+        meta=b.meta
+        details=str(b.model)+"\n\nbundle v{} saved {}\nsklearn {}, python {}".format(meta['version'],meta['created'],meta['sklearn'],meta['python'])
+        return {'model':b.model,'details':details,'actions':meta['info'].get('actions',''),'columns':meta['schema'].get('columns')}
+    if path.endswith(".forest"):
+        model=forest_export.load(path)
+    else:
+        with open(path,'rb') as f:
+            model=pickle.load(f)
+    sidecar=os.path.splitext(path)[0]+".txt"
+    actions=open(sidecar).read() if os.path.exists(sidecar) else ""
+    return {'model':model,'details':str(model),'actions':actions,'columns':None}
+
+
+class model_cache:
+
+    # Loaded models by (path, size, mtime), least recently used first out
+    # once the files behind them pass max_bytes. A load already running,
+    # e.g. a background warm-up, is joined rather than repeated.
+    def __init__(self,max_bytes=2*2**30):
+
+        self.max_bytes=max_bytes
+        self.entries=OrderedDict()
+        self.sizes={}
+        self.total=0
+        self.hits=0
+        self.misses=0
+        self.loading={}
+        self.lock=threading.Lock()
+        self.pool=ThreadPoolExecutor(max_workers=1)
+
+    def get(self,path):
+
+        key=file_key(path)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits+=1
+                return self.entries[key]
+            self.misses+=1
+            future=self.loading.get(key)
+        if future is not None:
+            return future.result()
+        return self._load(key,path)
+
+    def _load(self,key,path):
+
+        entry=load(path)
+        with self.lock:
+            self._keep(key,entry)
+        return entry
+
+    def _keep(self,key,entry):
+
+        for old in [k for k in self.entries if k[0]==key[0] and k!=key]:
+            del self.entries[old]
+            self.total-=self.sizes.pop(old)
+        if key[1]>self.max_bytes:
+            return
+        self.total+=key[1]-self.sizes.get(key,0)
+        self.entries[key]=entry
+        self.entries.move_to_end(key)
+        self.sizes[key]=key[1]
+        while self.total>self.max_bytes:
+            old,_=self.entries.popitem(last=False)
+            self.total-=self.sizes.pop(old)
+
+    def warm(self,paths):
+
+        # loads in the background, one file at a time, most recent first
+        for path in paths:
+            try:
+                key=file_key(path)
+            except OSError:
+                continue
+            with self.lock:
+                if key in self.entries or key in self.loading:
+                    continue
+                self.loading[key]=self.pool.submit(self._warm,key,path)
+
+    def _warm(self,key,path):
+
+        try:
+            return self._load(key,path)
+        finally:
+            with self.lock:
+                self.loading.pop(key,None)
+
+    def status(self):
+
+        return "model cache: {}/{} hits, {} models, {:.0f} MB".format(self.hits,self.hits+self.misses,len(self.entries),self.total/2**20)
+
+
+cache=model_cache()
+
+
+def recent(limit=8):
+
+    try:
+        with open(RECENT) as f:
+            paths=json.load(f)
+    except (OSError,ValueError):
+        return []
+    return [p for p in paths if os.path.exists(p)][:limit]
+
+
+def remember(path,limit=8):
+
+    paths=[os.path.abspath(path)]+[p for p in recent(limit) if p!=os.path.abspath(path)]
+    try:
+        os.makedirs(os.path.dirname(RECENT),exist_ok=True)
+        with open(RECENT,'w') as f:
+            json.dump(paths[:limit],f)
+    except OSError:
+        pass
@@ -0,0 +1,127 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from sklearn.naive_bayes import GaussianNB
+import streaming
+
+
+class class_stats:
+
+    # Per-class row counts, feature means and sums of squared deviations.
+    # Two sets merge exactly, class by class, with the same pairwise update
+    # as lstsq_stream.moments.
+    def __init__(self,classes,count,mean,m2):
+
+        self.classes=np.asarray(classes)
+        self.count=np.asarray(count,dtype=np.float64)
+        self.mean=np.asarray(mean,dtype=np.float64)
+        self.m2=np.asarray(m2,dtype=np.float64)
+
+    @classmethod
+    def of(cls,x,y):
+
+        x=np.asarray(x,dtype=np.float64)
+        classes,codes=np.unique(np.asarray(y),return_inverse=True)
+        count=np.bincount(codes,minlength=len(classes)).astype(np.float64)
+        total=np.zeros((len(classes),x.shape[1]))
+        np.add.at(total,codes,x)
+        mean=total/count[:,None]
+        m2=np.zeros_like(total)
+        np.add.at(m2,codes,(x-mean[codes])**2)
+        return cls(classes,count,mean,m2)
+
+    @classmethod
+    def from_model(cls,model):
+
+        # a fitted GaussianNB already holds everything needed to resume
+        count=model.class_count_
+        return cls(model.classes_,count,model.theta_,(model.var_-model.epsilon_)*count[:,None])
+
+    def merge(self,other):
+
+        classes=np.union1d(self.classes,other.classes)
+        p=self.mean.shape[1]
+        count=np.zeros(len(classes))
+        mean=np.zeros((len(classes),p))
+        m2=np.zeros((len(classes),p))
+        for s in (self,other):
+            i=np.searchsorted(classes,s.classes)
+            n=count[i]+s.count
+            delta=s.mean-mean[i]
+            m2[i]+=s.m2+delta**2*(count[i]*s.count/n)[:,None]
+            mean[i]+=delta*(s.count/n)[:,None]
+            count[i]=n
+        self.classes,self.count,self.mean,self.m2=classes,count,mean,m2
+        return self
+
+    def to_model(self,var_smoothing=1e-9,priors=None):
+
+        n=self.count.sum()
+        # total variance per feature, as GaussianNB uses it for epsilon_
+        grand=(self.count[:,None]*self.mean).sum(axis=0)/n
+        total_var=(self.m2.sum(axis=0)+(self.count[:,None]*(self.mean-grand)**2).sum(axis=0))/n
+        model=GaussianNB(priors=priors,var_smoothing=var_smoothing)
+        model.classes_=self.classes
+        model.class_count_=self.count.copy()
+        model.class_prior_=np.asarray(priors,dtype=np.float64) if priors is not None else self.count/n
+        model.theta_=self.mean.copy()
+        model.epsilon_=var_smoothing*total_var.max()
+        model.var_=self.m2/self.count[:,None]+model.epsilon_
+        model.n_features_in_=self.mean.shape[1]
+        return model
+
+
+def stats(x,y,chunksize=100000,workers=None):
+
+    x=np.asarray(x)
+    y=np.asarray(y)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        parts=list(pool.map(lambda i:class_stats.of(x[i:i+chunksize],y[i:i+chunksize]),range(0,len(x),chunksize)))
+    total=parts[0]
+    for s in parts[1:]:
+        total.merge(s)
+    return total
+
+
+def csv_stats(path,columns,target,chunksize=100000,workers=None,holdout=0):
+
+    total=None
+    for s in streaming.map_chunks(class_stats.of,path,columns,target,chunksize,workers,holdout):
+        total=s if total is None else total.merge(s)
+    return total
+
+
+class parallel_gaussian_nb(GaussianNB):
+
+    def __init__(self,priors=None,var_smoothing=1e-9,chunksize=100000,n_jobs=None):
+
+        super().__init__(priors=priors,var_smoothing=var_smoothing)
+        self.chunksize=chunksize
+        self.n_jobs=n_jobs
+
+    def _install(self,s):
+
+        fitted=s.to_model(self.var_smoothing,self.priors)
+        for k in ('classes_','class_count_','class_prior_','theta_','var_','epsilon_','n_features_in_'):
+            setattr(self,k,getattr(fitted,k))
+        return self
+
+    def fit(self,x,y,sample_weight=None):
+
+        if sample_weight is not None:
+            return super().fit(x,y,sample_weight)
+        return self._install(stats(x,y,self.chunksize,self.n_jobs))
+
+    def fit_csv(self,path,columns,target,workers=None,holdout=0):
+
+        # rows streaming.held_out picks are left out, for score_csv to use
+        return self._install(csv_stats(path,columns,target,self.chunksize,workers or self.n_jobs,holdout))
+
+    def add(self,x,y):
+
+        # fold new rows into the fitted statistics, old rows are not revisited
+        return self._install(class_stats.from_model(self).merge(class_stats.of(x,y)))
+
+    def add_csv(self,path,columns,target,workers=None):
+
+        return self._install(class_stats.from_model(self).merge(csv_stats(path,columns,target,self.chunksize,workers or self.n_jobs)))
@@ -0,0 +1,187 @@
+import os,sys,time,subprocess
+import numpy as np
+import array_file
+
+# Linear, logistic and MLP models as plain weight arrays plus a predictor
+# that needs nothing but numpy, for short-lived scoring jobs where importing
+# sklearn and unpickling costs more than the predictions themselves.
+#
+#   python np_runtime.py model.pkl          export to model.npmodel and benchmark
+
+ACTIVATIONS={
+    'identity':lambda z:z,
+    'relu':lambda z:np.maximum(z,0,out=z),
+    'tanh':lambda z:np.tanh(z,out=z),
+    'logistic':lambda z:np.reciprocal(1+np.exp(-z)),
+}
+
+
+def _softmax(z):
+
+    z=z-z.max(axis=1,keepdims=True)
+    np.exp(z,out=z)
+    return z/z.sum(axis=1,keepdims=True)
+
+
+def export(model,path):
+
+    # duck-typed on the fitted attributes, so sklearn is not imported here
+    meta={'n_features':int(model.n_features_in_)}
+    if hasattr(model,'classes_'):
+        meta['classes']=model.classes_.tolist()
+    if hasattr(model,'coefs_'):
+        meta.update(kind='mlp',activation=model.activation,out_activation=model.out_activation_,layers=len(model.coefs_))
+        arrays={}
+        for i,(w,b) in enumerate(zip(model.coefs_,model.intercepts_)):
+            arrays['w{}'.format(i)]=w
+            arrays['b{}'.format(i)]=b
+    elif hasattr(model,'classes_'):
+        # SGDClassifier (it has a loss) normalises one-vs-rest like liblinear
+        ovr=getattr(model,'multi_class','auto')=='ovr' or getattr(model,'solver','')=='liblinear' or hasattr(model,'loss')
+        meta.update(kind='logistic',multi='ovr' if ovr else 'softmax')
+        arrays={'coef':np.atleast_2d(model.coef_),'intercept':np.atleast_1d(model.intercept_)}
+    else:
+        meta.update(kind='linear',outputs=int(np.ndim(model.coef_)==2))
+        arrays={'coef':np.atleast_2d(model.coef_),'intercept':np.atleast_1d(np.asarray(model.intercept_,dtype=np.float64))}
+    array_file.save(path,arrays,meta)
+
+
+class np_model:
+
+    def __init__(self,arrays,meta,batch=65536):
+
+        # weights are small, copied once to float32 so every matmul stays float32
+        self.meta=meta
+        self.kind=meta['kind']
+        self.batch=batch
+        self.classes_=np.array(meta['classes']) if 'classes' in meta else None
+        if self.kind=='mlp':
+            self.layers=[(np.asarray(arrays['w{}'.format(i)],dtype=np.float32),np.asarray(arrays['b{}'.format(i)],dtype=np.float32)) for i in range(meta['layers'])]
+        else:
+            self.coef=np.ascontiguousarray(np.asarray(arrays['coef'],dtype=np.float32).T)
+            self.intercept=np.asarray(arrays['intercept'],dtype=np.float32)
+
+    def __repr__(self):
+
+        return "np_model({}, {} features)".format(self.kind,self.meta['n_features'])
+
+    def _raw(self,x):
+
+        if self.kind!='mlp':
+            return x@self.coef+self.intercept
+        hidden=ACTIVATIONS[self.meta['activation']]
+        for w,b in self.layers[:-1]:
+            x=hidden(x@w+b)
+        w,b=self.layers[-1]
+        return x@w+b
+
+    def _scores(self,x):
+
+        z=self._raw(x)
+        if self.kind=='linear':
+            return z if self.meta['outputs'] else z[:,0]
+        out=self.meta.get('out_activation','logistic' if z.shape[1]==1 or self.meta.get('multi')=='ovr' else 'softmax')
+        if out=='softmax':
+            return _softmax(z)
+        if out in ('identity','exp'):
+            # exp is the output of a Poisson-loss MLPRegressor
+            z=np.exp(z) if out=='exp' else z
+            return z if z.shape[1]>1 else z[:,0]
+        p=ACTIVATIONS['logistic'](z)
+        if p.shape[1]==1:
+            return np.hstack([1-p,p])
+        return p/p.sum(axis=1,keepdims=True)
+
+    def _batched(self,x,func):
+
+        x=np.asarray(x,dtype=np.float32)
+        if x.ndim==1:
+            x=x.reshape(1,-1)
+        return np.concatenate([func(x[i:i+self.batch]) for i in range(0,len(x),self.batch)]) if len(x) else func(x)
+
+    def predict_proba(self,x):
+
+        return self._batched(x,self._scores)
+
+    def predict(self,x):
+
+        s=self.predict_proba(x)
+        if self.classes_ is None:
+            return s
+        return self.classes_[s.argmax(axis=1)]
+
+
+def load(path,batch=65536):
+
+    arrays,meta=array_file.load(path)
+    return np_model(arrays,meta,batch)
+
+
+def check(model,runtime,x,rtol=1e-3,atol=1e-4):
+
+    # float32 inference against the float64 original; labels must agree
+    # wherever the original is not on a near-tie
+    x=np.asarray(x)
+    if runtime.classes_ is not None and not hasattr(model,'predict_proba'):
+        # margin classifiers (e.g. hinge SGD) only have labels to compare
+        if not (runtime.predict(x)==model.predict(x)).all():
+            raise ValueError("numpy runtime predicts different labels")
+        return 0.0
+    if runtime.classes_ is None:
+        ref=np.asarray(model.predict(x),dtype=np.float64)
+        got=runtime.predict(x)
+    else:
+        ref=model.predict_proba(x)
+        got=runtime.predict_proba(x)
+    err=float(np.max(np.abs(got-ref))) if ref.size else 0.0
+    if not np.allclose(got,ref,rtol=rtol,atol=atol):
+        raise ValueError("numpy runtime differs from the model by up to {:.3g}".format(err))
+    return err
+
+
+def export_checked(model,path,x):
+
+    # a file that does not reproduce the model is removed, not left behind
+    export(model,path)
+    try:
+        return check(model,load(path),x)
+    except ValueError as e:
+        os.remove(path)
+        raise ValueError("{}, {} not written".format(e,os.path.basename(path)))
+
+
+def _timed(code):
+
+    start=time.perf_counter()
+    subprocess.run([sys.executable,"-c",code],check=True,cwd=os.path.dirname(os.path.abspath(__file__)))
+    return time.perf_counter()-start
+
+
+def benchmark(pickle_path,np_path,rows=200000,repeat=3):
+
+    # cold start: a fresh interpreter that loads the model and predicts one
+    # row; throughput: warm predictions on float32 rows
+    import pickle
+    with open(pickle_path,'rb') as f:
+        model=pickle.load(f)
+    runtime=load(np_path)
+    x=np.random.RandomState(0).standard_normal((rows,runtime.meta['n_features'])).astype(np.float32)
+    one="[[0.0]*{}]".format(runtime.meta['n_features'])
+    out={'cold_sklearn_s':min(_timed("import pickle;m=pickle.load(open({!r},'rb'));m.predict({})".format(os.path.abspath(pickle_path),one)) for _ in range(repeat)),
+        'cold_numpy_s':min(_timed("import np_runtime;np_runtime.load({!r}).predict({})".format(os.path.abspath(np_path),one)) for _ in range(repeat))}
+    for name,m in (('sklearn',model),('numpy',runtime)):
+        start=time.perf_counter()
+        m.predict(x)
+        out['rows_per_s_'+name]=rows/(time.perf_counter()-start)
+    out['max_abs_diff']=check(model,runtime,x[:10000])
+    return out
+
+
+if __name__=="__main__":
+    import pickle
+    src=sys.argv[1]
+    dst=os.path.splitext(src)[0]+".npmodel"
+    with open(src,'rb') as f:
+        export(pickle.load(f),dst)
+    for k,v in benchmark(src,dst).items():
+        print("{:>18} {:.4g}".format(k,v))
@@ -31,4 +31,29 @@ class plot_boundary:
 		plt.show()
 		#self.plot_classifier_decision(x1,x2,y,mode='line')
 	
-	
\ No newline at end of file
+	
+
+def decision_regions(model,x,y,columns,x_col,y_col,sample=2000,grid=100,seed=0):
+
+	# The model is evaluated on a grid x grid mesh over two features, with the
+	# other features held at their median, and only a subsample is scattered.
+	x=x if hasattr(x,'toarray') else np.asarray(x)
+	y=np.asarray(y)
+	i,j=columns.index(x_col),columns.index(y_col)
+	if len(y)>sample:
+		rows=np.random.RandomState(seed).choice(len(y),sample,replace=False)
+		x,y=x[rows],y[rows]
+	# a CSR split is densified only for the sampled rows
+	x=x.toarray() if hasattr(x,'toarray') else x
+	xx,yy=np.meshgrid(np.linspace(x[:,i].min(),x[:,i].max(),grid),np.linspace(x[:,j].min(),x[:,j].max(),grid))
+	mesh=np.tile(np.median(x,axis=0),(xx.size,1))
+	mesh[:,i]=xx.ravel()
+	mesh[:,j]=yy.ravel()
+	classes=np.unique(y)
+	z=np.searchsorted(classes,model.predict(mesh)).reshape(xx.shape)
+	plt.figure()
+	plt.contourf(xx,yy,z,alpha=0.3,levels=np.arange(len(classes)+1)-0.5)
+	plt.scatter(x[:,i],x[:,j],c=np.searchsorted(classes,y),s=15,edgecolor='k')
+	plt.xlabel(x_col)
+	plt.ylabel(y_col)
+	plt.show()
@@ -1,13 +1,12 @@
 
 from PyQt5.QtWidgets import *
 import sys,os,re,pickle
-import data_visualise,common
+import data_visualise,common,fast_metrics,streaming,model_cache
 
 from PyQt5 import uic, QtWidgets ,QtCore, QtGui
 
 from sklearn.model_selection import train_test_split
 from sklearn.neural_network import MLPClassifier
-from sklearn import metrics
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
@@ -32,6 +31,8 @@ class UI(QMainWindow):
 
         self.conf_mat.clicked.connect(self.conf_matrix)
         self.test.clicked.connect(self.test_model)
+        self.test_file.clicked.connect(self.test_csv)
+        self.chunk_size.setText("100000")
         self.setvalue()
         self.show()
 
@@ -41,36 +42,50 @@ class UI(QMainWindow):
         self.columns.addItems(self.column_list)
         self.data_shape.setText(str(self.df.shape))
         
-        original=sys.stdout
-        sys.stdout = open('summary.txt', 'w')
-        print(self.model)
-        sys.stdout=original
-        text=open('summary.txt').read()
-        self.model_details.setPlainText(text)
-        os.remove('summary.txt')
-
-        x=self.path.split(".")
-        
-        text=open(x[0]+".txt").read()
-        self.user_actions.setPlainText(text)
-        
+        # summary and log come with the cached model, nothing is re-read
+        entry=model_cache.cache.get(self.path)
+        expected=entry['columns']
+        if expected and expected!=[str(c) for c in self.column_list]:
+            self.statusBar().showMessage("columns differ from the ones the model was trained on: "+", ".join(expected))
+        self.model_details.setPlainText(entry['details'])
+        self.user_actions.setPlainText(entry['actions'])
 
 
     def conf_matrix(self):
 
-        data = {'y_Actual':self.X[self.target_value],'y_Predicted':self.pre }
-        df = pd.DataFrame(data, columns=['y_Actual','y_Predicted'])
-        confusion_matrix = pd.crosstab(df['y_Actual'], df['y_Predicted'], rownames=['Actual'], colnames=['Predicted'])
         plt.figure()
-        sns.heatmap(confusion_matrix, annot=True)
+        sns.heatmap(fast_metrics.confusion_frame(self.scores), annot=True)
         plt.show()
 
     def test_model(self):
 
-        
-        self.pre=self.model.predict(self.df)
-        self.mae.setText(str(metrics.mean_absolute_error(self.X[self.target_value],self.pre)))
-        self.mse.setText(str(metrics.mean_squared_error(self.X[self.target_value],self.pre)))
-        self.rmse.setText(str(np.sqrt(metrics.mean_squared_error(self.X[self.target_value],self.pre))))
-        self.accuracy.setText(str(metrics.accuracy_score(self.X[self.target_value],self.pre)))
-    
\ No newline at end of file
+        # scored chunk by chunk, so only one chunk of predictions per worker
+        # is alive at a time
+        self.show_scores(streaming.score_array(self.model,self.df,self.X[self.target_value].values,int(self.chunk_size.text())))
+
+    def test_csv(self):
+
+        # an evaluation file with the same columns, too big to load, is
+        # parsed and scored by worker processes and only the merged
+        # accumulators come back
+        path,_=QtWidgets.QFileDialog.getOpenFileName(self,'Open file','',"csv(*.csv)")
+        if path=="":
+            return
+        self.statusBar().showMessage("scoring "+os.path.basename(path))
+        QApplication.processEvents()
+        try:
+            scores=streaming.score_csv(self.model,path,self.column_list,self.target_value,int(self.chunk_size.text()))
+        except (KeyError,ValueError) as e:
+            self.statusBar().showMessage("could not score the file: {}".format(e))
+            return
+        self.show_scores(scores)
+
+    def show_scores(self,scores):
+
+        self.scores=scores.results()
+        self.mae.setText(str(self.scores.get('mae','')))
+        self.mse.setText(str(self.scores.get('mse','')))
+        self.rmse.setText(str(self.scores.get('rmse','')))
+        self.accuracy.setText(str(self.scores.get('accuracy','')))
+        self.auc.setText(str(self.scores.get('auc','')))
+        self.statusBar().showMessage("scored {} rows".format(self.scores['rows']))
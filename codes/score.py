@@ -0,0 +1,199 @@
+import os,sys,time,pickle,argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import data_visualise,streaming,forest_export,bundle,np_runtime
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pq=None
+
+# Scores CSV files with a model saved from one of the training windows:
+#
+#   python score.py model.pkl day1.csv day2.csv -o predictions.parquet
+#
+# The preprocessing saved with the model (inside a .mlb bundle, or in
+# model.pipeline next to a .pkl) is replayed on every chunk before predicting.
+
+data=data_visualise.data_()
+
+
+def load(model_path,pipeline_path=None):
+
+    # the model and the preprocessing to replay before it; a bundle carries
+    # both, the older formats keep the steps in a .pipeline file beside them
+    if model_path.endswith(".mlb"):
+        b=bundle.open_bundle(model_path)
+        return b.model,b.steps
+    if pipeline_path is None:
+        pipeline_path=os.path.splitext(model_path)[0]+".pipeline"
+    return load_model(model_path),load_pipeline(pipeline_path)
+
+
+def load_model(path):
+
+    if path.endswith(".mlb"):
+        return bundle.open_bundle(path).model
+    if path.endswith(".forest"):
+        return forest_export.load(path)
+    if path.endswith(".npmodel"):
+        return np_runtime.load(path)
+    with open(path,'rb') as f:
+        return pickle.load(f)
+
+
+def load_pipeline(path):
+
+    if path is None or not os.path.exists(path):
+        return []
+    with open(path,'rb') as f:
+        return pickle.load(f)
+
+
+def target_of(steps):
+
+    names=[column for kind,column,state in steps if kind=='target']
+    return names[-1] if names else None
+
+
+def predict_frame(model,steps,df):
+
+    # raw rows in, predictions out, in the original label space when the
+    # target was label-encoded before training
+    df=data.replay(df,steps)
+    target=target_of(steps)
+    x=df.drop(target,axis=1) if target in df.columns else df
+    if hasattr(model,'feature_names_in_'):
+        pre=model.predict(x[list(model.feature_names_in_)])
+    else:
+        pre=model.predict(x.values)
+    labels=[state for kind,column,state in steps if kind=='label' and column==target]
+    if labels and np.issubdtype(np.asarray(pre).dtype,np.number):
+        pre=np.asarray(labels[-1],dtype=object)[np.asarray(pre).astype(np.int64)]
+    return pre
+
+
+_model=None
+_steps=None
+
+
+def _init(model_path,pipeline_path):
+
+    # every worker loads the model once, tasks only carry file offsets
+    global _model,_steps
+    _model,_steps=load(model_path,pipeline_path)
+
+
+def _score(path,names,chunksize,keep,offset):
+
+    with open(path,'rb') as f:
+        f.seek(offset)
+        chunk=pd.read_csv(f,header=None,names=names,nrows=chunksize)
+    out=chunk[list(keep)].reset_index(drop=True)
+    out['prediction']=predict_frame(_model,_steps,chunk)
+    return out
+
+
+class csv_writer:
+
+    def __init__(self,path):
+
+        self.f=open(path,'w',newline='')
+        self.header=True
+
+    def write(self,frame):
+
+        frame.to_csv(self.f,header=self.header,index=False)
+        self.header=False
+
+    def close(self):
+
+        self.f.close()
+
+
+class parquet_writer:
+
+    # one row group per chunk, the schema is taken from the first chunk
+    def __init__(self,path):
+
+        if pq is None:
+            raise RuntimeError("parquet output needs pyarrow (pip install pyarrow)")
+        self.path=path
+        self.writer=None
+
+    def write(self,frame):
+
+        table=pyarrow.Table.from_pandas(frame,preserve_index=False)
+        if self.writer is None:
+            self.writer=pq.ParquetWriter(self.path,table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+
+        if self.writer is not None:
+            self.writer.close()
+
+
+def writer_for(path):
+
+    return parquet_writer(path) if path.endswith(".parquet") else csv_writer(path)
+
+
+def score_files(model_path,inputs,output,pipeline_path=None,chunksize=100000,workers=None,keep=(),callback=None):
+
+    # chunks are scored out of order by the pool but written in order, with
+    # at most two chunks per worker in flight so memory stays bounded
+    workers=workers or os.cpu_count()
+    out=writer_for(output)
+    rows=0
+    start=time.perf_counter()
+
+    def flush(future):
+        nonlocal rows
+        frame=future.result()
+        out.write(frame)
+        rows+=len(frame)
+        if callback:
+            callback(rows,time.perf_counter()-start)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers,initializer=_init,initargs=(model_path,pipeline_path)) as pool:
+            for path in inputs:
+                names,offsets=streaming.chunk_offsets(path,chunksize)
+                pending=deque()
+                for offset in offsets:
+                    pending.append(pool.submit(_score,path,names,chunksize,keep,offset))
+                    if len(pending)>=2*workers:
+                        flush(pending.popleft())
+                while pending:
+                    flush(pending.popleft())
+    finally:
+        out.close()
+    return rows,time.perf_counter()-start
+
+
+def main(argv=None):
+
+    parser=argparse.ArgumentParser(description="Score CSV files with a saved model, chunk by chunk.")
+    parser.add_argument('model',help="model saved from a training window (.mlb, .pkl, .forest or .npmodel)")
+    parser.add_argument('inputs',nargs='+',help="CSV files with the training columns")
+    parser.add_argument('-o','--output',required=True,help="predictions file, .csv or .parquet")
+    parser.add_argument('--pipeline',help="recorded preprocessing for a .pkl model, defaults to the model name with .pipeline")
+    parser.add_argument('--chunksize',type=int,default=100000)
+    parser.add_argument('--workers',type=int,default=None)
+    parser.add_argument('--keep',nargs='*',default=[],help="input columns copied next to the prediction, e.g. an id")
+    args=parser.parse_args(argv)
+
+    def progress(rows,seconds):
+        sys.stderr.write("\r{} rows, {:.0f} rows/s".format(rows,rows/max(seconds,1e-9)))
+        sys.stderr.flush()
+
+    rows,seconds=score_files(args.model,args.inputs,args.output,args.pipeline,args.chunksize,args.workers,args.keep,progress)
+    sys.stderr.write("\rscored {} rows in {:.1f}s, {:.0f} rows/s\n".format(rows,seconds,rows/max(seconds,1e-9)))
+
+
+if __name__=="__main__":
+    main()
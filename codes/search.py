@@ -0,0 +1,203 @@
+import os,time,math,random,itertools,ast
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor,wait,FIRST_COMPLETED
+import numpy as np
+from scipy import sparse
+from threadpoolctl import threadpool_limits
+import shared_data,fit_cache
+from fit_cache import fingerprint
+from sklearn import metrics
+from sklearn.base import is_classifier
+
+# finished candidates, keyed by data fingerprint, estimator, params and row
+# budget; least recently used results go first once the cache is full
+results_cache=fit_cache.fit_cache(max_bytes=8*2**20)
+
+_worker={}
+
+
+def parse_space(text):
+
+    # "n_neighbors=3|5|7; weights=uniform|distance"
+    space={}
+    for part in text.split(';'):
+        if '=' not in part:
+            continue
+        key,values=part.split('=',1)
+        space[key.strip()]=[_value(v) for v in values.split('|') if v.strip()!='']
+    return space
+
+
+def _value(text):
+
+    text=text.strip()
+    try:
+        return ast.literal_eval(text)
+    except (ValueError,SyntaxError):
+        return text
+
+
+def _freeze(params):
+
+    return tuple(sorted((k,repr(v)) for k,v in params.items()))
+
+
+def candidates(space,strategy,n_iter=20,seed=0):
+
+    keys=list(space)
+    grid=[dict(zip(keys,values)) for values in itertools.product(*[space[k] for k in keys])]
+    if strategy=='random' and len(grid)>n_iter:
+        grid=random.Random(seed).sample(grid,n_iter)
+    return grid
+
+
+def _init(paths,val_fraction,seed):
+
+    # the pool already keeps every core busy, one BLAS/OpenMP thread each
+    # stops the workers from oversubscribing them
+    threadpool_limits(1)
+    _worker.update(shared_data.load(paths))
+    order=np.random.RandomState(seed).permutation(len(_worker['y']))
+    n_val=max(1,int(len(order)*val_fraction))
+    _worker['fit'],_worker['val']=order[n_val:],order[:n_val]
+
+
+def _score(model,x,y):
+
+    pre=model.predict(x)
+    if is_classifier(model):
+        return metrics.accuracy_score(y,pre)
+    return -metrics.mean_absolute_error(y,pre)
+
+
+def _evaluate(estimator,params,n_rows):
+
+    start=time.time()
+    try:
+        x,y,fit,val=_worker['x'],_worker['y'],_worker['fit'][:n_rows],_worker['val']
+        model=estimator(**params)
+        if 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=1)
+        model.fit(x[fit],y[fit])
+        score=_score(model,x[val],y[val])
+        error=""
+    except Exception as e:
+        score,error=-np.inf,str(e)
+    return {'score':score,'fit_time':time.time()-start,'rows':n_rows,'error':error}
+
+
+class search_run:
+
+    def __init__(self,estimator,x,y,base=None,budget=None,workers=None,val_fraction=0.2,seed=0,callback=None):
+
+        self.estimator=estimator
+        self.base=base or {}
+        x=x if sparse.issparse(x) else np.asarray(x)
+        y=np.asarray(y)
+        if is_classifier(estimator(**self.base)):
+            # classifiers score accuracy, which is the same on label codes
+            y=shared_data.encode_labels(y)[1]
+        self.key=fingerprint(x,y,val_fraction,seed)
+        self.n_rows=len(y)-max(1,int(len(y)*val_fraction))
+        self.deadline=time.time()+budget if budget else math.inf
+        self.workers=workers or os.cpu_count()
+        self.callback=callback
+        self.board=[]
+        self.shared=shared_data.shared_arrays(x=x,y=y)
+        # spawned, not forked: the windows start searches from a worker thread
+        self.pool=ProcessPoolExecutor(max_workers=self.workers,mp_context=mp.get_context('spawn'),initializer=_init,initargs=(self.shared.paths,val_fraction,seed))
+
+    def _record(self,params,result):
+
+        self.board.append(dict(result,params=params))
+        self.board.sort(key=lambda r:(r['rows'],r['score']),reverse=True)
+        if self.callback:
+            # a copy, the callback may run on another thread while this sorts
+            self.callback(list(self.board))
+
+    def evaluate(self,params_list,n_rows):
+
+        todo=list(params_list)
+        pending={}
+        done=[]
+        while todo or pending:
+            while todo and len(pending)<2*self.workers and time.time()<self.deadline:
+                params=todo.pop(0)
+                ck=(self.key,self.estimator.__name__,_freeze({**self.base,**params}),n_rows)
+                cached=results_cache.get(ck)
+                if cached is not None:
+                    done.append((params,cached))
+                    self._record(params,cached)
+                    continue
+                pending[self.pool.submit(_evaluate,self.estimator,{**self.base,**params},n_rows)]=(ck,params)
+            if not pending:
+                break
+            # no budget means no deadline; wait() cannot take an infinite timeout
+            timeout=None if self.deadline==math.inf else max(0,self.deadline-time.time())
+            finished,_=wait(pending,timeout=timeout,return_when=FIRST_COMPLETED)
+            if not finished:
+                break
+            for f in finished:
+                ck,params=pending.pop(f)
+                result=f.result()
+                if not result['error']:
+                    results_cache.put(ck,result)
+                done.append((params,result))
+                self._record(params,result)
+        for f in pending:
+            f.cancel()
+        return done
+
+    def grid(self,params_list):
+
+        self.evaluate(params_list,self.n_rows)
+
+    def halving(self,params_list,eta=3,min_rows=30):
+
+        rounds=max(1,math.ceil(math.log(max(len(params_list),1),eta)))
+        for i in range(rounds):
+            n_rows=max(min(min_rows,self.n_rows),self.n_rows//eta**(rounds-1-i))
+            done=self.evaluate(params_list,n_rows)
+            if not done or time.time()>=self.deadline:
+                break
+            done.sort(key=lambda d:d[1]['score'],reverse=True)
+            params_list=[p for p,_ in done[:max(1,math.ceil(len(done)/eta))]]
+
+    def close(self):
+
+        self.pool.shutdown(wait=False,cancel_futures=True)
+        self.shared.close()
+
+
+def run(estimator,space,x,y,strategy='grid',base=None,budget=None,n_iter=20,callback=None,errors=None):
+
+    # failed candidates are left off the returned board; pass a list as
+    # errors to get their distinct messages
+
+    params_list=candidates(space,strategy,n_iter)
+    s=search_run(estimator,x,y,base=base,budget=budget,callback=callback)
+    try:
+        if strategy=='halving':
+            s.halving(params_list)
+        else:
+            s.grid(params_list)
+    finally:
+        s.close()
+    if errors is not None:
+        errors.extend(sorted({r['error'] for r in s.board if r['error']}))
+    return [r for r in s.board if not r['error']]
+
+
+def best_params(board):
+
+    full=max(r['rows'] for r in board)
+    return max((r for r in board if r['rows']==full),key=lambda r:r['score'])['params']
+
+
+def format_board(board,top=15):
+
+    lines=["{:>4}  {:>10}  {:>8}  {:>7}  {}".format("rank","score","fit(s)","rows","params")]
+    for i,r in enumerate(board[:top]):
+        score="failed" if r['error'] else "{:.4f}".format(r['score'])
+        lines.append("{:>4}  {:>10}  {:>8.2f}  {:>7}  {}".format(i+1,score,r['fit_time'],r['rows'],r['params']))
+    return "\n".join(lines)
@@ -0,0 +1,255 @@
+import os,io,sys,time,json,asyncio,argparse
+from collections import deque
+import numpy as np
+import pandas as pd
+import score
+
+# Serves saved models over HTTP on localhost:
+#
+#   python serve.py churn=churn.pkl price.pkl --max-batch 512 --max-wait-ms 5
+#
+#   POST /predict/<name>   JSON {"rows":[{...},...]} or {"columns":[...],"data":[[...],...]}
+#                          raw rows, the recorded preprocessing is replayed;
+#                          or an .npy body (Content-Type application/x-npy)
+#                          of already prepared feature rows
+#   GET  /models           loaded model names
+#   GET  /stats            per-model latency percentiles and throughput
+#
+# Requests that arrive close together are joined into one batch and
+# predicted with a single vectorised call.
+
+
+class stats:
+
+    def __init__(self,window=10000):
+
+        self.requests=0
+        self.rows=0
+        self.batches=0
+        self.latency=deque(maxlen=window)
+        self.start=time.perf_counter()
+
+    def add_batch(self,rows):
+
+        self.batches+=1
+        self.rows+=rows
+
+    def add_request(self,seconds):
+
+        self.requests+=1
+        self.latency.append(seconds)
+
+    def summary(self):
+
+        lat=np.asarray(self.latency)*1000
+        elapsed=time.perf_counter()-self.start
+        return {'requests':self.requests,'rows':self.rows,'batches':self.batches,
+            'mean_batch_rows':self.rows/self.batches if self.batches else 0,
+            'p50_ms':float(np.percentile(lat,50)) if len(lat) else None,
+            'p99_ms':float(np.percentile(lat,99)) if len(lat) else None,
+            'rows_per_s':self.rows/elapsed if elapsed else 0}
+
+
+class batcher:
+
+    # One queue per model and payload kind. The first request opens a batch,
+    # which is closed when max_batch rows are waiting or max_wait has passed,
+    # whichever comes first; prediction runs on a thread so the event loop
+    # keeps accepting requests meanwhile.
+    def __init__(self,predict,join,size,split,max_batch=256,max_wait=0.005,counters=None):
+
+        self.predict=predict
+        self.join=join
+        self.size=size
+        self.split=split
+        self.max_batch=max_batch
+        self.max_wait=max_wait
+        self.counters=counters
+        self.queue=asyncio.Queue()
+        self.task=asyncio.get_running_loop().create_task(self.run())
+
+    async def submit(self,payload):
+
+        future=asyncio.get_running_loop().create_future()
+        await self.queue.put((payload,future))
+        return await future
+
+    async def run(self):
+
+        loop=asyncio.get_running_loop()
+        while True:
+            items=[await self.queue.get()]
+            rows=self.size(items[0][0])
+            deadline=loop.time()+self.max_wait
+            while rows<self.max_batch:
+                wait=deadline-loop.time()
+                if wait<=0:
+                    break
+                try:
+                    item=await asyncio.wait_for(self.queue.get(),wait)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                rows+=self.size(item[0])
+            try:
+                pre=await loop.run_in_executor(None,self.predict,self.join([p for p,f in items]))
+            except Exception:
+                # one bad payload must not fail its neighbours, so the batch
+                # is retried request by request
+                for p,f in items:
+                    try:
+                        part=await loop.run_in_executor(None,self.predict,p)
+                    except Exception as e:
+                        if not f.done():
+                            f.set_exception(e)
+                        continue
+                    if not f.done():
+                        f.set_result(part)
+                self.counters.add_batch(rows)
+                continue
+            self.counters.add_batch(rows)
+            for (p,f),part in zip(items,self.split(pre,[self.size(p) for p,f in items])):
+                if not f.done():
+                    f.set_result(part)
+
+
+def _split(pre,sizes):
+
+    return np.split(np.asarray(pre),np.cumsum(sizes)[:-1])
+
+
+class served_model:
+
+    def __init__(self,path,max_batch,max_wait):
+
+        self.model,self.steps=score.load(path)
+        self.counters=stats()
+        self.frames=batcher(lambda df:score.predict_frame(self.model,self.steps,df),
+            lambda parts:pd.concat(parts,ignore_index=True),len,_split,max_batch,max_wait,self.counters)
+        self.arrays=batcher(self.model.predict,np.vstack,len,_split,max_batch,max_wait,self.counters)
+
+
+def parse_rows(body,content_type):
+
+    if content_type.startswith('application/x-npy'):
+        x=np.load(io.BytesIO(body),allow_pickle=False)
+        return 'array',x.reshape(1,-1) if x.ndim==1 else x
+    payload=json.loads(body)
+    if 'rows' in payload:
+        return 'frame',pd.DataFrame(payload['rows'])
+    return 'frame',pd.DataFrame(payload['data'],columns=payload['columns'])
+
+
+def _native(v):
+
+    # numpy scalars, e.g. labels inside an object array
+    return v.item() if hasattr(v,'item') else str(v)
+
+
+class server:
+
+    def __init__(self,paths,max_batch=256,max_wait_ms=5.0):
+
+        self.paths=paths
+        self.max_batch=max_batch
+        self.max_wait=max_wait_ms/1000
+        self.models={}
+
+    async def handle(self,reader,writer):
+
+        # HTTP/1.1 with keep-alive, enough for local clients
+        try:
+            while True:
+                try:
+                    head=await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError,ConnectionError):
+                    break
+                lines=head.decode('latin-1').split('\r\n')
+                try:
+                    method,target,version=lines[0].split(' ',2)
+                    headers={k.strip().lower():v.strip() for k,v in (l.split(':',1) for l in lines[1:] if ':' in l)}
+                    length=int(headers.get('content-length',0))
+                    if length<0:
+                        raise ValueError("negative Content-Length")
+                except ValueError as e:
+                    # past a malformed head the stream cannot be trusted, so
+                    # answer and close
+                    await self.send(writer,*self.json(400,{'error':"malformed request: {}".format(e)}))
+                    break
+                body=await reader.readexactly(length)
+                await self.send(writer,*await self.route(method,target,headers,body))
+                if headers.get('connection','').lower()=='close' or version=='HTTP/1.0':
+                    break
+        finally:
+            writer.close()
+
+    async def send(self,writer,status,content_type,out):
+
+        writer.write("HTTP/1.1 {}\r\nContent-Type: {}\r\nContent-Length: {}\r\n\r\n".format(status,content_type,len(out)).encode('latin-1')+out)
+        await writer.drain()
+
+    async def route(self,method,target,headers,body):
+
+        start=time.perf_counter()
+        path=target.split('?',1)[0].rstrip('/')
+        if method=='GET' and path=='/models':
+            return self.json(200,{'models':sorted(self.models)})
+        if method=='GET' and path=='/stats':
+            return self.json(200,{name:m.counters.summary() for name,m in self.models.items()})
+        if method=='POST' and path.startswith('/predict/'):
+            m=self.models.get(path[len('/predict/'):])
+            if m is None:
+                return self.json(404,{'error':'unknown model'})
+            try:
+                kind,rows=parse_rows(body,headers.get('content-type',''))
+                pre=await (m.arrays if kind=='array' else m.frames).submit(rows)
+            except (ValueError,KeyError,TypeError) as e:
+                return self.json(400,{'error':str(e)})
+            except Exception as e:
+                return self.json(500,{'error':str(e)})
+            m.counters.add_request(time.perf_counter()-start)
+            if headers.get('accept','').startswith('application/x-npy') and np.asarray(pre).dtype!=object:
+                buf=io.BytesIO()
+                np.save(buf,np.asarray(pre))
+                return "200 OK",'application/x-npy',buf.getvalue()
+            return self.json(200,{'predictions':np.asarray(pre).tolist()})
+        return self.json(404,{'error':'not found'})
+
+    def json(self,code,payload):
+
+        status={200:"200 OK",400:"400 Bad Request",404:"404 Not Found",500:"500 Internal Server Error"}[code]
+        return status,'application/json',json.dumps(payload,default=_native).encode()
+
+    async def start(self,port=8765):
+
+        # models are loaded inside the loop so their batchers can attach to it
+        for name,path in self.paths.items():
+            self.models[name]=served_model(path,self.max_batch,self.max_wait)
+        # bound to the loopback interface only
+        return await asyncio.start_server(self.handle,'127.0.0.1',port)
+
+
+def main(argv=None):
+
+    parser=argparse.ArgumentParser(description="Serve saved models on localhost with micro-batching.")
+    parser.add_argument('models',nargs='+',help="model files, optionally as name=path")
+    parser.add_argument('--port',type=int,default=8765)
+    parser.add_argument('--max-batch',type=int,default=256,help="rows per vectorised predict call")
+    parser.add_argument('--max-wait-ms',type=float,default=5.0,help="how long a batch waits to fill up")
+    args=parser.parse_args(argv)
+    paths={}
+    for spec in args.models:
+        name,path=spec.split('=',1) if '=' in spec else (os.path.splitext(os.path.basename(spec))[0],spec)
+        paths[name]=path
+
+    async def run():
+        srv=await server(paths,args.max_batch,args.max_wait_ms).start(args.port)
+        sys.stderr.write("serving {} on http://127.0.0.1:{}\n".format(", ".join(paths),args.port))
+        async with srv:
+            await srv.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__=="__main__":
+    main()
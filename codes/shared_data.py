@@ -0,0 +1,63 @@
+import os,shutil,tempfile
+import numpy as np
+from scipy import sparse
+
+
+def encode_labels(y):
+
+    classes,codes=np.unique(np.asarray(y),return_inverse=True)
+    return classes,codes
+
+
+class shared_arrays:
+
+    # Arrays are written once to a RAM-backed folder and every worker maps the
+    # same pages read-only instead of receiving its own pickled copy.
+    def __init__(self,**arrays):
+
+        root='/dev/shm' if os.path.isdir('/dev/shm') else None
+        self.folder=tempfile.mkdtemp(prefix='ml_shared_',dir=root)
+        self.paths={}
+        for name,a in arrays.items():
+            if sparse.issparse(a):
+                # CSR goes as its three arrays and is rebuilt over the maps
+                a=sparse.csr_matrix(a)
+                self.paths[name]={'shape':a.shape}
+                for part in ('data','indices','indptr'):
+                    path=os.path.join(self.folder,"{}.{}.npy".format(name,part))
+                    np.save(path,getattr(a,part),allow_pickle=False)
+                    self.paths[name][part]=path
+                continue
+            a=np.ascontiguousarray(a)
+            if a.dtype==object:
+                a=a.astype(float)
+            path=os.path.join(self.folder,name+'.npy')
+            np.save(path,a,allow_pickle=False)
+            self.paths[name]=path
+
+    def load(self):
+
+        return load(self.paths)
+
+    def close(self):
+
+        shutil.rmtree(self.folder,ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+
+def _load(path):
+
+    if isinstance(path,dict):
+        parts=[np.load(path[p],mmap_mode='r') for p in ('data','indices','indptr')]
+        return sparse.csr_matrix(tuple(parts),shape=path['shape'],copy=False)
+    return np.load(path,mmap_mode='r')
+
+
+def load(paths):
+
+    return {name:_load(path) for name,path in paths.items()}
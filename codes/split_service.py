@@ -0,0 +1,88 @@
+import weakref
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix,issparse
+from sklearn.model_selection import train_test_split,GroupShuffleSplit
+import fit_cache
+
+# splits stay alive only while some window still holds on to them
+_splits=weakref.WeakValueDictionary()
+
+
+def has_sparse(features):
+
+    return isinstance(features,pd.DataFrame) and any(isinstance(t,pd.SparseDtype) for t in features.dtypes)
+
+
+def to_csr(features,dtype='float64'):
+
+    # sparse columns hand over their stored entries, dense ones their nonzeros
+    rows,cols,vals=[],[],[]
+    for j,c in enumerate(features.columns):
+        col=features[c]
+        if isinstance(col.dtype,pd.SparseDtype) and col.sparse.fill_value==0:
+            index,values=col.array.sp_index.indices,col.array.sp_values
+        else:
+            values=np.asarray(col,dtype=dtype)
+            index=np.flatnonzero(values)
+            values=values[index]
+        rows.append(index)
+        cols.append(np.full(len(index),j))
+        vals.append(values)
+    return csr_matrix((np.concatenate(vals).astype(dtype),(np.concatenate(rows),np.concatenate(cols))),shape=features.shape)
+
+
+class data_split:
+
+    def __init__(self,features,target,test_size,random_state=0,mode='random',groups=None,dtype='float64',sparse=False):
+
+        target=np.asarray(target)
+        rows=np.arange(len(target))
+        if mode=='grouped':
+            splitter=GroupShuffleSplit(n_splits=1,test_size=test_size,random_state=random_state)
+            self.train_index,self.test_index=next(splitter.split(rows,groups=np.asarray(groups)))
+        else:
+            self.train_index,self.test_index=train_test_split(rows,test_size=test_size,random_state=random_state,stratify=target if mode=='stratified' else None)
+        self.n_train=len(self.train_index)
+        # Training rows are stored first and test rows after them in one
+        # C-contiguous matrix, so both sides of the split are slices of it.
+        order=np.concatenate([self.train_index,self.test_index])
+        # CSR only for callers that asked for it; the rest get sparse columns densified
+        if sparse and has_sparse(features):
+            self.columns=list(features.columns)
+            self.matrix=to_csr(features,dtype)[order]
+        elif isinstance(features,pd.DataFrame):
+            self.columns=list(features.columns)
+            self.matrix=np.empty((len(order),len(self.columns)),dtype=dtype)
+            for j,c in enumerate(self.columns):
+                self.matrix[:,j]=features[c].to_numpy()[order]
+        else:
+            features=np.asarray(features)
+            self.columns=None
+            self.matrix=np.ascontiguousarray(features.reshape(len(features),-1)[order],dtype=dtype)
+        self.target=target[order]
+        (self.matrix.data if issparse(self.matrix) else self.matrix).flags.writeable=False
+        self.target.flags.writeable=False
+
+    def views(self):
+
+        n=self.n_train
+        return self.matrix[:n],self.matrix[n:],self.target[:n],self.target[n:]
+
+    def nbytes(self):
+
+        if issparse(self.matrix):
+            m=self.matrix
+            return m.data.nbytes+m.indices.nbytes+m.indptr.nbytes+self.target.nbytes
+        return self.matrix.nbytes+self.target.nbytes
+
+
+def get(features,target,test_size,random_state=0,mode='random',groups=None,dtype='float64',sparse=False):
+
+    key=fit_cache.fingerprint(features,target,test_size,random_state,mode,groups if groups is None else np.asarray(groups),dtype,sparse and has_sparse(features))
+    split=_splits.get(key)
+    if split is None:
+        split=data_split(features,target,test_size,random_state,mode,groups,dtype,sparse)
+        split.key=key
+        _splits[key]=split
+    return split
@@ -0,0 +1,143 @@
+import os
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor,ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.base import is_classifier
+import fast_metrics
+
+
+def read_chunks(path,columns,target,chunksize=100000,holdout=0.1,seed=0):
+
+    # The held-out mask is drawn from a fresh generator on every pass, so a
+    # second pass over the same file sees exactly the same held-out rows.
+    rng=np.random.RandomState(seed)
+    for chunk in pd.read_csv(path,usecols=list(columns)+[target],chunksize=chunksize):
+        held=rng.random_sample(len(chunk))<holdout
+        yield chunk[list(columns)].values,chunk[target].values,held
+
+
+def chunk_offsets(path,chunksize=100000):
+
+    # byte offset of every chunksize-th data row, found with a raw line scan
+    # so that workers can seek straight to their chunk and parse only it. A
+    # line ends a row only outside quotes: a quoted field may hold newlines,
+    # and an odd number of quote characters on a line opens or closes one
+    # ("" escapes come in pairs and do not change that)
+    with open(path,'rb') as f:
+        pos=0
+        quoted=False
+        for line in f:
+            pos+=len(line)
+            quoted^=line.count(b'"')%2==1
+            if not quoted:
+                break
+        offsets=[]
+        rows=0
+        for line in f:
+            if not quoted:
+                if rows%chunksize==0:
+                    offsets.append(pos)
+                rows+=1
+            quoted^=line.count(b'"')%2==1
+            pos+=len(line)
+    return pd.read_csv(path,nrows=0).columns.tolist(),offsets
+
+
+def _read_chunk(path,names,columns,target,chunksize,offset):
+
+    with open(path,'rb') as f:
+        f.seek(offset)
+        chunk=pd.read_csv(f,header=None,names=names,usecols=list(columns)+[target],nrows=chunksize)
+    return chunk[list(columns)].values,chunk[target].values
+
+
+def held_out(offset,n,holdout):
+
+    # seeded with the chunk's byte offset, so every pass and every worker
+    # holds out the same rows of a chunk
+    return np.random.RandomState(offset%2**32).random_sample(n)<holdout
+
+
+def _apply(func,path,names,columns,target,chunksize,holdout,held,offset):
+
+    x,y=_read_chunk(path,names,columns,target,chunksize,offset)
+    if holdout:
+        rows=held_out(offset,len(y),holdout)==held
+        x,y=x[rows],y[rows]
+    return func(x,y)
+
+
+def map_chunks(func,path,columns,target,chunksize=100000,workers=None,holdout=0,held=False):
+
+    # func(x,y) runs in worker processes, one CSV chunk each, and only its
+    # (small) result travels back; func must be a picklable top-level callable.
+    # With a holdout fraction func sees the training rows of each chunk, or
+    # only the held-out ones when held is True.
+    names,offsets=chunk_offsets(path,chunksize)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        yield from pool.map(partial(_apply,func,path,names,columns,target,chunksize,holdout,held),offsets)
+
+
+def scan_classes(path,target,chunksize=100000):
+
+    classes=set()
+    for chunk in pd.read_csv(path,usecols=[target],chunksize=chunksize):
+        classes.update(chunk[target].unique())
+    return np.array(sorted(classes))
+
+
+def _scores(model,x,y):
+
+    # the accumulator for one chunk; probabilities feed the AUC histograms
+    # when the model has them
+    classifier=is_classifier(model)
+    if hasattr(model,'feature_names_in_') and not isinstance(x,pd.DataFrame):
+        x=pd.DataFrame(x,columns=model.feature_names_in_)
+    proba=model.predict_proba(x) if classifier and hasattr(model,'predict_proba') else None
+    scores=fast_metrics.running_scores(score_classes=getattr(model,'classes_',None) if proba is not None else None,classification=classifier)
+    return scores.update(y,model.predict(x),proba)
+
+
+def score_array(model,x,y,chunksize=100000,workers=None):
+
+    # in-memory rows, scored block by block on threads so only one block of
+    # predictions per worker exists at a time
+    y=np.asarray(y)
+    total=fast_metrics.running_scores()
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for s in pool.map(lambda i:_scores(model,x[i:i+chunksize],y[i:i+chunksize]),range(0,len(y),chunksize)):
+            total.merge(s)
+    return total
+
+
+def score_csv(model,path,columns,target,chunksize=100000,workers=None,holdout=0):
+
+    # each worker parses and scores its own slice of the file, only the
+    # accumulators come back; with a holdout fraction only the held-out rows
+    total=fast_metrics.running_scores()
+    for s in map_chunks(partial(_scores,model),path,columns,target,chunksize,workers,holdout,held=bool(holdout)):
+        total.merge(s)
+    return total
+
+
+def train(model,path,columns,target,chunksize=100000,holdout=0.1,passes=1,callback=None):
+
+    classes=scan_classes(path,target,chunksize) if is_classifier(model) else None
+    trained=0
+    for p in range(passes):
+        for x,y,held in read_chunks(path,columns,target,chunksize,holdout):
+            if (~held).sum()==0:
+                continue
+            if classes is not None:
+                model.partial_fit(x[~held],y[~held],classes=classes)
+            else:
+                model.partial_fit(x[~held],y[~held])
+            trained+=int((~held).sum())
+            if callback:
+                callback(trained)
+    scores=fast_metrics.running_scores(classes,classification=classes is not None)
+    for x,y,held in read_chunks(path,columns,target,chunksize,holdout):
+        if held.any():
+            scores.update(y[held],model.predict(x[held]))
+    return model,dict(scores.results(),trained=trained)
@@ -5,17 +5,13 @@ import data_visualise
 import table_display
 from PyQt5 import uic, QtWidgets ,QtCore, QtGui
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
 from sklearn.svm import SVC
 from sklearn import metrics
 import numpy as np
 import matplotlib.pyplot as plt
-from mlxtend.plotting import plot_decision_regions
 import pandas as pd
 import seaborn as sns
-from sklearn.metrics import roc_curve
-from sklearn.metrics import auc
-import common
+import common,search,cross_val,fit_cache,split_service,plots,kernel_approx,fast_metrics,curves,background
 
 
 class UI(QMainWindow):
@@ -51,15 +47,19 @@ class UI(QMainWindow):
 		self.test_size_btn=self.findChild(QPushButton,"test_size_btn")
 		self.train_btn.clicked.connect(self.training)
 		self.conf_mat_btn=self.findChild(QPushButton,"conf_mat")
-		#self.roc_btn.clicked.connect(self.roc_plot)
+		self.roc_btn.clicked.connect(self.roc_plot)
 		self.conf_mat_btn.clicked.connect(self.conf_matrix)
 		self.test_size_btn.clicked.connect(self.test_split)
 		self.dwnld.clicked.connect(self.download_model)
+		self.visualize.clicked.connect(self.boundary)
+		self.search_btn.clicked.connect(self.run_search)
+		self.cv_btn.clicked.connect(self.cross_validate)
 		self.setvalue()
 		self.show()
 
 	def setvalue(self):
 		self.target.setText(self.target_value)
+		self.group_col.addItems(list(self.X.columns))
 		self.columns.clear()
 		self.columns.addItems(self.column_list)
 		self.X_combo.addItems(self.column_list)
@@ -67,54 +67,104 @@ class UI(QMainWindow):
 
 	def download_model(self):
 
-		name = QtWidgets.QFileDialog.getSaveFileName(self, 'Save File','/home/akshay/Desktop',"pickle(*.pkl)")
-		#file = open(name[0],'w')
-		
-		pkl_filename = name[0]
-		with open(pkl_filename, 'wb') as file:
-			pickle.dump(self.svc_model, file)  
-		
-		self.user_act.save_file(pkl_filename)
+		name = QtWidgets.QFileDialog.getSaveFileName(self, 'Save File','/home/akshay/Desktop',"bundle(*.mlb);;pickle(*.pkl)")
+		if name[0]=="":
+			return
+		self.user_act.save_model(self.svc_model,name[0],self.X,self.target_value)
 
 	def test_split(self):
 
-		self.x_train,self.x_test,self.y_train,self.y_test = train_test_split(self.df,self.X[self.target_value],test_size=float(self.test_data.text()),random_state=0)
+		mode=self.split_mode.currentText()
+		self.split=split_service.get(self.df,self.X[self.target_value],float(self.test_data.text()),mode=mode,groups=self.X[self.group_col.currentText()] if mode=='grouped' else None,dtype=self.split_dtype.currentText())
+		self.x_train,self.x_test,self.y_train,self.y_test = self.split.views()
+		self.data_key=self.split.key
 		print(self.y_train.shape)
 		print(self.y_test.shape)
 		self.train_size.setText(str(self.x_train.shape))
 		self.test_size.setText(str(self.x_test.shape))
 
+	def build_model(self):
+
+		if self.svm_mode.currentText()=='exact':
+			gamma=self.gamma.currentText() if self.gamma.currentText()!='custom' else float(self.custom_gamma.text())
+			model=SVC(C=float(self.c_.text()),kernel=self.kernel.currentText(),degree=int(float(self.degree.text())),gamma=gamma,coef0=float(self.coef.text()),decision_function_shape=self.dec_func.currentText())
+		else:
+			gamma=kernel_approx.gamma_value(self.gamma.currentText(),self.x_train,self.custom_gamma.text())
+			max_iter=int(self.max_iter.text()) if int(self.max_iter.text())>0 else 1000
+			model=kernel_approx.classifier(self.svm_mode.currentText(),C=float(self.c_.text()),kernel=self.kernel.currentText(),gamma=gamma,degree=int(float(self.degree.text())),coef0=float(self.coef.text()),n_components=int(self.n_components.text()),max_iter=max_iter)
+		if self.calibrate.isChecked():
+			model=kernel_approx.held_out_calibration(model)
+		return model
+
 	def training(self):
 
-		self.svc_model = SVC(C=float(self.c_.text()),kernel=self.kernel.currentText(),degree=float(self.degree.text()),gamma=self.gamma.currentText(),coef0=float(self.coef.text()),decision_function_shape=self.dec_func.currentText(),probability=True)
-		self.svc_model.fit(self.x_train.values,self.y_train.values)
-		value=0
-		width=0
-		self.plotting=self.column_list[2:]
-		print(self.plotting)
-		
-		plot_decision_regions(X=self.x_train.values,
-					  y=self.y_train.values,
-					  clf=self.svc_model,
-					  filler_feature_values={i+2:value for i,j in enumerate(self.plotting) },
-					  filler_feature_ranges={i+2:width for i,j in enumerate(self.plotting)},
-					  zoom_factor=0.1,
-					  legend=2)
-		plt.show()
-		self.pre=self.svc_model.predict(self.x_test)
-		self.mae.setText(str(metrics.mean_absolute_error(self.y_test,self.pre)))
-		self.mse.setText(str(metrics.mean_squared_error(self.y_test,self.pre)))
-		self.rmse.setText(str(np.sqrt(metrics.mean_squared_error(self.y_test,self.pre))))
+		self.svc_model,self.pre,hit=fit_cache.fit(self.build_model(),self.x_train,self.y_train,self.x_test,self.data_key)
+		self.statusBar().showMessage(fit_cache.cache.status(hit)+self.fallback_note())
+		self.show_metrics()
+
+	def fallback_note(self):
+
+		mode,kernel=self.svm_mode.currentText(),self.kernel.currentText()
+		if kernel_approx.map_used(mode,kernel)==mode:
+			return ""
+		return "; random fourier features only exist for rbf, used nystroem for the {} kernel".format(kernel)
+
+	def boundary(self):
+
+		plots.decision_regions(self.svc_model,self.x_train,self.y_train,self.column_list,self.X_combo.currentText(),self.Y_combo.currentText())
+
+	def run_search(self):
+
+		base={'kernel':self.kernel.currentText(),'degree':int(float(self.degree.text())),'coef0':float(self.coef.text()),'decision_function_shape':self.dec_func.currentText()}
+		self.leaderboard.clear()
+		errors=[]
+		self.search_btn.setEnabled(False)
+
+		def done(board):
+			self.search_btn.setEnabled(True)
+			if board:
+				self.svc_model,self.pre,hit=fit_cache.fit(SVC(**dict(base,**search.best_params(board))),self.x_train,self.y_train,self.x_test,self.data_key)
+				self.statusBar().showMessage(fit_cache.cache.status(hit))
+				self.show_metrics()
+			else:
+				self.statusBar().showMessage("no candidate could be fitted: "+("; ".join(errors) or "none finished within the budget"))
 
-		text=steps.classification_(self.y_test,self.pre)
-		self.report.setPlainText(text)
+		# candidates are fitted on a worker thread, the board updates as they finish
+		background.start(search.run,SVC,search.parse_space(self.search_space.text()),self.x_train,self.y_train,strategy=self.strategy.currentText(),base=base,budget=float(self.budget.text()),errors=errors,progress=self.show_board,done=done,failed=self.search_failed)
+
+	def show_board(self,board):
+
+		self.leaderboard.setPlainText(search.format_board(board))
+
+	def search_failed(self,message):
+
+		self.search_btn.setEnabled(True)
+		self.statusBar().showMessage(message)
+
+	def cross_validate(self):
+
+		scores=cross_val.run(self.build_model(),self.df,self.X[self.target_value],folds=int(self.folds.text()),stratified=self.cv_mode.currentText()=='stratified k-fold')
+		summary=cross_val.summary(scores)
+		self.mae.setText(summary.get('mae',''))
+		self.mse.setText(summary.get('mse',''))
+		self.rmse.setText(summary.get('rmse',''))
+		self.report.setPlainText(cross_val.report(scores))
+
+	def show_metrics(self):
+
+		self.scores=fast_metrics.evaluate(self.y_test,self.pre)
+		self.mae.setText(str(self.scores.get('mae','')))
+		self.mse.setText(str(self.scores.get('mse','')))
+		self.rmse.setText(str(self.scores.get('rmse','')))
+		self.report.setPlainText(fast_metrics.report_text(self.scores))
 	def conf_matrix(self):
 
-		data = {'y_Actual':self.y_test.values,'y_Predicted':self.pre }
-		df = pd.DataFrame(data, columns=['y_Actual','y_Predicted'])
-		confusion_matrix = pd.crosstab(df['y_Actual'], df['y_Predicted'], rownames=['Actual'], colnames=['Predicted'])
 		plt.figure()
-		sns.heatmap(confusion_matrix, annot=True)
+		sns.heatmap(fast_metrics.confusion_frame(self.scores), annot=True)
 		plt.show()
 
+	def roc_plot(self):
+
+		curves.plot(curves.cache.get(self.svc_model,self.x_test,self.y_test),"SVM")
+
 	
\ No newline at end of file
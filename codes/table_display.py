@@ -47,11 +47,10 @@ class DataFrameModel(QtCore.QAbstractTableModel):
         if not index.isValid() or not (0 <= index.row() < self.rowCount() \
             and 0 <= index.column() < self.columnCount()):
             return QtCore.QVariant()
-        row = self._dataframe.index[index.row()]
         col = self._dataframe.columns[index.column()]
         dt = self._dataframe[col].dtype
 
-        val = self._dataframe.iloc[row][col]
+        val = self._dataframe.iloc[index.row(), index.column()]
         if role == QtCore.Qt.DisplayRole:
             return str(val)
         elif role == DataFrameModel.ValueRole:
@@ -60,6 +59,12 @@ class DataFrameModel(QtCore.QAbstractTableModel):
             return dt
         return QtCore.QVariant()
 
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        col = self._dataframe.columns[column]
+        self._dataframe = self._dataframe.sort_values(col, ascending=order == QtCore.Qt.AscendingOrder, kind='mergesort')
+        self.layoutChanged.emit()
+
     def roleNames(self):
         roles = {
             QtCore.Qt.DisplayRole: b'display',
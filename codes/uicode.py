@@ -5,7 +5,7 @@ from PyQt5 import uic, QtWidgets ,QtCore, QtGui
 from sklearn.preprocessing import LabelEncoder
 
 import linear_reg,svm_model,table_display,data_visualise,SVR,logistic_reg,RandomForest
-import KNN,mlp,pre_trained,add_steps,gaussian
+import KNN,mlp,pre_trained,add_steps,gaussian,compare,model_cache
 
 
 class error_window(QMainWindow):
@@ -85,6 +85,7 @@ class UI(QMainWindow):
         self.heatmap_btn.clicked.connect(self.heatmap_gen)
 
         self.con_btn.clicked.connect(self.con_cat)
+        self.onehot_btn.clicked.connect(self.one_hot)
         self.submit_btn.clicked.connect(self.set_target)
 
         self.train=self.findChild(QPushButton,"train")
@@ -93,6 +94,8 @@ class UI(QMainWindow):
         
         self.pre_trained.clicked.connect(self.upload_model)
         self.go_pre_trained.clicked.connect(self.test_pretrained)
+        self.compare_btn.clicked.connect(self.compare_models)
+        model_cache.cache.warm(model_cache.recent())
         self.show()
 
     def scale_value(self):
@@ -137,6 +140,7 @@ class UI(QMainWindow):
 
         self.target_value=str(self.item.text()).split()[0]
         steps.add_code("target=data['"+self.target_value+"']")
+        steps.add_pipeline("target",('target',self.target_value,None))
         self.target_col.setText(self.target_value)
 
     def filldetails(self,flag=1):
@@ -186,14 +190,23 @@ class UI(QMainWindow):
         self.table.setModel(x)
         
     def upload_model(self):
-        self.filePath_pre, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open file', '/home/akshay/Dekstop',"pkl(*.pkl)")
-        with open(self.filePath_pre, 'rb') as file:
-            self.pickle_model = pickle.load(file)
+        self.filePath_pre, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open file', '/home/akshay/Dekstop',"bundle(*.mlb);;pkl(*.pkl);;forest(*.forest)")
+        if self.filePath_pre=="":
+            return
+        # reopening a file that has not changed is a cache hit
+        self.pickle_model = model_cache.cache.get(self.filePath_pre)['model']
+        model_cache.remember(self.filePath_pre)
+        self.statusBar().showMessage(model_cache.cache.status())
         
     def test_pretrained(self):
 
         self.testing=pre_trained.UI(self.df,self.target_value,self.pickle_model,self.filePath_pre)
 
+    def compare_models(self):
+
+        if(self.target_value!=""):
+            self.compare_win=compare.UI(self.df,self.target_value,steps)
+
     def con_cat(self):
         
         a=self.cat_column.currentText()
@@ -202,20 +215,32 @@ class UI(QMainWindow):
         steps.add_pipeline("LabelEncoder",func_name)
         self.filldetails()
 
+    def one_hot(self):
+
+        a=self.cat_column.currentText()
+        self.df,func_name=data.one_hot(self.df,a)
+        steps.add_text("Column "+ a + " one-hot encoded into sparse columns")
+        steps.add_pipeline("OneHotEncoder",func_name)
+        self.filldetails()
+
     def fillna(self):
 
         self.df[self.emptycolumn.currentText()]=data.fillna(self.df,self.emptycolumn.currentText())
         code="data['"+self.emptycolumn.currentText()+"'].fillna('"'Uknown'"',inplace=True)"
         steps.add_code(code)
         steps.add_text("Empty values of "+ self.emptycolumn.currentText() + " filled with Uknown")
+        steps.add_pipeline("fillna",('fill',self.emptycolumn.currentText(),"Uknown"))
         self.filldetails()
 
     def fillme(self):
 
         self.df[self.emptycolumn.currentText()]=data.fillmean(self.df,self.emptycolumn.currentText())
-        code="data['"+column+"'].fillna(data['"+self.emptycolumn.currentText()+"'].mean(),inplace=True)"
+        column=self.emptycolumn.currentText()
+        code="data['"+column+"'].fillna(data['"+column+"'].mean(),inplace=True)"
         steps.add_code(code)
-        steps.add_text("Empty values of "+ self.emptycolumn.currentText() + " filled with mean value")
+        steps.add_text("Empty values of "+ column + " filled with mean value")
+        # filling with the mean leaves the mean unchanged, so it can be read back
+        steps.add_pipeline("fillmean",('fill',column,float(self.df[column].mean())))
         self.filldetails()
 
     def getCSV(self):
@@ -224,6 +249,7 @@ class UI(QMainWindow):
         code="data=pd.read_csv('"+str(self.filePath)+"')"
         steps.add_code(code)
         steps.add_text("File "+self.filePath+" read")
+        steps.delete_pipeline()
         if(self.filePath!=""):
             self.filldetails(0)
 
@@ -241,6 +267,7 @@ class UI(QMainWindow):
         self.df=data.drop_columns(self.df,self.dropcolumns.currentText())
         steps.add_code("data=data.drop('"+self.dropcolumns.currentText()+"',axis=1)")
         steps.add_text("Column "+ self.dropcolumns.currentText()+ " dropped")
+        steps.add_pipeline("drop",('drop',self.dropcolumns.currentText(),None))
         self.filldetails()  
 
     def scatter_plot(self):
@@ -271,7 +298,8 @@ class UI(QMainWindow):
 
 
  
-app = QApplication(sys.argv)
-window = UI()
-error_w=error_window()
-app.exec_()
\ No newline at end of file
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = UI()
+    error_w=error_window()
+    app.exec_()
\ No newline at end of file
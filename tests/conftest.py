@@ -0,0 +1,4 @@
+import os,sys
+
+# the modules live flat in codes/ and import each other by bare name
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","codes"))
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+import array_file
+
+
+def test_round_trip_is_memory_mapped(tmp_path):
+
+    path=str(tmp_path/"a.arr")
+    arrays={'f':np.arange(10,dtype=np.float32).reshape(2,5),'i':np.arange(7,dtype=np.int64),
+        'u':np.array([1,2,3],dtype=np.uint8),'empty':np.zeros((0,4)),'t':np.arange(6.0).reshape(2,3).T}
+    array_file.save(path,arrays,{'kind':'test','n':3})
+    loaded,meta=array_file.load(path)
+    assert meta=={'kind':'test','n':3}
+    for name,a in arrays.items():
+        assert loaded[name].dtype==a.dtype and np.array_equal(loaded[name],a)
+    assert isinstance(loaded['f'],np.memmap)
+    header,start=array_file.read_header(path)
+    assert start%array_file.ALIGN==0
+    assert all(spec['offset']%array_file.ALIGN==0 for spec in header['arrays'].values())
+
+
+def test_rejects_other_files(tmp_path):
+
+    path=tmp_path/"x.bin"
+    path.write_bytes(b"not an array file")
+    with pytest.raises(ValueError):
+        array_file.read_header(str(path))
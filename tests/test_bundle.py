@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+import array_file,bundle
+
+
+def test_round_trip_predicts_the_same(tmp_path):
+
+    rng=np.random.RandomState(0)
+    x=pd.DataFrame(rng.randn(500,4),columns=list("abcd"))
+    y=(x['a']+x['b']>0).astype(int)
+    model=RandomForestClassifier(n_estimators=20,random_state=0).fit(x,y)
+    steps=[('scale',['a','b'],StandardScaler().fit(x[['a','b']]))]
+    path=str(tmp_path/"m.mlb")
+    bundle.save(path,model,steps,bundle.schema_of(x.assign(t=y),'t'),{'actions':"fit"})
+    b=bundle.open_bundle(path)
+    assert b.schema['columns']==list("abcd") and b.schema['target']=='t'
+    assert b.info=={'actions':"fit"}
+    assert b._model is None
+    assert (b.model.predict(x)==model.predict(x)).all()
+    assert np.allclose(b.model.predict_proba(x),model.predict_proba(x))
+    assert np.allclose(b.steps[0][2].mean_,steps[0][2].mean_)
+
+
+def test_large_arrays_are_mapped_from_the_file(tmp_path):
+
+    # random labels grow deep trees, whose node arrays pass the inline limit
+    rng=np.random.RandomState(1)
+    x,y=rng.randn(4000,3),rng.randint(0,2,4000)
+    model=RandomForestClassifier(n_estimators=2,random_state=0).fit(x,y)
+    path=str(tmp_path/"big.mlb")
+    bundle.save(path,model)
+    b=bundle.open_bundle(path)
+    assert len(b.meta['model_buffers'])>=2
+    assert (b.model.predict(x)==model.predict(x)).all()
+    assert isinstance(b._map,np.memmap)
+
+
+def test_rejects_other_array_files_and_newer_versions(tmp_path):
+
+    path=str(tmp_path/"other.arr")
+    array_file.save(path,{'a':np.zeros(3)},{'format':'something else'})
+    with pytest.raises(ValueError):
+        bundle.open_bundle(path)
+    newer=str(tmp_path/"newer.mlb")
+    array_file.save(newer,{'model':np.zeros(1,dtype=np.uint8)},{'format':bundle.FORMAT,'version':bundle.VERSION+1})
+    with pytest.raises(ValueError):
+        bundle.open_bundle(newer)
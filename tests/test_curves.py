@@ -0,0 +1,38 @@
+import numpy as np
+from sklearn import metrics
+from sklearn.linear_model import LogisticRegression
+import curves
+
+
+def test_binary_matches_sklearn():
+
+    rng=np.random.RandomState(0)
+    y=rng.randint(0,2,500)
+    # rounded so that many rows share a threshold
+    score=np.round(y*0.3+rng.rand(500),2)
+    c=curves.one_class(y==1,score,max_points=10**6)
+    fpr,tpr,_=metrics.roc_curve(y,score,drop_intermediate=False)
+    assert np.isclose(c['auc'],metrics.roc_auc_score(y,score))
+    assert np.isclose(c['ap'],metrics.average_precision_score(y,score))
+    assert np.allclose(c['fpr'],fpr) and np.allclose(c['tpr'],tpr)
+
+
+def test_multiclass_one_vs_rest():
+
+    rng=np.random.RandomState(1)
+    x=rng.randn(600,3)
+    y=np.array(list("abc"))[np.argmax(x+rng.randn(600,3),axis=1)]
+    model=LogisticRegression().fit(x,y)
+    result=curves.compute(y,curves.scores_of(model,x),model.classes_)
+    proba=model.predict_proba(x)
+    for k,c in enumerate(model.classes_):
+        assert np.isclose(result[c]['auc'],metrics.roc_auc_score(y==c,proba[:,k]))
+
+
+def test_thinned_curve_keeps_ends():
+
+    rng=np.random.RandomState(2)
+    y=rng.randint(0,2,5000)
+    c=curves.one_class(y==1,rng.rand(5000),max_points=50)
+    assert len(c['fpr'])<=50
+    assert c['fpr'][0]==0 and c['fpr'][-1]==1 and c['tpr'][-1]==1
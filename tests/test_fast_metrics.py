@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from sklearn import metrics
+import fast_metrics
+
+rng=np.random.RandomState(0)
+CASES=[(rng.randint(0,3,200),rng.randint(0,3,200)),(rng.randint(0,2,1000),rng.randint(0,2,1000)),
+    (rng.randint(0,7,5000),np.clip(rng.randint(0,7,5000)+rng.randint(-1,2,5000),0,6)),
+    (np.array(list("aabbbcccc")),np.array(list("abbbcccca"))),(rng.randint(0,4,50),rng.randint(1,5,50))]
+
+
+@pytest.mark.parametrize("y_true,y_pred",CASES)
+def test_scores_match_sklearn(y_true,y_pred):
+
+    s=fast_metrics.evaluate(y_true,y_pred)
+    assert np.array_equal(s['confusion'],metrics.confusion_matrix(y_true,y_pred,labels=s['classes']))
+    assert np.isclose(s['accuracy'],metrics.accuracy_score(y_true,y_pred))
+    p,r,f,support=metrics.precision_recall_fscore_support(y_true,y_pred,labels=s['classes'],zero_division=0)
+    assert np.allclose(s['precision'],p) and np.allclose(s['recall'],r) and np.allclose(s['f1'],f)
+    for avg in ('macro','weighted'):
+        assert np.allclose(s[avg],metrics.precision_recall_fscore_support(y_true,y_pred,average=avg,zero_division=0)[:3])
+
+
+@pytest.mark.parametrize("y_true,y_pred",CASES)
+@pytest.mark.parametrize("digits",[2,4])
+def test_report_text_matches_classification_report(y_true,y_pred,digits):
+
+    ours=fast_metrics.report_text(fast_metrics.evaluate(y_true,y_pred),digits)
+    assert ours==metrics.classification_report(y_true,y_pred,digits=digits,zero_division=0)
+
+
+def test_errors_match_sklearn():
+
+    y,pre=rng.randn(300),rng.randn(300)
+    e=fast_metrics.errors(y,pre)
+    assert np.isclose(e['mae'],metrics.mean_absolute_error(y,pre))
+    assert np.isclose(e['mse'],metrics.mean_squared_error(y,pre))
+    assert np.isclose(e['rmse'],np.sqrt(metrics.mean_squared_error(y,pre)))
+
+
+def test_running_scores_merge_in_any_order():
+
+    y_true,y_pred=CASES[2]
+    proba=rng.dirichlet(np.ones(7),len(y_true))
+    parts=[fast_metrics.running_scores(score_classes=np.arange(7)).update(y_true[i:i+700],y_pred[i:i+700],proba[i:i+700]) for i in range(0,len(y_true),700)]
+    total=fast_metrics.running_scores()
+    for s in parts[::-1]:
+        total.merge(s)
+    ref=fast_metrics.evaluate(y_true,y_pred)
+    out=total.results()
+    assert out['rows']==len(y_true)
+    assert np.isclose(out['accuracy'],ref['accuracy'])
+    assert np.isclose(out['mae'],ref['mae'])
+    # binned AUC, within a bin width of sklearn's exact one
+    exact=np.mean([metrics.roc_auc_score(y_true==k,proba[:,k]) for k in range(7)])
+    assert abs(out['auc']-exact)<2e-3
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.linear_model import LogisticRegression
+import fit_cache
+
+
+def test_fingerprint_follows_contents():
+
+    a=np.arange(12.0).reshape(3,4)
+    assert fit_cache.fingerprint(a)==fit_cache.fingerprint(a.copy())
+    b=a.copy()
+    b[2,3]=0
+    assert fit_cache.fingerprint(a)!=fit_cache.fingerprint(b)
+    assert fit_cache.fingerprint(a)!=fit_cache.fingerprint(a.astype(np.float32))
+    df=pd.DataFrame(a,columns=list("abcd"))
+    assert fit_cache.fingerprint(df)!=fit_cache.fingerprint(df.rename(columns={'a':'z'}))
+
+
+def test_fingerprint_hashes_sparse_entries():
+
+    m=sparse.random(50,20,density=0.1,format='csr',random_state=0)
+    n=m.copy()
+    n.data[0]+=1
+    assert fit_cache.fingerprint(m)==fit_cache.fingerprint(m.tocoo())
+    assert fit_cache.fingerprint(m)!=fit_cache.fingerprint(n)
+
+
+def test_lru_drops_least_recently_used():
+
+    c=fit_cache.fit_cache(max_bytes=3000)
+    for k in "abc":
+        c.put(k,np.zeros(100))
+    c.get('a')
+    c.put('d',np.zeros(100))
+    assert c.get('b') is None
+    assert c.get('a') is not None and c.get('d') is not None
+    assert c.total<=3000
+    c.put('big',np.zeros(1000))
+    assert c.get('big') is None
+
+
+def test_fit_hit_matches_sklearn():
+
+    rng=np.random.RandomState(0)
+    x,y=rng.randn(200,4),rng.randint(0,2,200)
+    ref=LogisticRegression().fit(x[:150],y[:150]).predict(x[150:])
+    key=fit_cache.fingerprint(x,y,"test_fit_hit")
+    model,pre,hit=fit_cache.fit(LogisticRegression(),x[:150],y[:150],x[150:],key)
+    assert not hit and (pre==ref).all()
+    again,pre2,hit=fit_cache.fit(LogisticRegression(),x[:150],y[:150],x[150:],key)
+    assert hit and again is model and (pre2==ref).all()
+    _,_,hit=fit_cache.fit(LogisticRegression(C=0.5),x[:150],y[:150],x[150:],key)
+    assert not hit
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression,Ridge
+import lstsq_stream
+
+
+def data(n=2000,p=5,seed=0):
+
+    rng=np.random.RandomState(seed)
+    x=rng.randn(n,p)*rng.uniform(0.1,10,p)+rng.randn(p)
+    return x,x@rng.randn(p)+3+0.1*rng.randn(n)
+
+
+def test_matches_linear_regression():
+
+    x,y=data()
+    for intercept in (True,False):
+        ours=lstsq_stream.streaming_lstsq(fit_intercept=intercept,chunksize=300).fit(x,y)
+        ref=LinearRegression(fit_intercept=intercept).fit(x,y)
+        assert np.allclose(ours.coef_,ref.coef_,atol=1e-8)
+        assert np.allclose(ours.intercept_,ref.intercept_,atol=1e-8)
+
+
+def test_alpha_matches_ridge():
+
+    x,y=data()
+    ours=lstsq_stream.streaming_lstsq(alpha=5.0,chunksize=256).fit(x,y)
+    ref=Ridge(alpha=5.0).fit(x,y)
+    assert np.allclose(ours.coef_,ref.coef_,atol=1e-8)
+    assert np.allclose(ours.predict(x),ref.predict(x),atol=1e-7)
+
+
+def test_partial_fit_equals_one_fit():
+
+    x,y=data()
+    whole=lstsq_stream.streaming_lstsq().fit(x,y)
+    parts=lstsq_stream.streaming_lstsq()
+    for i in range(0,len(x),333):
+        parts.partial_fit(x[i:i+333],y[i:i+333])
+    assert parts.moments_.n==len(x)
+    assert np.allclose(parts.coef_,whole.coef_,atol=1e-10)
+
+
+def test_fit_csv_matches_in_memory(tmp_path):
+
+    x,y=data(1000,3)
+    path=str(tmp_path/"rows.csv")
+    df=pd.DataFrame(x,columns=list("abc"))
+    df['y']=y
+    df.to_csv(path,index=False)
+    ours=lstsq_stream.streaming_lstsq(chunksize=170).fit_csv(path,list("abc"),'y',workers=2)
+    ref=LinearRegression().fit(x,y)
+    assert np.allclose(ours.coef_,ref.coef_,atol=1e-8)
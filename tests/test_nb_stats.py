@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from sklearn.naive_bayes import GaussianNB
+import nb_stats,streaming
+
+
+def data(n=3000,seed=0):
+
+    rng=np.random.RandomState(seed)
+    y=rng.choice(["a","b","c"],n,p=[0.5,0.3,0.2])
+    x=rng.randn(n,4)+(y=="b")[:,None]*1.5-(y=="c")[:,None]
+    return x,y
+
+
+def same(ours,ref):
+
+    assert list(ours.classes_)==list(ref.classes_)
+    assert np.allclose(ours.class_count_,ref.class_count_)
+    assert np.allclose(ours.theta_,ref.theta_,atol=1e-10)
+    assert np.allclose(ours.var_,ref.var_,atol=1e-10)
+
+
+def test_fit_matches_gaussian_nb():
+
+    x,y=data()
+    ours=nb_stats.parallel_gaussian_nb(chunksize=400).fit(x,y)
+    ref=GaussianNB().fit(x,y)
+    same(ours,ref)
+    assert (ours.predict(x)==ref.predict(x)).all()
+    assert np.allclose(ours.predict_proba(x),ref.predict_proba(x))
+
+
+def test_add_equals_fitting_everything():
+
+    x,y=data()
+    ours=nb_stats.parallel_gaussian_nb().fit(x[:1000],y[:1000]).add(x[1000:],y[1000:])
+    same(ours,GaussianNB().fit(x,y))
+
+
+def test_fit_csv_with_holdout(tmp_path):
+
+    x,y=data(2000)
+    path=str(tmp_path/"rows.csv")
+    df=pd.DataFrame(x,columns=list("pqrs"))
+    df['t']=y
+    df.to_csv(path,index=False)
+    ours=nb_stats.parallel_gaussian_nb(chunksize=300).fit_csv(path,list("pqrs"),'t',workers=2,holdout=0.2)
+    _,offsets=streaming.chunk_offsets(path,300)
+    held=np.concatenate([streaming.held_out(o,min(300,len(y)-300*i),0.2) for i,o in enumerate(offsets)])
+    x=df[list("pqrs")].to_numpy()
+    same(ours,GaussianNB().fit(x[~held],y[~held]))
+    scores=streaming.score_csv(ours,path,list("pqrs"),'t',300,workers=2,holdout=0.2).results()
+    assert scores['rows']==held.sum()
+    assert np.isclose(scores['accuracy'],(ours.predict(x[held])==y[held]).mean())
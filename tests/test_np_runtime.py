@@ -0,0 +1,48 @@
+import os
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression,LogisticRegression,SGDClassifier
+from sklearn.neural_network import MLPClassifier,MLPRegressor
+import np_runtime
+
+rng=np.random.RandomState(0)
+X=rng.randn(400,6)
+Y3=np.argmax(X[:,:3]+0.5*rng.randn(400,3),axis=1)
+
+
+@pytest.mark.parametrize("model,y",[
+    (LogisticRegression(max_iter=500),Y3),
+    (LogisticRegression(solver='liblinear'),Y3==0),
+    (MLPClassifier(hidden_layer_sizes=(16,),max_iter=300,random_state=0),Y3),
+    (SGDClassifier(loss='log_loss',random_state=0),Y3),
+])
+def test_classifier_export_matches_sklearn(model,y,tmp_path):
+
+    model.fit(X,y)
+    path=str(tmp_path/"m.npmodel")
+    err=np_runtime.export_checked(model,path,X)
+    runtime=np_runtime.load(path)
+    assert err<1e-3
+    assert np.allclose(runtime.predict_proba(X),model.predict_proba(X),atol=1e-4)
+    assert (runtime.predict(X)==model.predict(X)).mean()>0.99
+
+
+@pytest.mark.parametrize("model",[LinearRegression(),MLPRegressor(hidden_layer_sizes=(8,),max_iter=300,random_state=0)])
+def test_regressor_export_matches_sklearn(model,tmp_path):
+
+    y=X@rng.randn(6)
+    model.fit(X,y)
+    path=str(tmp_path/"m.npmodel")
+    np_runtime.export_checked(model,path,X)
+    assert np.allclose(np_runtime.load(path).predict(X),model.predict(X),rtol=1e-3,atol=1e-4)
+
+
+def test_mismatch_removes_the_file(tmp_path):
+
+    # modified_huber probabilities are not the one-vs-rest logistic the
+    # runtime computes, so the check fails and nothing is left behind
+    model=SGDClassifier(loss='modified_huber',random_state=0).fit(X,Y3)
+    path=str(tmp_path/"m.npmodel")
+    with pytest.raises(ValueError):
+        np_runtime.export_checked(model,path,X)
+    assert not os.path.exists(path)
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+import bundle,data_visualise,score
+
+
+def raw_rows(n,seed):
+
+    rng=np.random.RandomState(seed)
+    df=pd.DataFrame({'id':np.arange(n),'a':rng.randn(n),'b':rng.randn(n)*10,'city':rng.choice(["x","y","z"],n)})
+    df['t']=np.where(df['a']+(df['city']=="y")>0.3,"yes","no")
+    return df
+
+
+def test_score_files_matches_sklearn(tmp_path):
+
+    data=data_visualise.data_()
+    train=raw_rows(400,0)
+    df=train.drop('id',axis=1)
+    df,onehot=data.one_hot(df,'city')
+    df,scale=data.StandardScale(df,'t')
+    steps=[onehot,scale]
+    x=data.replay(train.drop(['id','t'],axis=1),steps)
+    model=LogisticRegression().fit(x,train['t'])
+    path=str(tmp_path/"m.mlb")
+    bundle.save(path,model,steps)
+
+    new=raw_rows(1000,1).drop('t',axis=1)
+    # a quoted field with a newline must not shift the chunk boundaries
+    new['note']=np.where(new['id']%7==0,"two\nlines","one")
+    inputs=[str(tmp_path/"in1.csv"),str(tmp_path/"in2.csv")]
+    new[:600].to_csv(inputs[0],index=False)
+    new[600:].to_csv(inputs[1],index=False)
+    out=str(tmp_path/"out.csv")
+    rows,_=score.score_files(path,inputs,out,chunksize=128,workers=2,keep=('id',))
+    assert rows==len(new)
+    got=pd.read_csv(out)
+    ref=model.predict(data.replay(new.drop(['id','note'],axis=1),steps))
+    assert (got['id']==new['id']).all()
+    assert (got['prediction']==ref).all()
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+import split_service
+
+
+def frame(n=300,seed=0):
+
+    rng=np.random.RandomState(seed)
+    df=pd.DataFrame({'a':rng.randn(n),'b':rng.randn(n),'c':rng.choice(list("xyz"),n)})
+    dummies=pd.get_dummies(df['c'],prefix='c',sparse=True,dtype=np.uint8)
+    return pd.concat([df.drop('c',axis=1),dummies],axis=1),rng.randint(0,3,n)
+
+
+def test_split_matches_train_test_split():
+
+    x,y=frame()
+    split=split_service.get(x,y,0.25,random_state=3)
+    dense=np.column_stack([np.asarray(x[c],dtype=np.float64) for c in x.columns])
+    x_tr,x_te,y_tr,y_te=train_test_split(dense,y,test_size=0.25,random_state=3)
+    a,b,c,d=split.views()
+    assert np.array_equal(a,x_tr) and np.array_equal(b,x_te)
+    assert np.array_equal(c,y_tr) and np.array_equal(d,y_te)
+
+
+def test_stratified_split_keeps_class_shares():
+
+    x,y=frame()
+    split=split_service.get(x,y,0.2,mode='stratified')
+    _,_,y_tr,y_te=split.views()
+    assert np.allclose(np.bincount(y_te)/len(y_te),np.bincount(y)/len(y),atol=0.02)
+
+
+def test_same_inputs_share_one_split():
+
+    x,y=frame()
+    first=split_service.get(x,y,0.2)
+    assert split_service.get(x.copy(),y.copy(),0.2) is first
+    assert split_service.get(x,y,0.3) is not first
+
+
+def test_sparse_split_equals_dense():
+
+    x,y=frame()
+    assert split_service.has_sparse(x)
+    dense=split_service.get(x,y,0.2)
+    csr=split_service.get(x,y,0.2,sparse=True)
+    assert not hasattr(dense.matrix,'toarray')
+    assert np.array_equal(csr.matrix.toarray(),dense.matrix)